@@ -0,0 +1,261 @@
+"""Benchmarks of the conversion and data transfer paths of pynetlogo.
+
+By default, the benchmarks run against pure python stand-ins for the Java
+objects (see standin.py), so they need no NetLogo installation and measure
+only the work done on the python side. With --real, the same benchmarks
+run against a workspace of a real NetLogo installation.
+
+Examples
+--------
+Run all benchmarks at the default sizes::
+
+    python benchmarks/run_benchmarks.py
+
+Run a selection at smaller sizes and keep the results::
+
+    python benchmarks/run_benchmarks.py --sizes 1e3 1e5 --benchmark type_convert_doubles \
+        repeat_report --output bench_output.txt
+
+Run against NetLogo, with any model to open the workspace::
+
+    python benchmarks/run_benchmarks.py --real --model "Wolf Sheep Predation.nlogo"
+
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+import pynetlogo  # noqa: E402
+from pynetlogo.core import type_convert  # noqa: E402
+from standin import StandInLink, StandInResult  # noqa: E402
+
+DEFAULT_SIZES = [10**3, 10**4, 10**5, 10**6, 10**7]
+
+
+def standin_netlogo_link():
+    """Return a NetLogoLink on a stand-in for the Java link."""
+    link = pynetlogo.NetLogoLink.__new__(pynetlogo.NetLogoLink)
+    link.link = StandInLink()
+    link._globals = None
+    link._instrumentation = None
+    return link
+
+
+def java_result(link, real, netlogo_reporter, standin):
+    """Return the Java result of a reporter, or the stand-in result."""
+    if real:
+        return link.link.report(netlogo_reporter)
+    return standin()
+
+
+def bench_type_convert_doubles(link, size, real):
+    result = java_result(
+        link,
+        real,
+        "n-values {} [i -> i / 2]".format(size),
+        lambda: StandInResult("DoubleList", np.arange(size) / 2),
+    )
+    return lambda: type_convert(result)
+
+
+def bench_type_convert_booleans(link, size, real):
+    result = java_result(
+        link,
+        real,
+        "n-values {} [i -> i mod 2 = 0]".format(size),
+        lambda: StandInResult("BoolList", np.arange(size) % 2 == 0),
+    )
+    return lambda: type_convert(result)
+
+
+def bench_type_convert_strings(link, size, real):
+    result = java_result(
+        link,
+        real,
+        'n-values {} [i -> word "agent-" i]'.format(size),
+        lambda: StandInResult.strings(["agent-{}".format(i) for i in range(size)]),
+    )
+    return lambda: type_convert(result)
+
+
+def bench_type_convert_matrix(link, size, real):
+    rows = max(size // 10, 1)
+    result = java_result(
+        link,
+        real,
+        "n-values {} [i -> n-values 10 [j -> i + j]]".format(rows),
+        lambda: StandInResult("Matrix", np.arange(rows * 10, dtype=np.float64), (rows, 10)),
+    )
+    return lambda: type_convert(result)
+
+
+def bench_type_convert_nested(link, size, real):
+    def standin():
+        entries = [
+            StandInResult("NestedList", [StandInResult("Double", i), StandInResult("String", "a")])
+            for i in range(size // 2)
+        ]
+        return StandInResult("NestedList", entries)
+
+    result = java_result(link, real, 'n-values {} [i -> list i "a"]'.format(size // 2), standin)
+    return lambda: type_convert(result)
+
+
+def bench_report(link, size, real):
+    reporter = "n-values {} [i -> i / 2]".format(size)
+    if not real:
+        link.link.add_reporter(reporter, StandInResult("DoubleList", np.arange(size) / 2))
+    return lambda: link.report(reporter)
+
+
+def resize_world(link, size, real):
+    side = max(int(np.sqrt(size)), 1)
+    if real:
+        link.command("resize-world 0 {0} 0 {0}".format(side - 1))
+    else:
+        link.link.extents = (0, side - 1, 0, side - 1)
+    return side
+
+
+def bench_patch_set_doubles(link, size, real):
+    side = resize_world(link, size, real)
+    data = pd.DataFrame(np.random.default_rng(0).random((side, side)) * 100)
+    return lambda: link.patch_set("pcolor", data)
+
+
+def bench_patch_set_strings(link, size, real):
+    side = resize_world(link, size, real)
+    data = pd.DataFrame(np.arange(side * side).reshape(side, side)).astype(str)
+    return lambda: link.patch_set("plabel", data)
+
+
+def bench_write_attriblist(link, size, real):
+    if real:
+        link.command("clear-turtles create-turtles {}".format(size))
+    rng = np.random.default_rng(0)
+    data = pd.DataFrame(
+        {
+            "who": np.arange(size),
+            "xcor": rng.random(size),
+            "ycor": rng.random(size),
+            "hidden?": rng.random(size) < 0.5,
+            "label": np.arange(size).astype(str),
+        }
+    )
+    return lambda: link.write_NetLogo_attriblist(data, "turtle")
+
+
+def bench_repeat_report(link, size, real):
+    reporters = ["ticks", "count turtles"]
+    reps = max(size // len(reporters), 1)
+    if real:
+        link.command("clear-all reset-ticks")
+    else:
+        for reporter in reporters:
+            link.link.add_reporter(reporter, StandInResult("DoubleList", np.arange(reps + 1.0)))
+    return lambda: link.repeat_report(reporters, reps, go="tick")
+
+
+# name: (setup function, largest size at which the benchmark is run)
+BENCHMARKS = {
+    "type_convert_doubles": (bench_type_convert_doubles, 10**7),
+    "type_convert_booleans": (bench_type_convert_booleans, 10**7),
+    "type_convert_strings": (bench_type_convert_strings, 10**6),
+    "type_convert_matrix": (bench_type_convert_matrix, 10**7),
+    "type_convert_nested": (bench_type_convert_nested, 10**5),
+    "report": (bench_report, 10**7),
+    "patch_set_doubles": (bench_patch_set_doubles, 10**7),
+    "patch_set_strings": (bench_patch_set_strings, 10**6),
+    "write_attriblist": (bench_write_attriblist, 10**6),
+    "repeat_report": (bench_repeat_report, 10**7),
+}
+
+
+def measure(func, min_time: float = 0.2, max_repeat: int = 20):
+    """Return the timings in seconds of repeated calls to func."""
+    start = time.perf_counter()
+    func()
+    first = time.perf_counter() - start
+
+    repeat = int(min(max(min_time / max(first, 1e-9), 3), max_repeat))
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def run(link, names: list[str], sizes: list[int], real: bool):
+    """Run the benchmarks and return the timings as a DataFrame."""
+    rows = []
+    for name in names:
+        setup, max_size = BENCHMARKS[name]
+        for size in sizes:
+            if size > max_size:
+                continue
+            timings = measure(setup(link, size, real))
+            best = min(timings)
+            rows.append(
+                {
+                    "benchmark": name,
+                    "size": size,
+                    "best": best,
+                    "median": statistics.median(timings),
+                    "repeat": len(timings),
+                    "elements/s": size / best,
+                }
+            )
+            print("{:<24}{:>10}{:>12.6f} s".format(name, size, best), file=sys.stderr)
+    return pd.DataFrame(rows).set_index(["benchmark", "size"])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--sizes", nargs="+", type=float, default=DEFAULT_SIZES, help="number of elements"
+    )
+    parser.add_argument(
+        "--benchmark", nargs="+", choices=sorted(BENCHMARKS), help="benchmarks to run"
+    )
+    parser.add_argument("--output", help="file to write the results to")
+    parser.add_argument("--real", action="store_true", help="run against a NetLogo installation")
+    parser.add_argument("--model", help="model to open the workspace with, required with --real")
+    parser.add_argument("--netlogo-home", help="NetLogo installation directory")
+    parser.add_argument("--jvm-path", help="path of the jvm")
+    args = parser.parse_args(argv)
+
+    names = args.benchmark or list(BENCHMARKS)
+    sizes = [int(size) for size in args.sizes]
+
+    if args.real:
+        if args.model is None:
+            parser.error("--real requires --model")
+        link = pynetlogo.NetLogoLink(netlogo_home=args.netlogo_home, jvm_path=args.jvm_path)
+        link.load_model(args.model)
+    else:
+        link = standin_netlogo_link()
+
+    try:
+        results = run(link, names, sizes, args.real)
+    finally:
+        if args.real:
+            link.kill_workspace()
+
+    table = results.to_string(float_format="{:.6g}".format)
+    print(table)
+    if args.output:
+        with open(args.output, "w") as fh:
+            fh.write(table + "\n")
+
+
+if __name__ == "__main__":
+    main()
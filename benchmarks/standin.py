@@ -0,0 +1,139 @@
+"""Pure python stand-ins for the Java NetLogoLink and NLResult objects.
+
+The stand-ins return numpy arrays where the Java objects return Java
+arrays. Both support the buffer protocol, so the python side of pynetlogo
+does the same work as it does against a real workspace. Arrays are returned
+as copies, like the bulk copy out of the Java heap, while the stand-ins
+otherwise cost next to nothing.
+
+"""
+
+import numpy as np
+
+
+class StandInResult:
+    """Stand-in for a netLogoLink.NLResult."""
+
+    def __init__(self, java_type, value, shape=None):
+        self.java_type = java_type
+        self.value = value
+        self.shape = shape
+
+    @classmethod
+    def strings(cls, values):
+        result = cls("StringList", "".join(values))
+        result.lengths = np.fromiter((len(v) for v in values), dtype=np.int32, count=len(values))
+        return result
+
+    def getType(self):
+        return self.java_type
+
+    def getResultAsBoolean(self):
+        return self.value
+
+    def getResultAsString(self):
+        return self.value
+
+    def getResultAsInteger(self):
+        return self.value
+
+    def getResultAsDouble(self):
+        return self.value
+
+    def getResultAsBooleanArray(self):
+        return self.value.copy()
+
+    def getResultAsIntegerArray(self):
+        return self.value.copy()
+
+    def getResultAsDoubleArray(self):
+        return self.value.copy()
+
+    def getResultAsJoinedString(self):
+        return self.value
+
+    def getStringLengths(self):
+        return self.lengths
+
+    def getResultShape(self):
+        return np.asarray(self.shape, dtype=np.int32)
+
+    def getResultAsObject(self):
+        return self.value
+
+
+class StandInSeries:
+    """Stand-in for a netLogoLink.TickSeries."""
+
+    def __init__(self, ticks, results):
+        self.ticks = ticks
+        self.results = results
+
+    def size(self):
+        return self.ticks.shape[0]
+
+    def getTicks(self):
+        return self.ticks
+
+    def getResults(self):
+        return self.results
+
+
+class StandInLink:
+    """Stand-in for a netLogoLink.NetLogoLink.
+
+    Reporters return the results registered with :meth:`add_reporter`.
+    Methods that pass data to NetLogo only touch the data they receive, the
+    way JPype does when converting it to a Java array.
+
+    Parameters
+    ----------
+    extents : tuple of int
+        min-pxcor, max-pxcor, min-pycor, and max-pycor of the world
+
+    """
+
+    def __init__(self, extents=(0, 0, 0, 0)):
+        self.extents = extents
+        self.reporters = {}
+
+    def add_reporter(self, netlogo_reporter, result):
+        self.reporters[netlogo_reporter] = result
+
+    def getWorldExtents(self):
+        return list(self.extents)
+
+    def getTimings(self):
+        return [0, 0]
+
+    def command(self, netlogo_command):
+        pass
+
+    def report(self, netlogo_reporter):
+        return self.reporters[netlogo_reporter]
+
+    def repeatReport(self, go, reporters, reps, include_t0):
+        n = reps + 1 if include_t0 else reps
+        ticks = np.arange(n, dtype=np.float64)
+        results = []
+        for reporter in reporters:
+            series = self.reporters[reporter]
+            results.append(StandInResult(series.java_type, series.value[:n]))
+        return StandInSeries(ticks, results)
+
+    def setPatchesDouble(self, attribute, values):
+        memoryview(values)
+
+    def setPatchesBoolean(self, attribute, values):
+        memoryview(values)
+
+    def setPatchesString(self, attribute, values):
+        len(values)
+
+    def setTurtleVariables(
+        self, name, who, double_names, doubles, bool_names, bools, string_names, strings
+    ):
+        memoryview(who)
+        memoryview(doubles)
+        memoryview(bools)
+        len(strings)
@@ -1,3 +1,10 @@
 from .core import *
+from .instrumentation import *
+from .asynclink import *
+from .experiments import *
+from .pool import *
+from .remote import *
+from .sink import *
+from .supervisor import *
 
 __version__ = "0.5.3-dev"
@@ -0,0 +1,101 @@
+"""asyncio interface for NetLogoLink."""
+
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+
+from .core import NetLogoLink
+
+__all__ = ["AsyncNetLogoLink"]
+
+
+def _async_method(name: str):
+    """Create a coroutine method that runs the NetLogoLink method of the same name."""
+    method = getattr(NetLogoLink, name)
+
+    @functools.wraps(method)
+    async def wrapper(self, *args, timeout: float | None = None, **kwargs):
+        return await self._call(getattr(self.link, name), *args, timeout=timeout, **kwargs)
+
+    wrapper.__doc__ = (
+        "Coroutine version of :meth:`NetLogoLink.{}`, see there for the "
+        "parameters. Accepts an additional timeout in seconds.".format(name)
+    )
+    return wrapper
+
+
+class AsyncNetLogoLink:
+    """asyncio interface to a NetLogo workspace.
+
+    All calls to the workspace run on a dedicated thread, one at a time and
+    in the order in which they were made. The event loop is free while a
+    call is running, so `asyncio.gather` can drive several links
+    concurrently.
+
+    Every method accepts a `timeout` in seconds. If a call times out or is
+    cancelled while it is running in NetLogo, the workspace is halted. Calls
+    that are cancelled before they started are not executed at all.
+
+    Parameters
+    ----------
+    link : NetLogoLink, optional
+           the link to wrap, if not provided a new NetLogoLink is created
+           with the keyword arguments
+    **kwargs
+        passed to NetLogoLink
+
+    Examples
+    --------
+    >>> links = [AsyncNetLogoLink(netlogo_home=netlogo_home) for _ in range(4)]
+    >>> await asyncio.gather(*[link.load_model(modelfile) for link in links])
+    >>> counts = await asyncio.gather(*[link.report("count sheep") for link in links])
+
+    """
+
+    def __init__(self, link: NetLogoLink | None = None, **kwargs):
+        if link is None:
+            link = NetLogoLink(**kwargs)
+        self.link = link
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="pynetlogo-async")
+
+    async def _call(self, method, *args, timeout: float | None = None, **kwargs):
+        future = self._executor.submit(method, *args, **kwargs)
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(future), timeout)
+        except (asyncio.CancelledError, asyncio.TimeoutError):
+            # a call that is still queued is simply dropped, a call that is
+            # already running in java can only be stopped by halting
+            if not future.cancel() and future.running():
+                self.link.halt()
+            raise
+
+    load_model = _async_method("load_model")
+    command = _async_method("command")
+    report = _async_method("report")
+    report_while = _async_method("report_while")
+    repeat_command = _async_method("repeat_command")
+    repeat_report = _async_method("repeat_report")
+    patch_report = _async_method("patch_report")
+    patch_report_many = _async_method("patch_report_many")
+    record_patches = _async_method("record_patches")
+    patch_set = _async_method("patch_set")
+    write_NetLogo_attriblist = _async_method("write_NetLogo_attriblist")
+    agents_report = _async_method("agents_report")
+    network_report = _async_method("network_report")
+    set_globals = _async_method("set_globals")
+    get_globals = _async_method("get_globals")
+    snapshot = _async_method("snapshot")
+    restore = _async_method("restore")
+    cache_stats = _async_method("cache_stats")
+    set_cache_size = _async_method("set_cache_size")
+
+    async def close(self):
+        """Wait for the pending calls and dispose of the workspace."""
+        await self._call(self.link.kill_workspace)
+        self._executor.shutdown(wait=False)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.close()
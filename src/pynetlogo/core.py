@@ -1,18 +1,24 @@
 """Core functionality for pynetlogo."""
 
+import glob
+import hashlib
 import jpype
 import jpype.imports
+import json
 import numpy as np
 import os
 import pandas as pd
 import re
 import string
 import sys
-import tempfile
+import time
 import warnings
+import zlib
 from logging import DEBUG, INFO
 
-__all__ = ["NetLogoLink", "NetLogoException"]
+from .instrumentation import Instrumentation, instrumented, timed_conversion
+
+__all__ = ["NetLogoLink", "NetLogoException", "NetLogoBatchException"]
 
 PYNETLOGO_HOME = os.path.dirname(os.path.abspath(__file__))
 
@@ -24,6 +30,55 @@ INFO = INFO
 
 valid_chars = "[]-_.() {}{}".format(string.ascii_letters, string.digits)
 
+# common locations of NetLogo installations on Linux
+LINUX_PREFIXES = ["/opt", "/usr/local", "/usr/share", "~", "~/opt", "~/Applications"]
+
+# locations of the extensions folder relative to netlogo home
+EXTENSION_DIRS = [["extensions"], ["app", "extensions"], ["Java", "extensions"]]
+
+# the variables identifying the agents of each kind in agents_report
+INDEX_VARIABLES = {
+    "Turtle": ["who"],
+    "Patch": ["pxcor", "pycor"],
+    "Link": ["end1", "end2"],
+}
+
+# number of values buffered on the Java side by record_patches, 64 MB of doubles
+PATCH_BUFFER_SIZE = 2**23
+
+# methods of the Java NetLogoLink that are used by pynetlogo, to detect an outdated jar
+JAVA_METHODS = (
+    "agentsReport",
+    "command",
+    "copyWorldTo",
+    "exportWorldToString",
+    "getCacheStats",
+    "getGlobalKinds",
+    "getGlobalNames",
+    "getGlobals",
+    "getTimings",
+    "getWorldExtents",
+    "halt",
+    "importWorldFromString",
+    "recordPatches",
+    "repeatReport",
+    "repeatReportWhile",
+    "report",
+    "reportPatches",
+    "reportUncached",
+    "reportWhile",
+    "runBatch",
+    "setCacheSize",
+    "setGlobals",
+    "setPatchesBoolean",
+    "setPatchesDouble",
+    "setPatchesString",
+    "setTurtleVariables",
+)
+
+# a ? that is not part of a NetLogo identifier such as sick?
+PLACEHOLDER = re.compile(r"(?<![^\s\[\(])\?(?![^\s\]\)])")
+
 
 def find_netlogo(path: str):
     """Find the most recent version of NetLogo in the specified directory.
@@ -71,15 +126,35 @@ def find_jars(path: str):
 
     """
 
+    return walk_install(path)[1]
+
+
+def walk_install(path: str):
+    """Walk a NetLogo installation once, collecting its directories and jar files.
+
+    Parameters
+    ----------
+    path : str
+        Path to the NetLogo installation directory
+
+    Returns
+    -------
+    tuple
+        list of directories and list of jar files, with NetLogo.jar first
+
+    """
+
+    directories = []
     jars = []
     for root, _, files in os.walk(path):
+        directories.append(root)
         for file in files:  # @ReservedAssignment
             if file == "NetLogo.jar":
                 jars.insert(0, os.path.join(root, file))
             elif file.endswith(".jar"):
                 jars.append(os.path.join(root, file))
 
-    return jars
+    return directories, jars
 
 
 def find_netlogo_windows():
@@ -125,13 +200,57 @@ def find_netlogo_mac():
     return netlogo
 
 
+def is_netlogo_home(path: str):
+    """Return whether path is a NetLogo installation directory.
+
+    An installation directory holds the NetLogo jar in its app folder, as
+    app/netlogo-<version>.jar.
+
+    """
+
+    return bool(glob.glob(os.path.join(glob.escape(path), "app", "netlogo-*.jar")))
+
+
 def find_netlogo_linux():
-    """Find netlogo on Linux."""
-    raise NotImplementedError(("NetLogoLink requires the netlogo_home on Linux"))
+    """Find netlogo on Linux.
+
+    Looks for the most recent NetLogo version in a number of common
+    installation prefixes, such as /opt and /usr/local, and the home
+    directory of the user. Only directories with the NetLogo jar are
+    considered, so for example ~/.netlogo is skipped.
+
+    """
+
+    for prefix in LINUX_PREFIXES:
+        prefix = os.path.expanduser(prefix)
+        try:
+            entries = os.listdir(prefix)
+        except OSError:
+            continue
+
+        netlogo_versions = [
+            entry
+            for entry in entries
+            if "netlogo" in entry.lower() and is_netlogo_home(os.path.join(prefix, entry))
+        ]
+        if netlogo_versions:
+            netlogo_versions.sort(reverse=True)
+            return os.path.join(prefix, netlogo_versions[0])
+
+    return None
 
 
 def get_netlogo_home():
-    """Try to find NetLogo home."""
+    """Try to find NetLogo home.
+
+    The NETLOGO_HOME environment variable takes precedence over searching
+    the default installation directories of the platform.
+
+    """
+
+    netlogo_home = os.environ.get("NETLOGO_HOME")
+    if netlogo_home and os.path.isdir(netlogo_home):
+        return netlogo_home
 
     if sys.platform == "win32":
         netlogo_home = find_netlogo_windows()
@@ -143,20 +262,227 @@ def get_netlogo_home():
     return netlogo_home
 
 
+def find_extensions_dir(path: str):
+    """Find the NetLogo extensions folder.
+
+    Parameters
+    ----------
+    path : str
+        Path to the NetLogo installation directory
+
+    Returns
+    -------
+    str
+        Path to the extensions folder, or None if it is not found
+
+    """
+
+    for parts in EXTENSION_DIRS:
+        extensions = os.path.join(path, *parts)
+        if os.path.isdir(extensions):
+            return extensions
+
+    for root, dirs, _ in os.walk(path):
+        if "extensions" in dirs:
+            return os.path.join(root, "extensions")
+
+    return None
+
+
+def get_cache_dir():
+    """Return the directory in which pynetlogo caches data."""
+    cache_dir = os.environ.get("PYNETLOGO_CACHE_DIR")
+    if not cache_dir:
+        cache_home = os.environ.get("XDG_CACHE_HOME") or os.path.join(
+            os.path.expanduser("~"), ".cache"
+        )
+        cache_dir = os.path.join(cache_home, "pynetlogo")
+    return cache_dir
+
+
+def install_mtimes(directories: list[str]):
+    """Return the modification times of the directories of a NetLogo installation.
+
+    Adding or removing a file or folder changes the modification time of
+    the directory containing it, so comparing the times of all directories
+    detects any jar that is added, removed, or replaced, however deeply it
+    is nested, without listing the files.
+
+    Parameters
+    ----------
+    directories : list of str
+
+    Returns
+    -------
+    list of float, or None if one of the directories no longer exists
+
+    """
+
+    try:
+        return [os.stat(directory).st_mtime for directory in directories]
+    except OSError:
+        return None
+
+
+def resolve_classpath(netlogo_home: str, use_cache: bool = True):
+    """Find the jars and extensions folder of a NetLogo installation.
+
+    Walking a NetLogo installation can be slow, in particular on network
+    file systems. The result is therefore stored in a small manifest in the
+    pynetlogo cache directory, which is reused for as long as the
+    modification times of the directories of the installation do not
+    change.
+
+    Parameters
+    ----------
+    netlogo_home : str
+        Path to the NetLogo installation directory
+    use_cache : bool, optional
+        If false, ignore and do not update the cached manifest
+
+    Returns
+    -------
+    tuple
+        list of jar files and path to the extensions folder (or None)
+
+    Raises
+    ------
+    NetLogoException
+        If netlogo_home is not given or is not a directory
+
+    """
+
+    if netlogo_home is None:
+        raise NetLogoException(
+            "NetLogo not found, pass netlogo_home or set the NETLOGO_HOME environment variable"
+        )
+    if not os.path.isdir(netlogo_home):
+        raise NetLogoException("netlogo_home {} is not a directory".format(netlogo_home))
+
+    netlogo_home = os.path.abspath(netlogo_home)
+    key = hashlib.sha1(netlogo_home.encode("utf-8")).hexdigest()[:16]
+    manifest_file = os.path.join(get_cache_dir(), "classpath-{}.json".format(key))
+
+    if use_cache:
+        try:
+            with open(manifest_file) as fh:
+                manifest = json.load(fh)
+        except (OSError, ValueError):
+            pass
+        else:
+            directories = manifest.get("directories", [])
+            if (
+                manifest.get("netlogo_home") == netlogo_home
+                and directories
+                and install_mtimes(directories) == manifest.get("mtimes")
+            ):
+                return manifest["jars"], manifest["extensions"]
+
+    directories, jars = walk_install(netlogo_home)
+    mtimes = install_mtimes(directories)
+    extensions = find_extensions_dir(netlogo_home)
+
+    if use_cache:
+        manifest = dict(
+            netlogo_home=netlogo_home,
+            directories=directories,
+            mtimes=mtimes,
+            jars=jars,
+            extensions=extensions,
+        )
+        try:
+            os.makedirs(os.path.dirname(manifest_file), exist_ok=True)
+            temp_file = "{}.{}".format(manifest_file, os.getpid())
+            with open(temp_file, "w") as fh:
+                json.dump(manifest, fh)
+            os.replace(temp_file, manifest_file)
+        except OSError:
+            # caching is an optimization, so a read-only cache dir is fine
+            pass
+
+    return jars, extensions
+
+
 class NetLogoException(Exception):
     """Base project exception."""
 
     pass
 
 
+def check_java_api(link):
+    """Check that the Java NetLogoLink provides the methods pynetlogo uses.
+
+    If netlogolink.jar was not rebuilt after the Java sources changed, a
+    warning is issued and the link is wrapped, so methods the jar provides
+    keep working, while methods that need a missing Java method raise a
+    NetLogoException instead of an AttributeError.
+
+    Parameters
+    ----------
+    link : netLogoLink.NetLogoLink loaded from netlogolink.jar
+
+    Returns
+    -------
+    the link, or the wrapped link if the jar is outdated
+
+    """
+
+    missing = [method for method in JAVA_METHODS if not hasattr(link, method)]
+    if not missing:
+        return link
+
+    warnings.warn(_outdated_jar_message(missing))
+    return _OutdatedJavaLink(link, missing)
+
+
+def _outdated_jar_message(missing):
+    return "netlogolink.jar is outdated, it lacks {}; rebuild it with {}".format(
+        ", ".join(missing), os.path.join(PYNETLOGO_HOME, "java", "build.sh")
+    )
+
+
+class _OutdatedJavaLink:
+    """Java link of an outdated netlogolink.jar, failing clearly on missing methods."""
+
+    def __init__(self, link, missing):
+        self._link = link
+        self._missing = set(missing)
+
+    def __getattr__(self, name):
+        if name in self._missing:
+            raise NetLogoException(_outdated_jar_message([name]))
+        return getattr(self._link, name)
+
+
+class NetLogoBatchException(NetLogoException):
+    """Raised if one or more items of a batch failed.
+
+    Attributes
+    ----------
+    errors : dict
+             error message for each failed item, keyed by the position of
+             the item in the batch
+    results : dict
+              results of the reporters that did succeed
+
+    """
+
+    def __init__(self, errors: dict, results: dict):
+        message = "; ".join("item {}: {}".format(i, error) for i, error in errors.items())
+        super().__init__(message)
+        self.errors = errors
+        self.results = results
+
+
 class NetLogoLink:
     """Create a link with NetLogo.
 
     Underneath, the NetLogo JVM is started through Jpype.
 
-    If `netlogo_home`, `netlogo_version`, or `jvm_home` are not provided,
-    the link will try to identify the correct parameters automatically on Mac
-    or Windows. `netlogo_home` and `netlogo_version` are required on Linux.
+    If `netlogo_home` is not provided, it is taken from the NETLOGO_HOME
+    environment variable, or searched for in the default installation
+    directories of Windows, Mac, or Linux. If `jvm_path` is not provided,
+    the default JVM is used.
 
     Parameters
     ----------
@@ -165,12 +491,20 @@ class NetLogoLink:
     thd : bool, optional
         If true, use NetLogo 3D
     netlogo_home : str, optional
-        Path to the NetLogo installation directory (required on Linux)
+        Path to the NetLogo installation directory
     jvm_path : str, optional
         path of the jvm
     jvm_args : list of str, optional
               additional arguments that should be used when starting
               the jvm
+    use_cache : bool, optional
+                If true, cache the jars and extensions folder of the NetLogo
+                installation, see :func:`resolve_classpath`
+
+    Attributes
+    ----------
+    startup_times : dict
+                    time in seconds spent in each step of starting the link
 
     """
 
@@ -181,8 +515,12 @@ class NetLogoLink:
         netlogo_home: str | None = None,
         jvm_path: str | None = None,
         jvm_args: list[str] | None = None,
+        use_cache: bool = True,
     ):
 
+        self.startup_times = {}
+        start = time.perf_counter()
+
         if netlogo_home is None:
             netlogo_home = get_netlogo_home()
 
@@ -196,22 +534,25 @@ class NetLogoLink:
 
         self.netlogo_home = netlogo_home
         self.jvm_home = jvm_path
+        start = self._record_startup_time("discover", start)
 
         if not jpype.isJVMStarted():
-            jars = find_jars(netlogo_home)
+            jars, exts = resolve_classpath(netlogo_home, use_cache=use_cache)
+            start = self._record_startup_time("classpath", start)
             jars.append(os.path.join(PYNETLOGO_HOME, "java", "netlogolink.jar"))
 
             try:
                 jpype.startJVM(*jvm_args, jvmpath=jvm_path, classpath=jars)
             except RuntimeError as e:
                 raise e
+        else:
+            # the classpath is fixed once the JVM runs, only the extensions are needed
+            exts = find_extensions_dir(netlogo_home) if netlogo_home is not None else None
+        start = self._record_startup_time("jvm", start)
 
         # enable extensions
-        for path, dirs, files in os.walk(self.netlogo_home):
-            if "extensions" in dirs:
-                exts = os.path.join(self.netlogo_home, "extensions")
-                jpype.java.lang.System.setProperty("netlogo.extensions.dir", exts)
-                break
+        if exts is not None:
+            jpype.java.lang.System.setProperty("netlogo.extensions.dir", exts)
         else:
             warnings.warn(
                 ("could not find default NetLogo " "extensions folder. Extensions not " "available")
@@ -225,8 +566,19 @@ class NetLogoLink:
 
         from netLogoLink import NetLogoLink
 
-        self.link = NetLogoLink(jpype.java.lang.Boolean(gui), jpype.java.lang.Boolean(thd))
+        self.link = check_java_api(
+            NetLogoLink(jpype.java.lang.Boolean(gui), jpype.java.lang.Boolean(thd))
+        )
+        self._globals = None
+        self._instrumentation = None
+        self._record_startup_time("workspace", start)
+
+    def _record_startup_time(self, step: str, start: float):
+        now = time.perf_counter()
+        self.startup_times[step] = now - start
+        return now
 
+    @instrumented
     def load_model(self, path: str):
         """Load a NetLogo model.
 
@@ -248,6 +600,7 @@ class NetLogoLink:
 
         try:
             self.link.loadModel(path)
+            self._globals = None
         except jpype.JException as ex:
             print(ex.stacktrace())
             raise NetLogoException(str(ex))
@@ -257,102 +610,109 @@ class NetLogoLink:
 
         self.link.killWorkspace()
 
-    def command(self, netlogo_command: str):
-        """Execute the supplied command in NetLogo.
+    def halt(self):
+        """Stop the commands and reporters that are running in NetLogo.
+
+        This has the same effect as the halt button in NetLogo, and can be
+        called from another thread than the one waiting for the result.
+
+        """
+
+        self.link.halt()
+
+    @instrumented
+    def snapshot(self, compress: bool = True):
+        """Return the state of the world as bytes.
+
+        The state is exported in the format of NetLogo's export-world,
+        including the random number generator, but kept in memory instead of
+        written to disk. It can be restored in this workspace, or in another
+        workspace with the same model, to branch scenarios from a shared
+        warm-up.
 
         Parameters
         ----------
-        netlogo_command : str
-            Valid NetLogo command
+        compress : bool, optional
+            If true, compress the state with zlib
+
+        Returns
+        -------
+        bytes
 
         Raises
         ------
         NetLogoException
-            If a LogoException or CompilerException is raised by NetLogo
+            If a LogoException is raised by NetLogo
 
         """
 
         try:
-            self.link.command(netlogo_command)
+            state = str(self.link.exportWorldToString()).encode("utf-8")
         except jpype.JException as ex:
             print(ex.stacktrace())
             raise NetLogoException(str(ex))
 
-    def report(self, netlogo_reporter: str):
-        """Return values from a NetLogo reporter.
+        if compress:
+            state = zlib.compress(state)
+        return state
 
-        Any reporter (command which returns a value) that can be called
-        in the NetLogo Command Center can be called with this method.
+    @instrumented
+    def restore(self, state: bytes):
+        """Restore the state of the world from a snapshot.
 
         Parameters
         ----------
-        netlogo_reporter : str
-            Valid NetLogo reporter
+        state : bytes
+            as returned by :meth:`snapshot`, compressed or not
 
         Raises
         ------
         NetLogoException
-            If a LogoException or CompilerException is raised by NetLogo
+            If a LogoException is raised by NetLogo
 
         """
 
+        # an uncompressed export starts with a quote, zlib data does not
+        if not state.startswith(b'"'):
+            state = zlib.decompress(state)
+
         try:
-            result = self.link.report(netlogo_reporter)
-            return self._cast_results(result)
+            self.link.importWorldFromString(state.decode("utf-8"))
         except jpype.JException as ex:
             print(ex.stacktrace())
             raise NetLogoException(str(ex))
 
-    def report_while(
-        self, netlogo_reporter: str, condition: str, command: str = "go", max_seconds: int = 10
-    ):
-        """Return values from a NetLogo reporter while a condition is true in the NetLogo model.
+    def copy_world_to(self, other: "NetLogoLink"):
+        """Copy the state of the world to another workspace in the same JVM.
+
+        The state is copied within Java, without going through Python.
 
         Parameters
         ----------
-        netlogo_reporter : str
-            Valid NetLogo reporter
-        condition: str
-            Valid boolean NetLogo reporter
-        command: str
-            NetLogo command used to execute the model
-        max_seconds: int, optional
-            Time limit used to break execution
+        other : NetLogoLink
+            a link with the same model loaded
 
         Raises
         ------
         NetLogoException
-            If a LogoException or CompilerException is raised by NetLogo
+            If a LogoException is raised by NetLogo
 
         """
+
         try:
-            result = self.link.doReportWhile(
-                command,
-                netlogo_reporter,
-                condition,
-                jpype.java.lang.Integer(max_seconds),
-            )
-            return self._cast_results(result)
+            self.link.copyWorldTo(other.link)
         except jpype.JException as ex:
             print(ex.stacktrace())
             raise NetLogoException(str(ex))
 
-    def patch_report(self, attribute: str):
-        """Return patch attributes from NetLogo.
-
-        Returns a pandas DataFrame with same dimensions as the NetLogo world,
-        with column labels and row indices following pxcor and pycor patch
-        coordinates. Values of the dataframe correspond to patch attributes.
+    @instrumented
+    def command(self, netlogo_command: str):
+        """Execute the supplied command in NetLogo.
 
         Parameters
         ----------
-        attribute : str
-            Valid NetLogo patch attribute
-
-        Returns
-        -------
-        pandas DataFrame
-            DataFrame containing patch attributes
+        netlogo_command : str
+            Valid NetLogo command
 
         Raises
         ------
@@ -362,44 +722,22 @@ class NetLogoLink:
         """
 
         try:
-            extents = self.link.report(
-                "(list min-pxcor max-pxcor \
-                                         min-pycor max-pycor)"
-            )
-            extents = self._cast_results(extents).astype(int)
-            shape = (extents[3] - extents[2] + 1, extents[1] - extents[0] + 1)
-
-            resultsvec = self.link.report(
-                "map [p -> [{0}] of p] \
-                                           sort patches".format(
-                    attribute
-                )
-            )
-            resultsvec = self._cast_results(resultsvec)
-            results_df = pd.DataFrame(
-                resultsvec.reshape(shape),
-                index=reversed(range(extents[2], extents[3] + 1, 1)),
-                columns=range(extents[0], extents[1] + 1, 1),
-            )
-
-            return results_df
-
+            self.link.command(netlogo_command)
         except jpype.JException as ex:
             print(ex.stacktrace())
             raise NetLogoException(str(ex))
 
-    def patch_set(self, attribute: str, data: pd.DataFrame):
-        """Set patch attributes in NetLogo.
+    @instrumented
+    def report(self, netlogo_reporter: str):
+        """Return values from a NetLogo reporter.
 
-        Inverse of the `patch_report` method. Sets a patch attribute using
-        values from a pandas DataFrame of same dimensions as the NetLogo world.
+        Any reporter (command which returns a value) that can be called
+        in the NetLogo Command Center can be called with this method.
 
         Parameters
         ----------
-        attribute : str
-            Valid NetLogo patch attribute
-        data : Pandas DataFrame
-            DataFrame with same dimensions as NetLogo world
+        netlogo_reporter : str
+            Valid NetLogo reporter
 
         Raises
         ------
@@ -409,233 +747,963 @@ class NetLogoLink:
         """
 
         try:
-            np.set_printoptions(threshold=np.prod(data.shape))
-            datalist = "[" + str(data.values.flatten()).strip("[ ")
-            datalist = " ".join(datalist.split())
-
-            command = "(foreach map [px -> [pxcor] of px] \
-                        sort patches map [py -> [pycor] of py] \
-                        sort patches {0} [[px py p ] -> ask patch px py \
-                        [set {1} p]])".format(
-                datalist, attribute
-            )
-
-            self.link.command(command)
+            result = self.link.report(netlogo_reporter)
+            return self._cast_results(result)
+        except jpype.JException as ex:
+            print(ex.stacktrace())
+            raise NetLogoException(str(ex))
 
+    @instrumented
+    def _report_template(self, netlogo_reporter: str, source: str):
+        """Report source, the template netlogo_reporter with values, without caching it."""
+        try:
+            result = self.link.reportUncached(source)
+            return self._cast_results(result)
         except jpype.JException as ex:
             print(ex.stacktrace())
             raise NetLogoException(str(ex))
 
-    def repeat_command(self, netlogo_command: str, reps: int):
-        """Execute the supplied command in NetLogo a given number of times.
+    @property
+    def globals(self):
+        """dict with the names of the observer variables of the model and
+        whether they are defined by a 'slider', 'switch', 'chooser', or
+        'input' widget, or are a plain 'global'"""
+        return dict(self._global_variables())
+
+    @instrumented
+    def set_globals(self, values: dict):
+        """Set observer variables directly, without compiling set commands.
+
+        Numbers, booleans, and strings are assigned to the variables in a
+        single call. Lists are assigned through a set command.
 
         Parameters
         ----------
-        netlogo_command : str
-            Valid NetLogo command
-        reps : int
-            Number of repetitions for which to repeat commands
+        values : dict
+            names of observer variables (globals and interface widgets) and
+            their new values
 
         Raises
         ------
         NetLogoException
-            If a LogoException or CompilerException is raised by NetLogo
+            If a name is not an observer variable of the model, or if a
+            value is not allowed by the widget of the variable
 
         """
 
+        variables = self._global_variables()
+        unknown = [name for name in values if name.lower() not in variables]
+        if unknown:
+            raise NetLogoException("unknown global variables: {}".format(", ".join(unknown)))
+
+        # all values are converted before any is assigned, so a value that
+        # cannot be converted leaves the variables unchanged
+        names = []
+        converted = []
+        commands = []
+        for name, value in values.items():
+            value = observer_value(value)
+            if isinstance(value, (bool, float, str)):
+                names.append(name)
+                converted.append(value)
+            else:
+                commands.append("set {} {}".format(name, netlogo_literal(value)))
+
         try:
-            commandstr = "repeat {0} [{1}]".format(reps, netlogo_command)
-            self.link.command(commandstr)
+            self.link.setGlobals(names, converted)
         except jpype.JException as ex:
             print(ex.stacktrace())
             raise NetLogoException(str(ex))
+        for command in commands:
+            self.command(command)
 
-    def repeat_report(
-        self, netlogo_reporter: str, reps: int, go: str = "go", include_t0: bool = True
-    ):
-        """Return values from a NetLogo reporter over a number of ticks.
+    @instrumented
+    def get_globals(self, names: list[str] | None = None):
+        """Return the values of observer variables.
 
-         Can be used with multiple reporters by passing a list of strings.
-         The values of the returned DataFrame are formatted following the
-         data type returned by the reporters (numerical or string data,
-         with single or multiple values). If the reporter returns multiple
-         values, the results are converted to a numpy array.
-
-         Parameters
-         ----------
-         netlogo_reporter : str or list of str
-             Valid NetLogo reporter(s)
-         reps : int
-             Number of NetLogo ticks for which to return values
-         go : str, optional
-             NetLogo command for running the model ('go' by default)
-         include_t0 : boolean, optional
-             include the value of the reporter at t0, prior to running the
-             go command
-
-         Returns
-         -------
-        dict
-             key is the reporter, and the value is a list order by ticks
+        Parameters
+        ----------
+        names : list of str, optional
+            names of observer variables, defaults to all observer variables
+            of the model
 
-         Raises
-         ------
-         NetLogoException
-             If reporters are not in a valid format, or if a LogoException
-             or CompilerException is raised by NetLogo
+        Returns
+        -------
+        dict
+            with the values of the variables by name
 
-         Notes
-         -----
-         This method relies on files to send results from netlogo back to
-         Python. This is slow and can break when used at scale. For such
-         use cases, you are better of using a model specific way of interfacing.
-         For example, have a go routine which accumulates the relevant
-         reporters into lists. First run the model for the required time steps
-         using command, and next retrieve the lists through report.
+        Raises
+        ------
+        NetLogoException
+            If a name is not an observer variable of the model
 
         """
 
-        if isinstance(netlogo_reporter, str):
-            cols = [netlogo_reporter]
-        elif isinstance(netlogo_reporter, list):
-            cols = netlogo_reporter
+        variables = self._global_variables()
+        if names is None:
+            names = list(variables)
         else:
-            raise NetLogoException("Unknown datatype")
+            names = list(names)
+        unknown = [name for name in names if name.lower() not in variables]
+        if unknown:
+            raise NetLogoException("unknown global variables: {}".format(", ".join(unknown)))
 
-        # tick = self._cast_results(self.link.report("ticks"))
-        #
-        # if include_t0:
-        #     index = np.arange(tick, tick + reps + 1)
-        # else:
-        #     index = np.arange(tick, tick + reps)
+        try:
+            results = self.link.getGlobals(names)
+        except jpype.JException as ex:
+            print(ex.stacktrace())
+            raise NetLogoException(str(ex))
+        return {name: self._cast_results(result) for name, result in zip(names, results)}
 
-        prefix = "".join([os.getcwd(), os.sep])
-        tempfolder = tempfile.mkdtemp(prefix=prefix)
+    def batch(self):
+        """Return a batch for executing commands and reporters in a single call.
 
-        # TODO move to tempfile and keep track of variable tempfile mapping
-        # TODO issue #55
-        commands = []
-        fns = {}
-        for variable in cols:
-            fh, fn = tempfile.mkstemp(suffix=".txt", dir=tempfolder)
-            os.close(fh)  # immediately free up file handle for re-use
-            fns[variable] = fn
-            fn = '"{}"'.format(fn)
-            fn = fn.replace(os.sep, "/")
-
-            nc = r"{0} {1} {2} {3}".format("file-open", fn, "file-write", variable)
-            commands.append(nc)
-
-        c_start = "repeat {} [ {}".format(reps, go)
-        c_close = "] file-close-all"
-        c_write = " ".join(commands)
-
-        if include_t0:
-            command = " ".join((c_write, c_start, c_write, c_close))
-        else:
-            command = " ".join((c_start, c_write, c_close))
-
-        self.command(command)
-
-        results = {}
-        for key, value in fns.items():
-            with open(value) as fh:
-                result = fh.readline()
-                result = result.strip()
-
-                # Check if the NetLogo reporter returns a list
-                list_res = re.findall(r"\[([^]]*)\]", result)
-                if list_res:
-                    try:
-                        # Try a numerical data type
-                        result = [np.array(e.split(), dtype=float) for e in list_res]
-                    except ValueError:
-                        # Otherwise, assume the reporter returns string values
-                        result = [np.array([b.strip('"') for b in e.split()]) for e in list_res]
-                else:
-                    try:
-                        result = np.array([float(entry) for entry in result.split()])
-                    except ValueError:
-                        result = np.array([entry.strip('"') for entry in result.split()])
-
-                results[key] = result
-
-        # cleanup temp files and folders
-        for key, value in fns.items():
-            os.remove(value)  # delete file by name
-
-        os.rmdir(tempfolder)  # remove folder
-
-        return results
-
-    def write_NetLogo_attriblist(self, agent_data: pd.DataFrame, agent_name: str):
-        """Update attributes of a set of NetLogo agents from a DataFrame.
+        Can be used as a context manager, which runs the batch on exit.
 
-        Assumes a set of NetLogo agents of the same type. Attribute values
-        can be numerical or strings.
+        Returns
+        -------
+        Batch
 
-        Parameters
-        ----------
-        agent_data : pandas DataFrame
+        Examples
+        --------
+        >>> with link.batch() as batch:
+        ...     batch.command("set grass-regrowth-time 30")
+        ...     batch.command("setup")
+        ...     batch.report("count sheep", key="sheep")
+        >>> batch.results["sheep"]
+
+        """
+        return Batch(self)
+
+    def reporter_template(self, netlogo_reporter: str):
+        """Return a callable template for a NetLogo reporter with placeholders.
+
+        Placeholders are written as a ``?`` between whitespace or brackets,
+        for example ``"[energy] of turtle ?"``. Calling the template writes
+        the supplied values into the placeholders as NetLogo literals, in
+        order, and returns the value of the resulting reporter.
+
+        The values are part of the source, so every distinct set of values
+        is compiled when it is used. These one-off reporters are not added
+        to the compile cache, so looping over many values does not evict
+        the commands and reporters that are reused, and instrumentation
+        records them under the template. For reporting over many agents,
+        prefer a single reporter such as :meth:`agents_report`.
+
+        Parameters
+        ----------
+        netlogo_reporter : str
+            Valid NetLogo reporter, with placeholders for values
+
+        Returns
+        -------
+        ReporterTemplate
+
+        """
+        return ReporterTemplate(self, netlogo_reporter)
+
+    def cache_stats(self):
+        """Return statistics on the cache of compiled commands and reporters.
+
+        Commands and reporters are compiled once and reused for as long as
+        the same source text is used. The cache is cleared when a model is
+        loaded.
+
+        Returns
+        -------
+        dict
+            with the number of hits, misses, and evictions, and the current
+            and maximum size of the cache
+
+        """
+        stats = [int(entry) for entry in self.link.getCacheStats()]
+        return dict(zip(["hits", "misses", "evictions", "size", "max_size"], stats))
+
+    def set_cache_size(self, max_size: int):
+        """Set the maximum number of compiled commands and reporters to keep.
+
+        Parameters
+        ----------
+        max_size : int
+            maximum size of the cache, use 0 to disable caching
+
+        """
+        self.link.setCacheSize(max_size)
+
+    def enable_instrumentation(self, callback=None):
+        """Start recording counts and timings of the calls to the workspace.
+
+        The time of each call is split in compiling, executing in NetLogo,
+        and converting the results to python, per method and per command or
+        reporter text. Instrumentation adds two calls to java for each
+        call to the workspace, and is therefore disabled by default.
+
+        Parameters
+        ----------
+        callback : callable, optional
+            called with a :class:`~pynetlogo.instrumentation.CallRecord`
+            after each call, e.g., to export the timings to a metrics system
+
+        Returns
+        -------
+        Instrumentation
+
+        """
+        self._instrumentation = Instrumentation(callback)
+        return self._instrumentation
+
+    def disable_instrumentation(self):
+        """Stop recording counts and timings of calls."""
+        self._instrumentation = None
+
+    def stats(self):
+        """Return the counts and timings recorded since instrumentation was enabled.
+
+        Returns
+        -------
+        pandas DataFrame
+            with a (method, source) index, see
+            :meth:`~pynetlogo.instrumentation.Instrumentation.stats`
+
+        Raises
+        ------
+        NetLogoException
+            If instrumentation is not enabled
+
+        """
+        if self._instrumentation is None:
+            raise NetLogoException("instrumentation is not enabled")
+        return self._instrumentation.stats()
+
+    def reset_stats(self):
+        """Clear the recorded counts and timings."""
+        if self._instrumentation is not None:
+            self._instrumentation.reset()
+
+    @instrumented
+    def report_while(
+        self,
+        netlogo_reporter: str | list[str],
+        condition: str,
+        command: str = "go",
+        max_seconds: float | None = 10,
+        max_ticks: int | None = None,
+        every: int = 1,
+        include_t0: bool = False,
+    ):
+        """Return values from NetLogo reporters while a condition is true in the NetLogo model.
+
+        The command is executed as long as the condition is true, and the
+        reporters are collected after every `every` executions. The command,
+        reporters, and condition are compiled only once, and the values are
+        returned to python in one go.
+
+        Parameters
+        ----------
+        netlogo_reporter : str or list of str
+            Valid NetLogo reporter(s)
+        condition: str
+            Valid boolean NetLogo reporter, checked before every execution
+            of the command
+        command: str
+            NetLogo command used to execute the model
+        max_seconds: float, optional
+            Wall clock time limit in seconds, None for no limit
+        max_ticks: int, optional
+            Maximum number of times to execute the command, None for no
+            limit
+        every: int, optional
+            Collect the reporters after every so many executions of the
+            command
+        include_t0 : boolean, optional
+            include the values of the reporters prior to executing the
+            command
+
+        Returns
+        -------
+        pandas Series or DataFrame
+            indexed by tick, a Series if a single reporter is passed as a
+            string, a DataFrame with a column per reporter otherwise. If
+            the ticks of the model were never reset, the index counts the
+            executions of the command instead.
+
+        Raises
+        ------
+        NetLogoException
+            If a LogoException or CompilerException is raised by NetLogo
+
+        Warns
+        -----
+        UserWarning
+            If the time limit is reached before the condition became false
+
+        """
+        if every < 1:
+            raise ValueError("every should be at least 1")
+
+        single = isinstance(netlogo_reporter, str)
+        cols = [netlogo_reporter] if single else list(netlogo_reporter)
+
+        try:
+            series = self.link.reportWhile(
+                command,
+                cols,
+                condition,
+                2**31 - 1 if max_ticks is None else int(max_ticks),
+                int(every),
+                float(max_seconds or 0),
+                include_t0,
+            )
+            ticks = primitive_to_numpy(series.getTicks(), np.float64)
+            values = [self._cast_series(result) for result in series.getResults()]
+            stop_reason = str(series.getStopReason())
+        except jpype.JException as ex:
+            print(ex.stacktrace())
+            raise NetLogoException(str(ex))
+
+        if stop_reason == "time":
+            warnings.warn(
+                "report_while stopped after reaching the time limit of {} seconds".format(
+                    max_seconds
+                )
+            )
+
+        if np.any(ticks < 0):
+            # ticks is -1 as long as reset-ticks has not been called
+            ticks = np.arange(ticks.shape[0]) * every + (0 if include_t0 else every)
+        elif np.all(ticks == np.round(ticks)):
+            ticks = ticks.astype(np.int64)
+        index = pd.Index(ticks, name="tick")
+        if single:
+            return pd.Series(values[0], index=index, name=netlogo_reporter)
+        return pd.DataFrame(dict(zip(cols, values)), index=index, columns=cols)
+
+    @instrumented
+    def patch_report(self, attribute: str):
+        """Return patch attributes from NetLogo.
+
+        Returns a pandas DataFrame with same dimensions as the NetLogo world,
+        with column labels and row indices following pxcor and pycor patch
+        coordinates. Values of the dataframe correspond to patch attributes.
+
+        Parameters
+        ----------
+        attribute : str
+            Valid NetLogo patch attribute
+
+        Returns
+        -------
+        pandas DataFrame
+            DataFrame containing patch attributes
+
+        Raises
+        ------
+        NetLogoException
+            If a LogoException or CompilerException is raised by NetLogo
+
+        """
+
+        try:
+            extents = self._world_geometry()
+            shape = (extents[3] - extents[2] + 1, extents[1] - extents[0] + 1)
+
+            resultsvec = self.link.report(
+                "map [p -> [{0}] of p] \
+                                           sort patches".format(
+                    attribute
+                )
+            )
+            resultsvec = self._cast_results(resultsvec)
+            results_df = pd.DataFrame(
+                resultsvec.reshape(shape),
+                index=reversed(range(extents[2], extents[3] + 1, 1)),
+                columns=range(extents[0], extents[1] + 1, 1),
+            )
+
+            return results_df
+
+        except jpype.JException as ex:
+            print(ex.stacktrace())
+            raise NetLogoException(str(ex))
+
+    @instrumented
+    def patch_report_many(self, attributes: list[str], labelled: bool = False):
+        """Return several numeric patch attributes from NetLogo in a single call.
+
+        Patch variables are read directly on the Java side in patch order,
+        so patches are not sorted on every call. Other patch reporters are
+        evaluated for every patch. Boolean values are returned as 0 or 1,
+        other non-numeric values as NaN.
+
+        Parameters
+        ----------
+        attributes : list of str
+            Valid NetLogo patch attributes
+        labelled : bool, optional
+            If true, return a DataFrame instead of a numpy array
+
+        Returns
+        -------
+        numpy array or pandas DataFrame
+            array of shape (n_attributes, n_pycor, n_pxcor) with the rows
+            ordered from max-pycor to min-pycor, or a DataFrame with an
+            (attribute, pycor) MultiIndex and pxcor column labels
+
+        Raises
+        ------
+        NetLogoException
+            If a LogoException or CompilerException is raised by NetLogo
+
+        """
+        attributes = list(attributes)
+
+        try:
+            values = primitive_to_numpy(self.link.reportPatches(attributes), np.float64)
+            extents = self._world_geometry()
+        except jpype.JException as ex:
+            print(ex.stacktrace())
+            raise NetLogoException(str(ex))
+
+        nx = extents[1] - extents[0] + 1
+        ny = extents[3] - extents[2] + 1
+        values = values.reshape((len(attributes), ny, nx))
+
+        if not labelled:
+            return values
+
+        index = pd.MultiIndex.from_product(
+            [attributes, range(extents[3], extents[2] - 1, -1)], names=["attribute", "pycor"]
+        )
+        columns = pd.Index(range(extents[0], extents[1] + 1), name="pxcor")
+        return pd.DataFrame(values.reshape((-1, nx)), index=index, columns=columns)
+
+    @instrumented
+    def record_patches(
+        self,
+        attributes: list[str],
+        ticks: int,
+        go: str = "go",
+        every: int = 1,
+        out: np.ndarray | str | None = None,
+    ):
+        """Run the model and record numeric patch attributes every so many ticks.
+
+        The samples are buffered on the Java side and copied in bulk into a
+        preallocated array, which can be a memory mapped file for runs that
+        do not fit in memory. See :meth:`patch_report_many` for how the
+        attributes are read.
+
+        Parameters
+        ----------
+        attributes : list of str
+            Valid NetLogo patch attributes
+        ticks : int
+            Number of times to execute the go command. If every does not
+            divide ticks, the remaining ticks % every executions are run
+            after the last sample, without recording them.
+        go : str, optional
+            NetLogo command for running the model ('go' by default)
+        every : int, optional
+            Record the attributes after every so many ticks
+        out : numpy array or str, optional
+            float64 array of shape (n_samples, n_attributes, n_pycor, n_pxcor)
+            to fill, with n_samples equal to ticks // every, or the path of
+            a .npy file to create as a memory map of that shape
+
+        Returns
+        -------
+        numpy array or numpy memmap
+            of shape (n_samples, n_attributes, n_pycor, n_pxcor), with the
+            rows ordered from max-pycor to min-pycor
+
+        Raises
+        ------
+        NetLogoException
+            If a LogoException or CompilerException is raised by NetLogo,
+            or if the world is resized while recording
+
+        """
+        if every < 1:
+            raise ValueError("every should be at least 1")
+
+        attributes = list(attributes)
+        extents = self._world_geometry()
+        nx = extents[1] - extents[0] + 1
+        ny = extents[3] - extents[2] + 1
+        n_samples = ticks // every
+        shape = (n_samples, len(attributes), ny, nx)
+
+        if out is None:
+            out = np.empty(shape)
+        elif isinstance(out, str):
+            out = np.lib.format.open_memmap(out, mode="w+", dtype=np.float64, shape=shape)
+        elif out.shape != shape:
+            raise ValueError("out should have shape {}, not {}".format(shape, out.shape))
+
+        sample_size = len(attributes) * nx * ny
+        per_call = max(1, PATCH_BUFFER_SIZE // max(sample_size, 1))
+        try:
+            for start in range(0, n_samples, per_call):
+                n = min(per_call, n_samples - start)
+                values = self.link.recordPatches(go, attributes, n, every)
+                out[start : start + n] = primitive_to_numpy(values, np.float64).reshape(
+                    (n, len(attributes), ny, nx)
+                )
+            if ticks % every:
+                self.link.command("repeat {} [{}]".format(ticks % every, go))
+        except jpype.JException as ex:
+            print(ex.stacktrace())
+            raise NetLogoException(str(ex))
+
+        if isinstance(out, np.memmap):
+            out.flush()
+        return out
+
+    @instrumented
+    def patch_set(self, attribute: str, data: pd.DataFrame | np.ndarray):
+        """Set patch attributes in NetLogo.
+
+        Inverse of the `patch_report` method. Sets a patch attribute using
+        values from a pandas DataFrame or numpy array of same dimensions as
+        the NetLogo world. The values are passed to Java as a single typed
+        array and written directly to the patch variable, without compiling
+        a NetLogo command.
+
+        Parameters
+        ----------
+        attribute : str
+            Valid NetLogo patch variable
+        data : Pandas DataFrame or numpy array
+            Data with same dimensions as NetLogo world, with rows ordered
+            from max-pycor to min-pycor and columns from min-pxcor to
+            max-pxcor. Numerical, boolean, and string values are supported.
+
+        Raises
+        ------
+        NetLogoException
+            If the data does not match the dimensions of the world, if
+            numerical data has missing values, or if a LogoException or
+            CompilerException is raised by NetLogo
+
+        """
+
+        values = np.asarray(data)
+        extents = self._world_geometry()
+        shape = (extents[3] - extents[2] + 1, extents[1] - extents[0] + 1)
+        if values.shape != shape:
+            raise NetLogoException(
+                "data of shape {} does not match world of shape {}".format(values.shape, shape)
+            )
+
+        try:
+            if values.dtype == bool:
+                self.link.setPatchesBoolean(attribute, np.ascontiguousarray(values).ravel())
+            elif values.dtype.kind in "iuf":
+                if values.dtype.kind == "f" and np.isnan(values).any():
+                    raise NetLogoException("data for {} has missing values".format(attribute))
+                self.link.setPatchesDouble(
+                    attribute, np.ascontiguousarray(values, dtype=np.float64).ravel()
+                )
+            else:
+                self.link.setPatchesString(attribute, values.astype(str).ravel().tolist())
+        except jpype.JException as ex:
+            print(ex.stacktrace())
+            raise NetLogoException(str(ex))
+
+    @instrumented
+    def repeat_command(self, netlogo_command: str, reps: int):
+        """Execute the supplied command in NetLogo a given number of times.
+
+        Parameters
+        ----------
+        netlogo_command : str
+            Valid NetLogo command
+        reps : int
+            Number of repetitions for which to repeat commands
+
+        Raises
+        ------
+        NetLogoException
+            If a LogoException or CompilerException is raised by NetLogo
+
+        """
+
+        try:
+            commandstr = "repeat {0} [{1}]".format(reps, netlogo_command)
+            self.link.command(commandstr)
+        except jpype.JException as ex:
+            print(ex.stacktrace())
+            raise NetLogoException(str(ex))
+
+    @instrumented
+    def repeat_report(
+        self, netlogo_reporter: str, reps: int, go: str = "go", include_t0: bool = True
+    ):
+        """Return values from a NetLogo reporter over a number of ticks.
+
+        Can be used with multiple reporters by passing a list of strings.
+        The values are collected in memory on the Java side and returned in
+        a single call. They are formatted following the data type returned
+        by the reporters: numerical, boolean, or string data is returned as
+        a numpy array with one entry per tick. If the reporter returns
+        multiple values, the result is a list with a numpy array per tick.
+
+        Parameters
+        ----------
+        netlogo_reporter : str or list of str
+            Valid NetLogo reporter(s)
+        reps : int
+            Number of NetLogo ticks for which to return values
+        go : str, optional
+            NetLogo command for running the model ('go' by default)
+        include_t0 : boolean, optional
+            include the value of the reporter at t0, prior to running the
+            go command
+
+        Returns
+        -------
+        dict
+            key is the reporter, and the value is a list order by ticks
+
+        Raises
+        ------
+        NetLogoException
+            If reporters are not in a valid format, or if a LogoException
+            or CompilerException is raised by NetLogo
+
+        """
+
+        if isinstance(netlogo_reporter, str):
+            cols = [netlogo_reporter]
+        elif isinstance(netlogo_reporter, list):
+            cols = netlogo_reporter
+        else:
+            raise NetLogoException("Unknown datatype")
+
+        try:
+            series = self.link.repeatReport(go, cols, reps, include_t0)
+            results = {}
+            for key, value in zip(cols, series.getResults()):
+                results[key] = self._cast_series(value)
+            return results
+        except jpype.JException as ex:
+            print(ex.stacktrace())
+            raise NetLogoException(str(ex))
+
+    def iter_ticks(
+        self,
+        netlogo_reporter: str | list[str],
+        go: str = "go",
+        chunk: int = 1000,
+        until: str | None = None,
+        max_ticks: int | None = None,
+    ):
+        """Run the model and yield the values of reporters in chunks of ticks.
+
+        Each chunk of ticks is run and collected in a single call to Java,
+        so long runs can be processed with bounded memory. The reporters
+        should return a single numerical or boolean value.
+
+        Parameters
+        ----------
+        netlogo_reporter : str or list of str
+            Valid NetLogo reporter(s)
+        go : str, optional
+            NetLogo command for running the model ('go' by default)
+        chunk : int, optional
+            Number of ticks per chunk
+        until : str, optional
+            Valid boolean NetLogo reporter, the run stops once it is true.
+            The condition is checked before every tick.
+        max_ticks : int, optional
+            Maximum number of ticks to run, by default the run continues
+            until the condition is true or the generator is closed
+
+        Yields
+        ------
+        numpy array
+            of shape (n_ticks, n_reporters), with n_ticks at most chunk
+
+        Raises
+        ------
+        NetLogoException
+            If a LogoException or CompilerException is raised by NetLogo
+
+        """
+        if chunk < 1:
+            raise ValueError("chunk should be at least 1")
+
+        if isinstance(netlogo_reporter, str):
+            cols = [netlogo_reporter]
+        else:
+            cols = list(netlogo_reporter)
+        condition = None if until is None else "not ({})".format(until)
+
+        # the arguments are checked when iter_ticks is called, not on the first chunk
+        return self._iter_ticks(cols, go, chunk, condition, max_ticks)
+
+    def _iter_ticks(self, cols, go, chunk, condition, max_ticks):
+        done = 0
+        while max_ticks is None or done < max_ticks:
+            n = chunk if max_ticks is None else min(chunk, max_ticks - done)
+            try:
+                series = self.link.repeatReportWhile(go, cols, n, condition)
+                size = int(series.size())
+                if size:
+                    values = [type_convert(result) for result in series.getResults()]
+            except jpype.JException as ex:
+                print(ex.stacktrace())
+                raise NetLogoException(str(ex))
+
+            if size:
+                yield np.column_stack(values).astype(np.float64, copy=False)
+            done += size
+            if size < n:
+                return
+
+    @instrumented
+    def write_NetLogo_attriblist(
+        self, agent_data: pd.DataFrame, agent_name: str, chunk_size: int = 100000
+    ):
+        """Update attributes of a set of NetLogo agents from a DataFrame.
+
+        Assumes a set of NetLogo agents of the same type. Attribute values
+        can be numerical, boolean, or strings. The columns are passed to
+        Java as typed arrays and written directly to the variables of the
+        agents, without compiling a NetLogo command. Large DataFrames are
+        written in chunks of `chunk_size` agents.
+
+        Parameters
+        ----------
+        agent_data : pandas DataFrame
             DataFrame indexed with a row for each agent, and columns for
             each attribute to update. Requires a 'who' column for the
             NetLogo agent ID
         agent_name : str
             Name of the NetLogo agent type to update (singular, e.g. a-sheep)
+        chunk_size : int, optional
+            Maximum number of agents to update per call to Java
 
         Raises
         ------
         NetLogoException
-            If a LogoException or CompilerException is raised by NetLogo
+            If a numeric or boolean column has missing values, or if a
+            LogoException or CompilerException is raised by NetLogo
 
         """
 
+        # values of the NetLogo agent attributes to update, grouped by data type
+        doubles = {}
+        booleans = {}
+        strings = {}
+        for attrib in agent_data.columns:
+            if attrib == "who":
+                continue
+            column = agent_data[attrib]
+            if isinstance(column.dtype, pd.CategoricalDtype):
+                # write the categories rather than their codes
+                column = column.astype(column.cat.categories.dtype)
+            if pd.api.types.is_bool_dtype(column.dtype):
+                if column.hasnans:
+                    raise NetLogoException("boolean column {} has missing values".format(attrib))
+                booleans[str(attrib)] = column.to_numpy(dtype=bool)
+            elif pd.api.types.is_numeric_dtype(column.dtype):
+                # NetLogo numbers cannot be NaN, so a missing value cannot be written
+                if column.hasnans:
+                    raise NetLogoException("numeric column {} has missing values".format(attrib))
+                doubles[str(attrib)] = column.to_numpy(dtype=np.float64)
+            else:
+                strings[str(attrib)] = column.astype(str).to_numpy()
+
+        who = agent_data["who"].to_numpy(dtype=np.int64)
+        n = who.shape[0]
+
+        # values are passed variable by variable
+        double_values = np.array(list(doubles.values()), dtype=np.float64).reshape(len(doubles), n)
+        boolean_values = np.array(list(booleans.values()), dtype=bool).reshape(len(booleans), n)
+        string_values = np.array(list(strings.values()), dtype=object).reshape(len(strings), n)
+
         try:
-            # Get list of agent IDs to update, and convert to a Python string
-            # to pass to NetLogo
-            whostr = " ".join(map(str, agent_data["who"]))
-
-            # Name of NetLogo agent attributes to update
-            attribs_to_update = [str(i) for i in agent_data.columns if i != "who"]
-
-            # Convert agent data to Python lists, then to strings for NetLogo
-            attribstr = []
-            for attrib in attribs_to_update:
-                # Check if string or numerical data and format accordingly
-                if agent_data[attrib].dtype == object:
-                    values = " ".join(map(lambda x: '"{0}"'.format(x), list(agent_data[attrib])))
-                else:
-                    values = " ".join(map(str, list(agent_data[attrib])))
-                # Then format the values string to look like a NetLogo list
-                liststr = ["[{0}]".format(values)]
-                attribstr.append("".join(liststr))
-
-            # Join the strings for all the attributes
-            attribstr = " ".join(attribstr)
-
-            # Set up the "foreach" NetLogo command string
-            askstr = []
-            setstr = []
-            for i, attrib_name in enumerate(attribs_to_update):
-                askstr.extend(("?{0} ".format(i + 2)))
-                setstr.extend(("set {0} ?{1} ".format(attrib_name, i + 2)))
-            askstr = "".join(askstr)
-            setstr = "".join(setstr)
-
-            commandstr = [
-                "(foreach [{0}] {1} [ [?1 {2}] \
-                           -> ask {3} ?1 [{4}]])".format(
-                    whostr, attribstr, askstr, agent_name, setstr
+            for start in range(0, n, chunk_size):
+                chunk = slice(start, start + chunk_size)
+                self.link.setTurtleVariables(
+                    agent_name,
+                    np.ascontiguousarray(who[chunk]),
+                    list(doubles),
+                    np.ascontiguousarray(double_values[:, chunk]).ravel(),
+                    list(booleans),
+                    np.ascontiguousarray(boolean_values[:, chunk]).ravel(),
+                    list(strings),
+                    string_values[:, chunk].ravel().tolist(),
                 )
-            ]
-            commandstr = "".join(commandstr)
 
-            self.link.command(commandstr)
+        except jpype.JException as ex:
+            print(ex.stacktrace())
+            raise NetLogoException(str(ex))
+
+    @instrumented
+    def agents_report(self, agentset: str = "turtles", variables: list[str] | None = None):
+        """Return the variables of all agents in an agentset as a DataFrame.
+
+        The variables are read in a single pass over the agents on the Java
+        side, and returned as one typed array per variable, so the rows are
+        guaranteed to line up. Numerical, boolean, and string variables keep
+        their type, other values (e.g., lists) are returned as strings.
+
+        Parameters
+        ----------
+        agentset : str, optional
+            Valid NetLogo reporter for an agentset, for example turtles, a
+            breed, links, patches, or ``turtles with [energy > 5]``
+        variables : list of str, optional
+            Names of agent variables
+
+        Returns
+        -------
+        pandas DataFrame
+            with a column per variable. Turtles are indexed by who, patches
+            by pxcor and pycor, and links by the who of end1 and end2.
+
+        Raises
+        ------
+        NetLogoException
+            If a LogoException or CompilerException is raised by NetLogo
+
+        """
+        variables = [] if variables is None else list(variables)
+        kind, columns, _ = self._agent_columns(agentset, variables)
+
+        names = INDEX_VARIABLES[kind]
+        keys = [column.astype(np.int64) for column in columns[: len(names)]]
+        if len(keys) == 1:
+            index = pd.Index(keys[0], name=names[0])
+        else:
+            index = pd.MultiIndex.from_arrays(keys, names=names)
+
+        return pd.DataFrame(dict(zip(variables, columns[len(names) :])), index=index)
+
+    @instrumented
+    def network_report(
+        self,
+        linkset: str = "links",
+        attributes: list[str] | None = None,
+        adjacency: bool = False,
+        weight: str | None = None,
+        n_nodes: int | None = None,
+    ):
+        """Return the links of a network as edge arrays, and optionally as a sparse matrix.
+
+        The endpoints and attributes of all links are read in a single pass
+        over the links, see :meth:`agents_report`.
+
+        Parameters
+        ----------
+        linkset : str, optional
+            Valid NetLogo reporter for a set of links, for example links, a
+            link breed, or ``links with [weight > 0.5]``
+        attributes : list of str, optional
+            Names of link variables
+        adjacency : bool, optional
+            If true, also return the adjacency matrix as a
+            scipy.sparse.csr_matrix, which requires scipy. Undirected links
+            are added in both directions.
+        weight : str, optional
+            Numeric link attribute to use as the entries of the adjacency
+            matrix, by default every link counts as 1. Multiple links
+            between the same turtles are summed. The weight is only a column
+            of the returned DataFrame if it is one of the attributes.
+        n_nodes : int, optional
+            Size of the adjacency matrix, by default the largest who of the
+            endpoints plus one
+
+        Returns
+        -------
+        pandas DataFrame or tuple
+            with the who of end1 and end2, whether the link is directed, and
+            a column per attribute, and if adjacency is true, a tuple of the
+            DataFrame and the adjacency matrix indexed by who
 
+        Raises
+        ------
+        NetLogoException
+            If a LogoException or CompilerException is raised by NetLogo
+
+        """
+        attributes = [] if attributes is None else list(attributes)
+        # the weight is read along with the attributes, but not returned unless asked for
+        extra = [weight] if adjacency and weight is not None and weight not in attributes else []
+
+        kind, columns, directed = self._agent_columns(
+            linkset, attributes + extra, read_directed=True
+        )
+        if kind != "Link":
+            raise NetLogoException("{} is not a set of links".format(linkset))
+
+        edges = pd.DataFrame(
+            {
+                "end1": columns[0].astype(np.int64),
+                "end2": columns[1].astype(np.int64),
+                "directed": directed,
+                **dict(zip(attributes + extra, columns[2:])),
+            }
+        )
+        if not adjacency:
+            return edges
+        matrix = adjacency_matrix(edges, weight=weight, n_nodes=n_nodes)
+        return edges.drop(columns=extra), matrix
+
+    def _agent_columns(self, agentset: str, variables: list[str], read_directed: bool = False):
+        """Return the kind of agents, the columns, and whether links are directed.
+
+        Whether links are directed is None unless read_directed is true.
+
+        """
+        directed = None
+        try:
+            table = self.link.agentsReport(agentset, variables)
+            kind = str(table.getKind())
+            columns = [type_convert(column) for column in table.getColumns()]
+            if read_directed:
+                directed = primitive_to_numpy(table.getDirected(), bool)
         except jpype.JException as ex:
             print(ex.stacktrace())
             raise NetLogoException(str(ex))
+        return kind, columns, directed
+
+    def _world_geometry(self):
+        """Return the min-pxcor, max-pxcor, min-pycor, and max-pycor of the world.
+
+        The extents are read on every call, which is cheap, as procedures of
+        the model can resize the world at any time.
 
+        """
+        try:
+            return tuple(int(e) for e in self.link.getWorldExtents())
+        except jpype.JException as ex:
+            print(ex.stacktrace())
+            raise NetLogoException(str(ex))
+
+    def _global_variables(self):
+        """Return the observer variables of the loaded model by lowercase name."""
+        if self._globals is None:
+            names = [str(name).lower() for name in self.link.getGlobalNames()]
+            kinds = [str(kind) for kind in self.link.getGlobalKinds()]
+            self._globals = dict(zip(names, kinds))
+        return self._globals
+
+    @timed_conversion
+    def _cast_series(self, results):
+        """Convert a reporter series collected over a number of ticks.
+
+        A series of list values is returned as a list with one entry per
+        tick, because the length of the list can vary over time.
+
+        """
+        if str(results.getType()) == "NestedList":
+            return [type_convert(entry) for entry in results.getResultAsObject()]
+        return type_convert(results)
+
+    @timed_conversion
     def _cast_results(self, results):
         """Convert results to the proper python data type.
 
@@ -662,6 +1730,239 @@ class NetLogoLink:
         return converted_results
 
 
+class ReporterTemplate:
+    """A NetLogo reporter with placeholders for values.
+
+    Create instances through :meth:`NetLogoLink.reporter_template`.
+
+    Parameters
+    ----------
+    link : NetLogoLink
+    netlogo_reporter : str
+        Valid NetLogo reporter, with ``?`` placeholders for values
+
+    """
+
+    def __init__(self, link: NetLogoLink, netlogo_reporter: str):
+        self.link = link
+        self.netlogo_reporter = netlogo_reporter
+        self._parts = PLACEHOLDER.split(netlogo_reporter)
+
+    @property
+    def n_placeholders(self):
+        return len(self._parts) - 1
+
+    def source(self, *values):
+        """Return the source of the reporter with the values bound."""
+        if len(values) != self.n_placeholders:
+            raise NetLogoException(
+                "{} values given for {} placeholders".format(len(values), self.n_placeholders)
+            )
+
+        source = [self._parts[0]]
+        for value, part in zip(values, self._parts[1:]):
+            source.append(netlogo_literal(value))
+            source.append(part)
+        return "".join(source)
+
+    def __call__(self, *values):
+        return self.link._report_template(self.netlogo_reporter, self.source(*values))
+
+    def __repr__(self):
+        return "ReporterTemplate({!r})".format(self.netlogo_reporter)
+
+
+class Batch:
+    """A batch of NetLogo commands and reporters, executed in a single call.
+
+    Items are executed in the order in which they are added. Create
+    instances through :meth:`NetLogoLink.batch`.
+
+    Parameters
+    ----------
+    link : NetLogoLink
+
+    Attributes
+    ----------
+    results : dict
+              results of the reporters, keyed by their key, available
+              after the batch has run
+
+    """
+
+    def __init__(self, link: NetLogoLink):
+        self.link = link
+        self.results = None
+        self._sources = []
+        self._is_reporter = []
+        self._keys = []
+
+    def __len__(self):
+        return len(self._sources)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.run()
+
+    def command(self, netlogo_command: str):
+        """Add a command to the batch.
+
+        Parameters
+        ----------
+        netlogo_command : str
+            Valid NetLogo command
+
+        """
+        self._sources.append(netlogo_command)
+        self._is_reporter.append(False)
+        self._keys.append(None)
+        return self
+
+    def report(self, netlogo_reporter: str, key=None):
+        """Add a reporter to the batch.
+
+        Parameters
+        ----------
+        netlogo_reporter : str
+            Valid NetLogo reporter
+        key : hashable, optional
+            key of the result in the results, defaults to the reporter
+
+        """
+        self._sources.append(netlogo_reporter)
+        self._is_reporter.append(True)
+        self._keys.append(netlogo_reporter if key is None else key)
+        return self
+
+    def run(self, stop_on_error: bool = True):
+        """Execute the batch.
+
+        Parameters
+        ----------
+        stop_on_error : bool, optional
+            If true, the items following a failed item are not executed
+
+        Returns
+        -------
+        dict
+            results of the reporters, keyed by their key
+
+        Raises
+        ------
+        NetLogoBatchException
+            If one or more items failed, with the error message of each
+            failed item
+
+        """
+
+        try:
+            batch = self.link.link.runBatch(self._sources, self._is_reporter, stop_on_error)
+            java_results = batch.getResults()
+            java_errors = batch.getErrors()
+            executed = int(batch.getExecuted())
+        except jpype.JException as ex:
+            print(ex.stacktrace())
+            raise NetLogoException(str(ex))
+
+        self.results = {}
+        errors = {}
+        for i in range(executed):
+            if java_errors[i] is not None:
+                errors[i] = str(java_errors[i])
+            elif self._is_reporter[i]:
+                self.results[self._keys[i]] = self.link._cast_results(java_results[i])
+
+        if errors:
+            raise NetLogoBatchException(errors, self.results)
+        return self.results
+
+
+def netlogo_literal(value):
+    """Format a Python value as a NetLogo literal.
+
+    Parameters
+    ----------
+    value : bool, number, str, or a sequence of those
+
+    Returns
+    -------
+    str
+
+    """
+    if isinstance(value, (bool, np.bool_)):
+        return "true" if value else "false"
+    elif isinstance(value, (int, np.integer)):
+        return str(int(value))
+    elif isinstance(value, (float, np.floating)):
+        return repr(float(value))
+    elif isinstance(value, str):
+        return '"{}"'.format(value.replace("\\", "\\\\").replace('"', '\\"'))
+    elif isinstance(value, (list, tuple, np.ndarray, pd.Series)):
+        return "[{}]".format(" ".join(netlogo_literal(entry) for entry in value))
+    else:
+        raise NetLogoException("Cannot convert {!r} to NetLogo".format(value))
+
+
+def adjacency_matrix(edges: pd.DataFrame, weight: str | None = None, n_nodes: int | None = None):
+    """Return the adjacency matrix of edges from :meth:`NetLogoLink.network_report`.
+
+    Parameters
+    ----------
+    edges : pandas DataFrame
+        with end1, end2, and directed columns
+    weight : str, optional
+        column to use as the entries of the matrix, by default every edge
+        counts as 1
+    n_nodes : int, optional
+        Size of the matrix, by default the largest endpoint plus one
+
+    Returns
+    -------
+    scipy.sparse.csr_matrix
+        of shape (n_nodes, n_nodes), with undirected edges in both directions
+
+    """
+    try:
+        import scipy.sparse
+    except ImportError:
+        raise ImportError("an adjacency matrix requires scipy")
+
+    end1 = edges["end1"].to_numpy()
+    end2 = edges["end2"].to_numpy()
+    if weight is None:
+        values = np.ones(len(edges))
+    else:
+        values = edges[weight].to_numpy(dtype=np.float64)
+    if n_nodes is None:
+        n_nodes = int(max(end1.max(initial=-1), end2.max(initial=-1))) + 1
+
+    # undirected edges are added in the reverse direction as well
+    undirected = ~edges["directed"].to_numpy(dtype=bool)
+    rows = np.concatenate([end1, end2[undirected]])
+    cols = np.concatenate([end2, end1[undirected]])
+    values = np.concatenate([values, values[undirected]])
+    return scipy.sparse.coo_matrix((values, (rows, cols)), shape=(n_nodes, n_nodes)).tocsr()
+
+
+def observer_value(value):
+    """Convert a python value to the type NetLogo uses for observer variables.
+
+    Numbers become floats, numpy scalars are converted to their python
+    equivalent. Other values are returned unchanged.
+
+    """
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, (bool, str)):
+        return value
+    if isinstance(value, (int, float)):
+        return float(value)
+    return value
+
+
 def type_convert(results):
     """Helper function for converting from Java datatypes to
     Python datatypes"""
@@ -681,21 +1982,19 @@ def type_convert(results):
     elif java_dtype == "Double":
         return results.getResultAsDouble()
     elif java_dtype == "BoolList":
-        results = results.getResultAsBooleanArray()
-
-        tr = []
-        for entry in results:
-            if entry == 1:
-                tr.append(True)
-            else:
-                tr.append(False)
-        return tr
+        return primitive_to_numpy(results.getResultAsBooleanArray(), bool)
     elif java_dtype == "StringList":
-        return results.getResultAsStringArray()
+        return split_strings(
+            str(results.getResultAsJoinedString()),
+            primitive_to_numpy(results.getStringLengths(), np.int64),
+        )
     elif java_dtype == "IntegerList":
-        return results.getResultAsIntegerArray()
+        return primitive_to_numpy(results.getResultAsIntegerArray(), np.int64)
     elif java_dtype == "DoubleList":
-        return np.array(results.getResultAsDoubleArray())
+        return primitive_to_numpy(results.getResultAsDoubleArray(), np.float64)
+    elif java_dtype == "Matrix":
+        shape = tuple(primitive_to_numpy(results.getResultShape(), np.int64))
+        return primitive_to_numpy(results.getResultAsDoubleArray(), np.float64).reshape(shape)
     elif java_dtype == "NestedList":
         result = results.getResultAsObject()
         value = []
@@ -704,3 +2003,55 @@ def type_convert(results):
         return np.asarray(value)
     else:
         raise NetLogoException("Unknown datatype: {}".format(java_dtype))
+
+
+def primitive_to_numpy(array, dtype):
+    """Convert a Java array of primitives to a numpy array.
+
+    The conversion goes through the buffer protocol, so the values are
+    copied in bulk rather than element by element.
+
+    Parameters
+    ----------
+    array : Java array of double, int, or boolean
+    dtype : numpy dtype of the returned array
+
+    Returns
+    -------
+    numpy array
+
+    """
+    return np.asarray(memoryview(array)).astype(dtype, copy=False)
+
+
+def split_strings(joined: str, lengths):
+    """Split concatenated strings into a numpy string array.
+
+    The characters are scattered into a fixed width array in a single
+    vectorized step, instead of creating a Python string per entry.
+
+    Parameters
+    ----------
+    joined : str
+        The strings concatenated into one
+    lengths : numpy array of int
+        The length of each string
+
+    Returns
+    -------
+    numpy array of str
+
+    """
+    n = lengths.shape[0]
+    width = int(lengths.max()) if n else 0
+    if width == 0:
+        return np.full(n, "", dtype="<U1")
+
+    codes = np.frombuffer(joined.encode("utf-32-le"), dtype=np.uint32)
+    starts = np.cumsum(lengths) - lengths
+    rows = np.repeat(np.arange(n), lengths)
+    columns = np.arange(codes.shape[0]) - np.repeat(starts, lengths)
+
+    chars = np.zeros((n, width), dtype=np.uint32)
+    chars[rows, columns] = codes
+    return chars.view("<U{}".format(width)).reshape(n)
@@ -0,0 +1,450 @@
+"""Running experiments with a NetLogo model in parallel."""
+
+import math
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from .core import NetLogoLink
+from .pool import WorkspacePool
+from .sink import ResultSink
+
+__all__ = ["ExperimentRunner", "run_experiments"]
+
+BACKENDS = ("process", "thread")
+
+# the NetLogoLink of a worker process, set by _initialize_worker
+_link = None
+
+# results of worker processes are written to a memory mapped file in this
+# directory, which is in memory on most Linux systems
+SHARED_DIR = "/dev/shm" if os.path.isdir("/dev/shm") else None
+
+
+def apply_parameters(link: NetLogoLink, experiment: dict):
+    """Set the parameters of an experiment in the model.
+
+    Parameters
+    ----------
+    link : NetLogoLink
+    experiment : dict
+        parameter names and values, the random seed can be set through
+        a 'random-seed' entry
+
+    """
+    parameters = dict(experiment)
+    if "random-seed" in parameters:
+        # The NetLogo random seed requires a different syntax
+        link.command("random-seed {}".format(int(parameters.pop("random-seed"))))
+    # Otherwise, assume the input parameters are global variables
+    if parameters:
+        link.set_globals(parameters)
+
+
+def run_experiment(
+    link: NetLogoLink,
+    experiment: dict,
+    setup: str,
+    go: str,
+    reporters: list[str],
+    ticks: int,
+    include_t0: bool,
+):
+    """Run a single experiment and return the reporters over time.
+
+    Returns
+    -------
+    numpy array
+        of shape (n_ticks, n_reporters), of float64 if all reporters are
+        numeric, and of objects otherwise, so each reporter keeps its type
+
+    """
+    apply_parameters(link, experiment)
+    link.command(setup)
+    results = link.repeat_report(reporters, ticks, go=go, include_t0=include_t0)
+    columns = [np.asarray(results[reporter]) for reporter in reporters]
+    if all(column.dtype.kind in "iuf" for column in columns):
+        return np.column_stack(columns).astype(np.float64, copy=False)
+    return np.column_stack([column.astype(object) for column in columns])
+
+
+def results_frame(
+    experiments: pd.DataFrame,
+    results: list[np.ndarray] | np.ndarray,
+    reporters: list[str],
+    ticks: int,
+    include_t0: bool,
+):
+    """Combine the results of run_experiment into a DataFrame.
+
+    The results are either a list with the result of each experiment, or
+    an array of shape (n_experiments, n_ticks, n_reporters), which is used
+    without copying. Numeric reporters are float64 columns, other reporters
+    columns of the type of their values.
+
+    Returns
+    -------
+    pandas DataFrame
+        with a column per reporter and an (experiment, tick) MultiIndex
+
+    """
+    tick_index = np.arange(0 if include_t0 else 1, ticks + 1)
+    index = pd.MultiIndex.from_product(
+        [experiments.index, tick_index], names=["experiment", "tick"]
+    )
+    if isinstance(results, np.ndarray):
+        data = results.reshape(-1, len(reporters))
+    elif results:
+        data = np.concatenate(results)
+    else:
+        data = np.empty((0, len(reporters)))
+    frame = pd.DataFrame(data, index=index, columns=reporters, copy=False)
+    if data.dtype == object:
+        frame = frame.infer_objects()
+    return frame
+
+
+def _run_chunk(link: NetLogoLink, chunk: list[dict], settings: dict):
+    return [run_experiment(link, experiment, **settings) for experiment in chunk]
+
+
+def _run_chunk_to_sink(link: NetLogoLink, chunk: list[tuple], settings: dict, sink: ResultSink):
+    """Run a chunk of (label, experiment) pairs, writing the results to the sink.
+
+    Results are buffered until the sink's number of rows per part is
+    reached, so memory use does not grow with the size of the chunk.
+
+    """
+    ticks = np.arange(0 if settings["include_t0"] else 1, settings["ticks"] + 1)
+    labels = []
+    buffer = []
+
+    def flush():
+        if buffer:
+            sink.write(
+                np.repeat(labels, len(ticks)),
+                np.tile(ticks, len(labels)),
+                np.concatenate(buffer),
+                settings["reporters"],
+            )
+            labels.clear()
+            buffer.clear()
+
+    for label, experiment in chunk:
+        labels.append(label)
+        buffer.append(run_experiment(link, experiment, **settings))
+        if len(buffer) * len(ticks) >= sink.part_rows:
+            flush()
+    flush()
+    return len(chunk)
+
+
+def allocate_shared_results(shape: tuple):
+    """Return a memory mapped file of float64 for the results of worker processes.
+
+    Returns
+    -------
+    tuple
+        the path of the file and a numpy memmap of the given shape
+
+    """
+    fd, path = tempfile.mkstemp(prefix="pynetlogo-", suffix=".results", dir=SHARED_DIR)
+    os.close(fd)
+    return path, np.memmap(path, dtype=np.float64, mode="w+", shape=shape)
+
+
+def _run_chunk_to_shared(
+    link: NetLogoLink, chunk: list[tuple], settings: dict, path: str, shape: tuple
+):
+    """Run a chunk of (position, experiment) pairs, writing the results to the shared file.
+
+    Only numeric results are written to the file, the results of experiments
+    with non-numeric reporters are returned to the parent, keyed by position.
+
+    """
+    results = np.memmap(path, dtype=np.float64, mode="r+", shape=shape)
+    returned = {}
+    for position, experiment in chunk:
+        result = run_experiment(link, experiment, **settings)
+        if result.dtype == np.float64:
+            results[position] = result
+        else:
+            returned[position] = result
+    del results
+    return returned
+
+
+def _initialize_worker(model_file, netlogo_home, jvm_path, jvm_args):
+    global _link
+
+    _link = NetLogoLink(gui=False, netlogo_home=netlogo_home, jvm_path=jvm_path, jvm_args=jvm_args)
+    _link.load_model(model_file)
+
+
+def _run_chunk_in_worker(chunk: list[dict], settings: dict):
+    return _run_chunk(_link, chunk, settings)
+
+
+def _run_chunk_to_shared_in_worker(chunk: list[tuple], settings: dict, path: str, shape: tuple):
+    return _run_chunk_to_shared(_link, chunk, settings, path, shape)
+
+
+def _run_chunk_to_sink_in_worker(chunk: list[tuple], settings: dict, sink: ResultSink):
+    return _run_chunk_to_sink(_link, chunk, settings, sink)
+
+
+class ExperimentRunner:
+    """Run experiments on a set of warm workers with the model loaded.
+
+    The workers are started once and keep the model loaded until the runner
+    is closed, so repeated calls to :meth:`run` do not pay for starting a
+    JVM or loading the model again.
+
+    Parameters
+    ----------
+    model_file : str
+        Path to the NetLogo model
+    n_workers : int, optional
+        Number of workers, defaults to the number of cpu cores
+    backend : {'process', 'thread'}, optional
+        Use a worker process with its own JVM per worker, or a
+        :class:`~pynetlogo.pool.WorkspacePool` of workspaces in the JVM of
+        this process
+    netlogo_home : str, optional
+        Path to the NetLogo installation directory, found automatically if not given
+    jvm_path : str, optional
+        path of the jvm
+    jvm_args : list of str, optional
+              additional arguments that should be used when starting
+              the jvm
+
+    """
+
+    def __init__(
+        self,
+        model_file: str,
+        n_workers: int | None = None,
+        backend: str = "process",
+        netlogo_home: str | None = None,
+        jvm_path: str | None = None,
+        jvm_args: list[str] | None = None,
+    ):
+        if backend not in BACKENDS:
+            raise ValueError("backend should be one of {}".format(", ".join(BACKENDS)))
+        if n_workers is None:
+            n_workers = os.cpu_count() or 1
+
+        self.model_file = os.path.abspath(model_file)
+        self.n_workers = n_workers
+        self.backend = backend
+
+        if backend == "process":
+            self._executor = ProcessPoolExecutor(
+                max_workers=n_workers,
+                initializer=_initialize_worker,
+                initargs=(self.model_file, netlogo_home, jvm_path, jvm_args),
+            )
+        else:
+            self._executor = WorkspacePool(
+                self.model_file,
+                n_workspaces=n_workers,
+                netlogo_home=netlogo_home,
+                jvm_path=jvm_path,
+                jvm_args=jvm_args,
+            )
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def _map_chunks(self, chunks: list[list[dict]], settings: dict):
+        if self.backend == "process":
+            return self._executor.map(_run_chunk_in_worker, chunks, [settings] * len(chunks))
+        return self._executor.map(lambda link, chunk: _run_chunk(link, chunk, settings), chunks)
+
+    def _map_chunks_to_sink(self, chunks: list[list[tuple]], settings: dict, sink: ResultSink):
+        if self.backend == "process":
+            n = len(chunks)
+            return self._executor.map(
+                _run_chunk_to_sink_in_worker, chunks, [settings] * n, [sink] * n
+            )
+        return self._executor.map(
+            lambda link, chunk: _run_chunk_to_sink(link, chunk, settings, sink), chunks
+        )
+
+    def run(
+        self,
+        experiments: pd.DataFrame,
+        reporters: list[str],
+        ticks: int,
+        setup: str = "setup",
+        go: str = "go",
+        include_t0: bool = True,
+        chunksize: int | None = None,
+        sink: ResultSink | str | None = None,
+    ):
+        """Run the experiments and collect the reporters over time.
+
+        For each experiment, the parameters are set, the setup command is
+        executed, and the model is run for the given number of ticks while
+        collecting the reporters. Experiments are sent to the workers in
+        chunks to limit the communication overhead. With the process
+        backend, workers write numeric results directly into a memory mapped
+        file that is shared with this process, so they are not pickled.
+
+        Parameters
+        ----------
+        experiments : pandas DataFrame
+            one row per experiment and one column per parameter. The random
+            seed can be set through a 'random-seed' column
+        reporters : list of str
+            Valid NetLogo reporters, each returning a single value
+        ticks : int
+            Number of NetLogo ticks to run each experiment
+        setup : str, optional
+            NetLogo command for setting up the model ('setup' by default)
+        go : str, optional
+            NetLogo command for running the model ('go' by default)
+        include_t0 : boolean, optional
+            include the value of the reporters at t0, prior to running the
+            go command
+        chunksize : int, optional
+            Number of experiments sent to a worker at once, defaults to
+            spreading the experiments over 4 chunks per worker
+        sink : ResultSink or str, optional
+            write the results to this sink, or to a ResultSink in this
+            directory, as the experiments finish instead of collecting them
+            in memory
+
+        Returns
+        -------
+        pandas DataFrame or ResultSink
+            with a column per reporter and an (experiment, tick) MultiIndex,
+            in the order of experiments, or the sink if results are written
+            to a sink
+
+        Raises
+        ------
+        NetLogoException
+            If a LogoException or CompilerException is raised by NetLogo
+
+        """
+        reporters = list(reporters)
+        records = experiments.to_dict("records")
+        if chunksize is None:
+            chunksize = max(1, math.ceil(len(records) / (4 * self.n_workers)))
+        chunks = [records[i : i + chunksize] for i in range(0, len(records), chunksize)]
+
+        settings = dict(setup=setup, go=go, reporters=reporters, ticks=ticks, include_t0=include_t0)
+
+        if sink is not None:
+            if not isinstance(sink, ResultSink):
+                sink = ResultSink(sink)
+            labelled = list(zip(experiments.index, records))
+            chunks = [labelled[i : i + chunksize] for i in range(0, len(labelled), chunksize)]
+            for _ in self._map_chunks_to_sink(chunks, settings, sink):
+                pass
+            return sink
+
+        if self.backend == "process" and records and reporters and os.name == "posix":
+            n_ticks = ticks + 1 if include_t0 else ticks
+            results = self._run_shared(records, chunksize, settings, n_ticks)
+        else:
+            results = [result for chunk in self._map_chunks(chunks, settings) for result in chunk]
+
+        return results_frame(experiments, results, reporters, ticks, include_t0)
+
+    def _run_shared(self, records: list[dict], chunksize: int, settings: dict, n_ticks: int):
+        """Run the experiments on the worker processes, which write their numeric results
+        to a memory mapped file instead of sending them back through a pipe."""
+        shape = (len(records), n_ticks, len(settings["reporters"]))
+        path, results = allocate_shared_results(shape)
+        returned = {}
+        try:
+            positioned = list(enumerate(records))
+            chunks = [positioned[i : i + chunksize] for i in range(0, len(positioned), chunksize)]
+            n = len(chunks)
+            for chunk_returned in self._executor.map(
+                _run_chunk_to_shared_in_worker, chunks, [settings] * n, [path] * n, [shape] * n
+            ):
+                returned.update(chunk_returned)
+        finally:
+            # the mapping stays valid for as long as the results are in use
+            os.unlink(path)
+
+        if returned:
+            # non-numeric results were pickled, as the file only holds float64
+            return [returned.get(i, results[i]) for i in range(len(records))]
+        return results
+
+    def close(self):
+        """Shut down the workers."""
+        if self.backend == "process":
+            self._executor.shutdown(wait=True)
+        else:
+            self._executor.close()
+
+
+def run_experiments(
+    model_file: str,
+    experiments: pd.DataFrame,
+    reporters: list[str],
+    ticks: int,
+    setup: str = "setup",
+    go: str = "go",
+    include_t0: bool = True,
+    n_workers: int | None = None,
+    backend: str = "process",
+    chunksize: int | None = None,
+    sink: ResultSink | str | None = None,
+    netlogo_home: str | None = None,
+    jvm_path: str | None = None,
+    jvm_args: list[str] | None = None,
+):
+    """Run a set of experiments with a NetLogo model in parallel.
+
+    Convenience function that creates an :class:`ExperimentRunner`, runs the
+    experiments, and shuts down the workers again. See
+    :meth:`ExperimentRunner.run` for a description of the parameters.
+
+    Returns
+    -------
+    pandas DataFrame or ResultSink
+        with a column per reporter and an (experiment, tick) MultiIndex,
+        in the order of experiments, or the sink if results are written to
+        a sink
+
+    Examples
+    --------
+    >>> results = run_experiments(
+    ...     modelfile,
+    ...     experiments,
+    ...     reporters=["count sheep", "count wolves"],
+    ...     ticks=100,
+    ...     n_workers=4,
+    ... )
+
+    """
+    with ExperimentRunner(
+        model_file,
+        n_workers=n_workers,
+        backend=backend,
+        netlogo_home=netlogo_home,
+        jvm_path=jvm_path,
+        jvm_args=jvm_args,
+    ) as runner:
+        return runner.run(
+            experiments,
+            reporters,
+            ticks,
+            setup=setup,
+            go=go,
+            include_t0=include_t0,
+            chunksize=chunksize,
+            sink=sink,
+        )
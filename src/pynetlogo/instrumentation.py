@@ -0,0 +1,217 @@
+"""Opt-in instrumentation of the calls made to a NetLogo workspace."""
+
+import functools
+import threading
+import time
+from typing import Callable, NamedTuple
+
+import numpy as np
+import pandas as pd
+
+__all__ = ["CallRecord", "Instrumentation"]
+
+# upper bounds of the histogram buckets in seconds, doubling from 1 microsecond
+BUCKETS = 1e-6 * 2.0 ** np.arange(32)
+
+# the source of a call is truncated to keep the statistics readable
+MAX_SOURCE_LENGTH = 200
+
+
+class CallRecord(NamedTuple):
+    """Timings of a single call to the workspace in seconds.
+
+    The total time is split in compiling commands and reporters, executing
+    them in NetLogo, and converting the results to python. The remainder,
+    `total - compile - execute - convert`, is spent in crossing between
+    python and java.
+
+    """
+
+    method: str
+    source: str
+    total: float
+    compile: float
+    execute: float
+    convert: float
+
+
+class Instrumentation:
+    """Counts and timing histograms of calls, per method and per source text.
+
+    Created through :meth:`~pynetlogo.core.NetLogoLink.enable_instrumentation`.
+
+    Parameters
+    ----------
+    callback : callable, optional
+        called with a :class:`CallRecord` after each call, e.g., to export
+        the timings to a metrics system
+
+    """
+
+    def __init__(self, callback: Callable[[CallRecord], None] | None = None):
+        self.callback = callback
+        self._lock = threading.Lock()
+        self._totals = {}
+        self._histograms = {}
+        # the call being recorded, per thread, as a link can be used from several threads
+        self._local = threading.local()
+
+    def _state(self):
+        """Return the nesting depth and conversion time of the call of this thread."""
+        state = self._local
+        if not hasattr(state, "depth"):
+            state.depth = 0
+            state.converting = 0
+            state.convert = 0.0
+        return state
+
+    def add(self, record: CallRecord):
+        """Add the timings of a call to the statistics."""
+        key = (record.method, record.source)
+        with self._lock:
+            if key not in self._totals:
+                self._totals[key] = np.zeros(5)
+                self._histograms[key] = np.zeros(len(BUCKETS) + 1, dtype=np.int64)
+            self._totals[key] += (1, record.total, record.compile, record.execute, record.convert)
+            self._histograms[key][np.searchsorted(BUCKETS, record.total)] += 1
+
+        if self.callback is not None:
+            self.callback(record)
+
+    def reset(self):
+        """Clear the statistics."""
+        with self._lock:
+            self._totals.clear()
+            self._histograms.clear()
+
+    def stats(self):
+        """Return the statistics per method and source text.
+
+        Returns
+        -------
+        pandas DataFrame
+            with a (method, source) index, the number of calls, the summed
+            total, compile, execute, convert, and other times in seconds,
+            and the median and 99th percentile of the total time estimated
+            from the histogram
+
+        """
+        columns = ["count", "total", "compile", "execute", "convert", "other", "p50", "p99"]
+        with self._lock:
+            keys = list(self._totals)
+            totals = [self._totals[key].copy() for key in keys]
+            histograms = [self._histograms[key].copy() for key in keys]
+
+        rows = []
+        for total, histogram in zip(totals, histograms):
+            other = total[1] - total[2:].sum()
+            rows.append([*total, other, _quantile(histogram, 0.5), _quantile(histogram, 0.99)])
+
+        index = pd.MultiIndex.from_tuples(keys, names=["method", "source"])
+        frame = pd.DataFrame(rows, index=index, columns=columns)
+        return frame.astype({"count": np.int64})
+
+    def histogram(self, method: str, source: str = ""):
+        """Return the histogram of the total time of calls.
+
+        Parameters
+        ----------
+        method : str
+            name of the NetLogoLink method
+        source : str, optional
+            the command or reporter text
+
+        Returns
+        -------
+        pandas Series
+            number of calls indexed by the upper bound of the bucket in
+            seconds
+
+        """
+        with self._lock:
+            histogram = self._histograms[(method, source)].copy()
+        return pd.Series(histogram, index=np.append(BUCKETS, np.inf), name="count")
+
+
+def _quantile(histogram, q):
+    """Return the upper bound of the bucket containing quantile q."""
+    cumulative = np.cumsum(histogram)
+    if cumulative[-1] == 0:
+        return np.nan
+    bucket = np.searchsorted(cumulative, q * cumulative[-1])
+    return np.append(BUCKETS, np.inf)[bucket]
+
+
+def _source(args):
+    if not args:
+        return ""
+    source = args[0]
+    if isinstance(source, (list, tuple)) and all(isinstance(s, str) for s in source):
+        source = "; ".join(source)
+    if not isinstance(source, str):
+        return ""
+    return source[:MAX_SOURCE_LENGTH]
+
+
+def instrumented(method):
+    """Record the timings of calls to a NetLogoLink method if instrumentation is enabled.
+
+    Only the outermost call is recorded when instrumented methods call each
+    other.
+
+    """
+
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        instrumentation = getattr(self, "_instrumentation", None)
+        if instrumentation is None:
+            return method(self, *args, **kwargs)
+        state = instrumentation._state()
+        if state.depth:
+            return method(self, *args, **kwargs)
+
+        state.depth += 1
+        state.convert = 0.0
+        compile_start, execute_start = (int(t) for t in self.link.getTimings())
+        start = time.perf_counter()
+        try:
+            return method(self, *args, **kwargs)
+        finally:
+            total = time.perf_counter() - start
+            compile_end, execute_end = (int(t) for t in self.link.getTimings())
+            state.depth -= 1
+            instrumentation.add(
+                CallRecord(
+                    method.__name__,
+                    _source(args),
+                    total,
+                    (compile_end - compile_start) * 1e-9,
+                    (execute_end - execute_start) * 1e-9,
+                    state.convert,
+                )
+            )
+
+    return wrapper
+
+
+def timed_conversion(method):
+    """Add the time spent converting results to the call being instrumented."""
+
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        instrumentation = getattr(self, "_instrumentation", None)
+        if instrumentation is None:
+            return method(self, *args, **kwargs)
+        state = instrumentation._state()
+        if state.converting:
+            return method(self, *args, **kwargs)
+
+        state.converting += 1
+        start = time.perf_counter()
+        try:
+            return method(self, *args, **kwargs)
+        finally:
+            state.convert += time.perf_counter() - start
+            state.converting -= 1
+
+    return wrapper
@@ -0,0 +1,21 @@
+#!/bin/sh
+# Build netlogolink.jar against the jars of a NetLogo installation.
+#
+# usage: ./build.sh /path/to/NetLogo   (or set NETLOGO_HOME)
+set -e
+
+NETLOGO_HOME=${1:-$NETLOGO_HOME}
+if [ ! -d "$NETLOGO_HOME" ]; then
+	echo "usage: $0 /path/to/NetLogo" >&2
+	exit 1
+fi
+
+cd "$(dirname "$0")"
+CLASSPATH=$(find "$NETLOGO_HOME" -name "*.jar" | tr '\n' ':')
+BUILD=$(mktemp -d)
+trap 'rm -rf "$BUILD"' EXIT
+
+javac --release 11 -cp "$CLASSPATH" -d "$BUILD" netLogoLink/*.java
+cp netLogoLink/*.java "$BUILD/netLogoLink/"
+jar cf netlogolink.jar -C "$BUILD" netLogoLink
+echo "built $(pwd)/netlogolink.jar"
@@ -0,0 +1,121 @@
+package netLogoLink;
+
+import org.nlogo.agent.Agent;
+import org.nlogo.agent.AgentIterator;
+import org.nlogo.agent.AgentSet;
+import org.nlogo.agent.Link;
+import org.nlogo.agent.Patch;
+import org.nlogo.agent.Turtle;
+import org.nlogo.agent.World;
+import org.nlogo.api.Dump;
+import org.nlogo.core.AgentKindJ;
+
+/**
+ * The values of a number of variables for all agents in an agentset, with
+ * one typed column per variable. The columns start with the variables that
+ * identify the agents: who for turtles, pxcor and pycor for patches, and
+ * the who of end1 and end2 for links.
+ */
+public class AgentColumns {
+
+	private String kind;
+	private NLResult[] columns;
+	private boolean[] directed = new boolean[0];
+
+	AgentColumns(World world, AgentSet agents, String[] variables) throws Exception
+	{
+		String[] index;
+		if (agents.kind() == AgentKindJ.Turtle()) {
+			kind = "Turtle";
+			index = new String[] {"WHO"};
+		}
+		else if (agents.kind() == AgentKindJ.Patch()) {
+			kind = "Patch";
+			index = new String[] {"PXCOR", "PYCOR"};
+		}
+		else if (agents.kind() == AgentKindJ.Link()) {
+			kind = "Link";
+			index = new String[] {"END1", "END2"};
+		}
+		else
+			throw new IllegalArgumentException("Agents should be turtles, patches, or links");
+
+		String[] names = new String[index.length+variables.length];
+		System.arraycopy(index, 0, names, 0, index.length);
+		System.arraycopy(variables, 0, names, index.length, variables.length);
+		AgentVariables resolver = new AgentVariables(world, names);
+
+		int n = agents.count();
+		Object[][] values = new Object[names.length][n];
+		if (kind.equals("Link"))
+			directed = new boolean[n];
+		AgentIterator iterator = agents.iterator();
+		for (int i=0; iterator.hasNext(); i++) {
+			Agent agent = iterator.next();
+			int[] vns = resolver.indicesFor(agent);
+			for (int j=0; j<vns.length; j++)
+				values[j][i] = agent.getVariable(vns[j]);
+			if (agent instanceof Link)
+				directed[i] = ((Link)agent).isDirectedLink();
+		}
+
+		columns = new NLResult[names.length];
+		for (int j=0; j<names.length; j++)
+			columns[j] = toColumn(values[j]);
+	}
+
+	public String getKind() {
+		return kind;
+	}
+
+	public NLResult[] getColumns() {
+		return columns;
+	}
+
+	/* for links, whether each link is directed */
+	public boolean[] getDirected() {
+		return directed;
+	}
+
+	/* store the values in the most specific primitive array possible */
+	static NLResult toColumn(Object[] values)
+	{
+		boolean numeric = true;
+		boolean booleans = true;
+		boolean strings = true;
+		for (Object value : values) {
+			numeric &= value instanceof Double || value instanceof Integer || value instanceof Turtle;
+			booleans &= value instanceof Boolean;
+			strings &= value instanceof String;
+		}
+
+		NLResult column = new NLResult();
+		if (numeric) {
+			double[] columnValues = new double[values.length];
+			for (int i=0; i<values.length; i++) {
+				if (values[i] instanceof Turtle)
+					columnValues[i] = ((Turtle)values[i]).id();
+				else
+					columnValues[i] = ((Number)values[i]).doubleValue();
+			}
+			column.setPrimitiveResult("DoubleList", columnValues);
+		}
+		else if (booleans) {
+			boolean[] columnValues = new boolean[values.length];
+			for (int i=0; i<values.length; i++)
+				columnValues[i] = ((Boolean)values[i]).booleanValue();
+			column.setPrimitiveResult("BoolList", columnValues);
+		}
+		else {
+			String[] columnValues = new String[values.length];
+			for (int i=0; i<values.length; i++) {
+				if (strings)
+					columnValues[i] = (String)values[i];
+				else
+					columnValues[i] = Dump.logoObject(values[i], false, false);
+			}
+			column.setPrimitiveResult("StringList", columnValues);
+		}
+		return column;
+	}
+}
@@ -0,0 +1,78 @@
+package netLogoLink;
+
+import java.util.HashMap;
+
+import org.nlogo.agent.Agent;
+import org.nlogo.agent.AgentSet;
+import org.nlogo.agent.Link;
+import org.nlogo.agent.Patch;
+import org.nlogo.agent.Turtle;
+import org.nlogo.agent.World;
+
+/**
+ * Resolves the index of named agent variables. Breeds can own additional
+ * variables, so the indices are resolved and cached for each breed.
+ */
+class AgentVariables {
+
+	private final World world;
+	private final String[] names;
+	private final HashMap<AgentSet, int[]> indices = new HashMap<AgentSet, int[]>();
+
+	AgentVariables(World world, String[] names)
+	{
+		this.world = world;
+		this.names = new String[names.length];
+		for (int i=0; i<names.length; i++)
+			this.names[i] = names[i].toUpperCase();
+	}
+
+	int size() {
+		return names.length;
+	}
+
+	int[] indicesFor(Agent agent)
+	{
+		AgentSet key;
+		if (agent instanceof Turtle)
+			key = ((Turtle)agent).getBreed();
+		else if (agent instanceof Link)
+			key = ((Link)agent).getBreed();
+		else
+			key = world.patches();
+
+		int[] result = indices.get(key);
+		if (result == null) {
+			result = resolve(agent);
+			indices.put(key, result);
+		}
+		return result;
+	}
+
+	private int[] resolve(Agent agent)
+	{
+		int[] result = new int[names.length];
+		for (int i=0; i<names.length; i++) {
+			int vn;
+			if (agent instanceof Turtle) {
+				vn = world.turtlesOwnIndexOf(names[i]);
+				if (vn < 0)
+					vn = world.breedsOwnIndexOf(((Turtle)agent).getBreed(), names[i]);
+			}
+			else if (agent instanceof Link) {
+				vn = world.linksOwnIndexOf(names[i]);
+				if (vn < 0)
+					vn = world.linkBreedsOwnIndexOf(((Link)agent).getBreed(), names[i]);
+			}
+			else if (agent instanceof Patch)
+				vn = world.patchesOwnIndexOf(names[i]);
+			else
+				vn = world.observerOwnsIndexOf(names[i]);
+
+			if (vn < 0)
+				throw new IllegalArgumentException(names[i].toLowerCase()+" is not a variable of "+agent);
+			result[i] = vn;
+		}
+		return result;
+	}
+}
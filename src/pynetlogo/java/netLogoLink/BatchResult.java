@@ -0,0 +1,41 @@
+package netLogoLink;
+
+/**
+ * The outcome of a batch of commands and reporters. For each item there
+ * is either a result (null for commands), or an error message.
+ */
+public class BatchResult {
+
+	private NLResult[] results;
+	private String[] errors;
+	private int executed = 0;
+
+	BatchResult(int size)
+	{
+		results = new NLResult[size];
+		errors = new String[size];
+	}
+
+	void setResult(int index, NLResult result) {
+		results[index] = result;
+		executed = index+1;
+	}
+
+	void setError(int index, String error) {
+		errors[index] = error;
+		executed = index+1;
+	}
+
+	public NLResult[] getResults() {
+		return results;
+	}
+
+	public String[] getErrors() {
+		return errors;
+	}
+
+	/* number of items that have been executed, including failed ones */
+	public int getExecuted() {
+		return executed;
+	}
+}
@@ -0,0 +1,70 @@
+package netLogoLink;
+
+import java.util.LinkedHashMap;
+import java.util.Map;
+
+import org.nlogo.nvm.Procedure;
+
+/**
+ * Least recently used cache of compiled commands and reporters, keyed by
+ * their source text.
+ */
+class CompileCache {
+
+	private int maxSize;
+	private long hits = 0;
+	private long misses = 0;
+	private long evictions = 0;
+	private final LinkedHashMap<String, Procedure> entries;
+
+	CompileCache(int maxSize)
+	{
+		this.maxSize = maxSize;
+		this.entries = new LinkedHashMap<String, Procedure>(16, 0.75f, true) {
+			protected boolean removeEldestEntry(Map.Entry<String, Procedure> eldest) {
+				if (size() > CompileCache.this.maxSize) {
+					evictions++;
+					return true;
+				}
+				return false;
+			}
+		};
+	}
+
+	Procedure get(String key)
+	{
+		Procedure procedure = entries.get(key);
+		if (procedure == null)
+			misses++;
+		else
+			hits++;
+		return procedure;
+	}
+
+	void put(String key, Procedure procedure)
+	{
+		if (maxSize > 0)
+			entries.put(key, procedure);
+	}
+
+	void clear()
+	{
+		entries.clear();
+	}
+
+	void setMaxSize(int maxSize)
+	{
+		this.maxSize = maxSize;
+		while (entries.size() > maxSize) {
+			String eldest = entries.keySet().iterator().next();
+			entries.remove(eldest);
+			evictions++;
+		}
+	}
+
+	/* hits, misses, evictions, size, and maximum size */
+	long[] stats()
+	{
+		return new long[] {hits, misses, evictions, entries.size(), maxSize};
+	}
+}
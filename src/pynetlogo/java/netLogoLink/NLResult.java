@@ -10,10 +10,17 @@ public class NLResult {
 	private Object resultValue = null;
 	private Integer NumberNestedLists = null;
 	private String[] NestedTypes = null;
+	private int[] shape = null;
 	
 	public void setResultValue(Object o) throws Exception {
 		logoToType(o);
 	}
+
+	/* set a result that has already been converted to a java array */
+	void setPrimitiveResult(String type, Object value) {
+		this.type = type;
+		this.resultValue = value;
+	}
 	
 	public String getType() {
 		return type;
@@ -50,7 +57,29 @@ public class NLResult {
 	public String[] getResultAsStringArray() {
 		return (String[])resultValue;
 	}	
+
+	/* all strings of a string list concatenated, to be split using getStringLengths */
+	public String getResultAsJoinedString() {
+		StringBuilder builder = new StringBuilder();
+		for (String s : (String[])resultValue)
+			builder.append(s);
+		return builder.toString();
+	}
+
+	/* length of each string in a string list, in unicode code points */
+	public int[] getStringLengths() {
+		String[] strings = (String[])resultValue;
+		int[] lengths = new int[strings.length];
+		for (int i=0; i<strings.length; i++)
+			lengths[i] = strings[i].codePointCount(0, strings[i].length());
+		return lengths;
+	}
 	
+	/* rows and columns of a Matrix result */
+	public int[] getResultShape() {
+		return shape;
+	}
+
 	public Object getResultAsObject() {
 		return resultValue;
 	}
@@ -101,9 +130,25 @@ public class NLResult {
 	{
 		try
 		{
-			
+			if (logolist.isEmpty())
+			{
+				if (!recursive)
+					type = "DoubleList";
+				return new double[0];
+			}
+
     		if (logolist.get(0) instanceof LogoList)
     		{ 
+    			if (!recursive)
+    			{
+    				double[] matrix = flattenMatrix(logolist);
+    				if (matrix != null)
+    				{
+    					type = "Matrix";
+    					return matrix;
+    				}
+    			}
+
     			Object[] lilist = new Object[logolist.size()];
     			NestedTypes = new String[logolist.size()];
 				for (int i=0; i<logolist.size(); i++)
@@ -180,6 +225,41 @@ public class NLResult {
 		}
 		return null;
 	}
-	
-	
+
+	/**
+	 * Flatten a rectangular list of numeric lists into a single array in
+	 * row major order, setting the shape of the result.
+	 * @param logolist instance of LogoList with LogoLists as entries
+	 * @return the flattened values, or null if the list is not rectangular
+	 *         or contains non numeric values
+	 */
+	private double[] flattenMatrix(LogoList logolist)
+	{
+		int rows = logolist.size();
+		int columns = ((LogoList)logolist.get(0)).size();
+		if (columns == 0)
+			return null;
+
+		double[] matrix = new double[rows*columns];
+		for (int i=0; i<rows; i++)
+		{
+			Object row = logolist.get(i);
+			if (!(row instanceof LogoList) || ((LogoList)row).size() != columns)
+				return null;
+
+			LogoList values = (LogoList)row;
+			for (int j=0; j<columns; j++)
+			{
+				Object value = values.get(j);
+				if (value instanceof Double)
+					matrix[i*columns+j] = ((Double)value).doubleValue();
+				else if (value instanceof Integer)
+					matrix[i*columns+j] = ((Integer)value).intValue();
+				else
+					return null;
+			}
+		}
+		shape = new int[] {rows, columns};
+		return matrix;
+	}
 }
@@ -10,12 +10,18 @@ import org.nlogo.headless.HeadlessWorkspace;
 import org.nlogo.core.CompilerException;
 import org.nlogo.api.LogoException;
 import org.nlogo.app.App;
+import org.nlogo.core.AgentKindJ;
+import org.nlogo.core.LogoList;
+import org.nlogo.nvm.Procedure;
+import org.nlogo.nvm.SimpleJobOwner;
+import org.nlogo.workspace.AbstractWorkspace;
 import java.awt.EventQueue;
 import java.awt.Frame;
 
 import javax.swing.JOptionPane;
 
 import java.lang.Thread;
+import java.util.function.IntFunction;
 
 
 public class NetLogoLink {
@@ -23,6 +29,10 @@ public class NetLogoLink {
 	private java.io.IOException caughtEx = null;
 	private boolean isGUIworkspace;
 	private static boolean blockExit = true;
+	private SimpleJobOwner owner = null;
+	private CompileCache compileCache = new CompileCache(1000);
+	private long compileNanos = 0;
+	private long executeNanos = 0;
 
 	public NetLogoLink(Boolean isGUImode, Boolean is3d)
 	{
@@ -57,6 +67,52 @@ public class NetLogoLink {
 		}
 	}	
 	
+	public void halt()
+	{
+		/**
+		 * stop all running commands and reporters, like the halt button
+		 */
+
+		nvmWorkspace().halt();
+	}
+
+	public String exportWorldToString() throws Exception
+	{
+		/**
+		 * returns the state of the world in the format of export-world,
+		 * without writing it to disk
+		 */
+
+		java.io.StringWriter writer = new java.io.StringWriter();
+		java.io.PrintWriter printWriter = new java.io.PrintWriter(writer);
+		nvmWorkspace().exportWorld(printWriter);
+		printWriter.flush();
+		return writer.toString();
+	}
+
+	public void importWorldFromString(final String world) throws Exception
+	{
+		/**
+		 * restore the state of the world from the output of
+		 * exportWorldToString, like import-world
+		 *
+		 * @param world	the exported world
+		 *
+		 */
+
+		nvmWorkspace().importWorld(new java.io.StringReader(world));
+	}
+
+	public void copyWorldTo(final NetLogoLink other) throws Exception
+	{
+		/**
+		 * copy the state of the world to another workspace in this jvm,
+		 * which should have the same model loaded
+		 */
+
+		other.importWorldFromString(exportWorldToString());
+	}
+
 	public void killWorkspace()
 	{
 		/**
@@ -88,6 +144,8 @@ public class NetLogoLink {
 			JOptionPane.showMessageDialog(null, "Error in killing workspace:"+ex, "Error", JOptionPane.OK_CANCEL_OPTION);
 		}
 		workspace = null;
+		owner = null;
+		compileCache.clear();
 		System.gc();
 	}
 
@@ -103,6 +161,8 @@ public class NetLogoLink {
 		 * 
 		 */
 			caughtEx = null;
+			owner = null;
+			compileCache.clear();
 			if ( isGUIworkspace ) {
 				try {
 					EventQueue.invokeAndWait ( 
@@ -154,7 +214,13 @@ public class NetLogoLink {
 		 * 
 		 */
 		
-		workspace.command(s);
+		if (isGUIworkspace) {
+			long start = System.nanoTime();
+			workspace.command(s);
+			executeNanos += System.nanoTime() - start;
+		}
+		else
+			runCommands(compileCommands(s));
 	}
 
 	/* returns the value of a reporter.  if it is a LogoList, it will be
@@ -171,15 +237,185 @@ public class NetLogoLink {
 		 * 
 		 */		
 		
+		return report(s, true);
+	}
+
+	/* returns the value of a reporter that is used once, without adding
+	it to the compile cache */
+	public Object reportUncached(String s)
+		throws Exception, LogoException, CompilerException
+	{
+		return report(s, false);
+	}
+
+	private Object report(String s, boolean cache)
+		throws Exception, LogoException, CompilerException
+	{
 		NLResult result = new NLResult();
-		result.setResultValue(workspace.report(s));
+		if (isGUIworkspace) {
+			long start = System.nanoTime();
+			Object value = workspace.report(s);
+			executeNanos += System.nanoTime() - start;
+			result.setResultValue(value);
+		}
+		else if (cache)
+			result.setResultValue(runReporter(compileReporter(s)));
+		else {
+			long start = System.nanoTime();
+			Procedure procedure = nvmWorkspace().compileReporter(s);
+			compileNanos += System.nanoTime() - start;
+			result.setResultValue(runReporter(procedure));
+		}
 		return result;
 	}
 
+	public String[] getGlobalNames()
+	{
+		/**
+		 * returns the names of all observer variables, including those
+		 * defined by interface widgets
+		 */
+
+		org.nlogo.agent.World w = world();
+		String[] names = new String[w.getVariablesArraySize(w.observer())];
+		for (int i=0; i<names.length; i++)
+			names[i] = w.observerOwnsNameAt(i);
+		return names;
+	}
+
+	public String[] getGlobalKinds()
+	{
+		/**
+		 * returns for each observer variable whether it is defined by a
+		 * slider, switch, chooser, or input box, or is a plain global
+		 */
+
+		org.nlogo.agent.Observer observer = world().observer();
+		String[] kinds = new String[getGlobalNames().length];
+		for (int i=0; i<kinds.length; i++) {
+			Object constraint = observer.variableConstraint(i);
+			String name = constraint == null ? "" : constraint.getClass().getSimpleName();
+			if (name.contains("Slider"))
+				kinds[i] = "slider";
+			else if (name.contains("Boolean"))
+				kinds[i] = "switch";
+			else if (name.contains("Chooser"))
+				kinds[i] = "chooser";
+			else if (name.contains("Input") || name.contains("String") || name.contains("Numeric"))
+				kinds[i] = "input";
+			else
+				kinds[i] = "global";
+		}
+		return kinds;
+	}
+
+	public void setGlobals(final String[] names, final Object[] values) throws Exception
+	{
+		/**
+		 * set observer variables directly, without compiling set commands
+		 *
+		 * @param names		names of observer variables
+		 * @param values	numbers (as Double), booleans, or strings
+		 *
+		 */
+
+		org.nlogo.agent.World w = world();
+		for (int i=0; i<names.length; i++)
+			w.setObserverVariableByName(names[i].toUpperCase(), values[i]);
+	}
+
+	public NLResult[] getGlobals(final String[] names) throws Exception
+	{
+		/**
+		 * returns the values of observer variables
+		 *
+		 * @param names		names of observer variables
+		 *
+		 */
+
+		org.nlogo.agent.World w = world();
+		NLResult[] results = new NLResult[names.length];
+		for (int i=0; i<names.length; i++) {
+			Object value = w.getObserverVariableByName(names[i].toUpperCase());
+			results[i] = new NLResult();
+			try {
+				results[i].setResultValue(value);
+			}
+			catch (Exception ex) {
+				// e.g., agents or nobody
+				results[i].setResultValue(org.nlogo.api.Dump.logoObject(value, false, false));
+			}
+		}
+		return results;
+	}
+
+	public BatchResult runBatch(final String[] sources, final boolean[] isReporter, Boolean stopOnError)
+	{
+		/**
+		 * execute a number of commands and reporters in order, in a single
+		 * call. Errors are collected per item instead of thrown.
+		 *
+		 * @param sources		valid netlogo commands and reporters
+		 * @param isReporter	whether each source is a reporter
+		 * @param stopOnError	whether to skip the remaining items after an error
+		 *
+		 */
+
+		BatchResult batch = new BatchResult(sources.length);
+		for (int i=0; i<sources.length; i++) {
+			try {
+				if (isReporter[i]) {
+					batch.setResult(i, report(sources[i]));
+				}
+				else {
+					command(sources[i]);
+					batch.setResult(i, null);
+				}
+			}
+			catch (Exception ex) {
+				batch.setError(i, ex.toString());
+				if (stopOnError.booleanValue())
+					break;
+			}
+		}
+		return batch;
+	}
+
+	public long[] getCacheStats()
+	{
+		/**
+		 * returns the hits, misses, evictions, size, and maximum size of
+		 * the cache of compiled commands and reporters
+		 */
+
+		return compileCache.stats();
+	}
+
+	public long[] getTimings()
+	{
+		/**
+		 * returns the nanoseconds spent compiling and executing commands
+		 * and reporters since the link was created
+		 */
+
+		return new long[] {compileNanos, executeNanos};
+	}
+
+	public void setCacheSize(Integer maxSize)
+	{
+		compileCache.setMaxSize(maxSize.intValue());
+	}
+
+	public void clearCache()
+	{
+		compileCache.clear();
+	}
+
     public void sourceFromString(final String source, final Boolean addProcedure)
 	throws java.io.IOException, LogoException, CompilerException, InterruptedException
 	{
 		caughtEx = null;
+		compileCache.clear();
 		if ( isGUIworkspace ) {
 			try {
 				EventQueue.invokeAndWait (
@@ -238,31 +474,419 @@ public class NetLogoLink {
 		}
 	}
 
-	@SuppressWarnings("unused")
-	public Object[] doReportWhile(final String s, final String var, final String condition, Integer maxMinutes)
+	public TickSeries repeatReport(final String go, final String[] reporters, Integer reps, Boolean includeT0)
 		throws LogoException, CompilerException, Exception
 	{
-		java.util.ArrayList<Object> varList = new java.util.ArrayList<Object>();
-		if (maxMinutes > 0) {
-			long startTime = System.currentTimeMillis();
-			for(int i=0; ((Boolean)workspace.report(condition)).booleanValue(); i++) {
-				workspace.command(s);
-				varList.add(report(var));
-				// max. time exceeded
-				if ((System.currentTimeMillis() - startTime) / 60000 >= maxMinutes) {
-					//break;
-					throw new RuntimeException("Maximum time for NLDoReportWhile reached. Process stopped.");
-				}
+		/**
+		 * run the go command for a number of ticks and collect the values
+		 * of the reporters after every tick. The command and reporters are
+		 * compiled only once.
+		 *
+		 * @param go		the netlogo command used to advance the model
+		 * @param reporters	valid netlogo reporters
+		 * @param reps		the number of times to run go
+		 * @param includeT0	whether to also collect the values before the first go
+		 *
+		 */
+
+		return record(go, reporters, reps.intValue(), includeT0.booleanValue(), null, 1, 0);
+	}
+
+	public TickSeries repeatReportWhile(final String go, final String[] reporters, Integer maxTicks,
+			final String condition)
+		throws LogoException, CompilerException, Exception
+	{
+		/**
+		 * run the go command while a condition is true, for at most a
+		 * number of ticks, and collect the values of the reporters after
+		 * every tick.
+		 *
+		 * @param go		the netlogo command used to advance the model
+		 * @param reporters	valid netlogo reporters
+		 * @param maxTicks	the maximum number of times to run go
+		 * @param condition	valid boolean netlogo reporter, checked before
+		 * 					every go
+		 *
+		 */
+
+		return record(go, reporters, maxTicks.intValue(), false, condition, 1, 0);
+	}
+
+	public TickSeries reportWhile(final String go, final String[] reporters, final String condition,
+			Integer maxTicks, Integer every, Double maxSeconds, Boolean includeT0)
+		throws LogoException, CompilerException, Exception
+	{
+		/**
+		 * run the go command while a condition is true and collect the
+		 * values of the reporters every so many ticks. Stops early once the
+		 * maximum number of ticks or the time limit is reached, see
+		 * TickSeries.getStopReason.
+		 *
+		 * @param go		the netlogo command used to advance the model
+		 * @param reporters	valid netlogo reporters
+		 * @param condition	valid boolean netlogo reporter, checked before
+		 * 					every go
+		 * @param maxTicks	the maximum number of times to run go
+		 * @param every		collect the reporters after every so many go's
+		 * @param maxSeconds	wall clock time limit in seconds, 0 for none
+		 * @param includeT0	whether to also collect the values before the first go
+		 *
+		 */
+
+		long maxNanos = (long)(maxSeconds.doubleValue() * 1e9);
+		return record(go, reporters, maxTicks.intValue(), includeT0.booleanValue(), condition,
+				Math.max(every.intValue(), 1), maxNanos);
+	}
+
+	private TickSeries record(String go, String[] reporters, int reps, boolean includeT0, String condition,
+			int every, long maxNanos)
+		throws LogoException, CompilerException, Exception
+	{
+		long start = System.nanoTime();
+		Procedure goProcedure = compileCommands(go);
+		Procedure conditionProcedure = condition == null ? null : compileReporter(condition);
+		Procedure[] reporterProcedures = new Procedure[reporters.length];
+		for (int i=0; i<reporters.length; i++)
+			reporterProcedures[i] = compileReporter(reporters[i]);
+
+		// the number of ticks may be practically unbounded when running while a condition holds
+		int capacity = (int)Math.min((long)reps / every + 1, 1 << 16);
+		TickSeries series = new TickSeries(reporters.length, capacity);
+		if (includeT0)
+			recordTick(series, reporterProcedures);
+		series.setStopReason("ticks");
+		for (int i=0; i<reps; i++) {
+			if (conditionProcedure != null && !((Boolean)runReporter(conditionProcedure)).booleanValue()) {
+				series.setStopReason("condition");
+				break;
+			}
+			runCommands(goProcedure);
+			if ((i+1) % every == 0)
+				recordTick(series, reporterProcedures);
+			if (maxNanos > 0 && System.nanoTime() - start >= maxNanos) {
+				series.setStopReason("time");
+				break;
 			}
 		}
-		else {
-			for(int i=0; ((Boolean)workspace.report(condition)).booleanValue(); i++) {
-				workspace.command(s);
-				varList.add(report(var));
+		return series;
+	}
+
+	public int[] getWorldExtents()
+	{
+		/**
+		 * returns the extents of the world as min-pxcor, max-pxcor,
+		 * min-pycor, and max-pycor
+		 */
+
+		org.nlogo.agent.World w = world();
+		return new int[] {w.minPxcor(), w.maxPxcor(), w.minPycor(), w.maxPycor()};
+	}
+
+	public double[] reportPatches(final String[] attributes)
+		throws LogoException, CompilerException, Exception
+	{
+		/**
+		 * returns the values of a number of patch attributes for all patches
+		 * as a single array. Patches are ordered like `sort patches`, so row
+		 * by row from the top left patch, which is the order in which NetLogo
+		 * stores them. Patch variables are read directly, other reporters are
+		 * evaluated for every patch. Booleans are returned as 0 or 1, other
+		 * non numeric values as NaN.
+		 *
+		 * @param attributes	valid netlogo patch variables or reporters
+		 *
+		 */
+
+		int nPatches = world().patches().count();
+		double[] values = new double[attributes.length*nPatches];
+		readPatches(attributes, patchReporters(attributes), values, 0);
+		return values;
+	}
+
+	public double[] recordPatches(final String go, final String[] attributes, Integer nSamples,
+			Integer every)
+		throws LogoException, CompilerException, Exception
+	{
+		/**
+		 * run the go command and collect a number of patch attributes for
+		 * all patches every so many go's, see reportPatches. The samples are
+		 * buffered and returned as a single array.
+		 *
+		 * @param go			the netlogo command used to advance the model
+		 * @param attributes	valid netlogo patch variables or reporters
+		 * @param nSamples		the number of samples to collect
+		 * @param every			the number of go's per sample
+		 *
+		 */
+
+		Procedure goProcedure = compileCommands(go);
+		Procedure[] reporters = patchReporters(attributes);
+		int nPatches = world().patches().count();
+		int size = attributes.length*nPatches;
+		double[] values = new double[nSamples.intValue()*size];
+
+		for (int sample=0; sample<nSamples.intValue(); sample++) {
+			for (int i=0; i<every.intValue(); i++)
+				runCommands(goProcedure);
+			if (world().patches().count() != nPatches)
+				throw new Exception("the world was resized while recording patches");
+			readPatches(attributes, reporters, values, sample*size);
+		}
+		return values;
+	}
+
+	/* compiled reporters for attributes that are not patch variables, null for patch variables */
+	private Procedure[] patchReporters(String[] attributes) throws CompilerException
+	{
+		org.nlogo.agent.World w = world();
+		Procedure[] reporters = new Procedure[attributes.length];
+		for (int i=0; i<attributes.length; i++) {
+			if (w.patchesOwnIndexOf(attributes[i].toUpperCase()) < 0)
+				reporters[i] = compileReporter("map [p -> [" + attributes[i] + "] of p] sort patches");
+		}
+		return reporters;
+	}
+
+	private void readPatches(String[] attributes, Procedure[] reporters, double[] values, int offset)
+		throws LogoException
+	{
+		org.nlogo.agent.World w = world();
+		int nPatches = w.patches().count();
+
+		for (int i=0; i<attributes.length; i++) {
+			int start = offset + i*nPatches;
+			if (reporters[i] == null) {
+				int vn = w.patchesOwnIndexOf(attributes[i].toUpperCase());
+				for (int j=0; j<nPatches; j++)
+					values[start+j] = toDouble(w.getPatch(j).getVariable(vn));
+			}
+			else {
+				LogoList list = (LogoList)runReporter(reporters[i]);
+				for (int j=0; j<nPatches; j++)
+					values[start+j] = toDouble(list.get(j));
+			}
+		}
+	}
+
+	public void setPatchesDouble(final String attribute, final double[] values)
+		throws Exception
+	{
+		/**
+		 * set a patch variable for all patches, with values in the order
+		 * of `sort patches`
+		 *
+		 * @param attribute	a patch variable
+		 * @param values	one value for each patch
+		 *
+		 */
+
+		setPatchValues(attribute, values.length, i -> Double.valueOf(values[i]));
+	}
+
+	public void setPatchesBoolean(final String attribute, final boolean[] values)
+		throws Exception
+	{
+		setPatchValues(attribute, values.length, i -> Boolean.valueOf(values[i]));
+	}
+
+	public void setPatchesString(final String attribute, final String[] values)
+		throws Exception
+	{
+		setPatchValues(attribute, values.length, i -> values[i]);
+	}
+
+	private void setPatchValues(String attribute, int size, IntFunction<Object> values)
+		throws Exception
+	{
+		org.nlogo.agent.World w = world();
+		int nPatches = w.patches().count();
+		if (size != nPatches)
+			throw new IllegalArgumentException("Expected "+nPatches+" values, got "+size);
+
+		int vn = w.patchesOwnIndexOf(attribute.toUpperCase());
+		if (vn < 0)
+			throw new IllegalArgumentException(attribute+" is not a patch variable");
+
+		for (int j=0; j<nPatches; j++)
+			w.getPatch(j).setVariable(vn, values.apply(j));
+	}
+
+	public void setTurtleVariables(final String agentName, final long[] who,
+			final String[] doubleVariables, final double[] doubleValues,
+			final String[] booleanVariables, final boolean[] booleanValues,
+			final String[] stringVariables, final String[] stringValues)
+		throws Exception
+	{
+		/**
+		 * set the variables of a number of turtles. The values of each type
+		 * are passed variable by variable, so the value of variable j for
+		 * turtle i is found at j*who.length+i.
+		 *
+		 * @param agentName	singular name of the breed, or turtle
+		 * @param who		the who numbers of the turtles to update
+		 *
+		 */
+
+		org.nlogo.agent.World w = world();
+		org.nlogo.agent.AgentSet breed = breedOfSingular(agentName);
+		AgentVariables doubles = new AgentVariables(w, doubleVariables);
+		AgentVariables booleans = new AgentVariables(w, booleanVariables);
+		AgentVariables strings = new AgentVariables(w, stringVariables);
+		int n = who.length;
+
+		for (int i=0; i<n; i++) {
+			org.nlogo.agent.Turtle turtle = w.getTurtle(who[i]);
+			if (turtle == null || (breed != null && turtle.getBreed() != breed))
+				throw new IllegalArgumentException(agentName+" "+who[i]+" does not exist");
+
+			int[] vns = doubles.indicesFor(turtle);
+			for (int j=0; j<vns.length; j++)
+				turtle.setVariable(vns[j], Double.valueOf(doubleValues[j*n+i]));
+			vns = booleans.indicesFor(turtle);
+			for (int j=0; j<vns.length; j++)
+				turtle.setVariable(vns[j], Boolean.valueOf(booleanValues[j*n+i]));
+			vns = strings.indicesFor(turtle);
+			for (int j=0; j<vns.length; j++)
+				turtle.setVariable(vns[j], stringValues[j*n+i]);
+		}
+	}
+
+	public AgentColumns agentsReport(final String agentset, final String[] variables)
+		throws LogoException, CompilerException, Exception
+	{
+		/**
+		 * returns the values of a number of variables for all agents in an
+		 * agentset, in a single pass over the agents
+		 *
+		 * @param agentset	a netlogo reporter for an agentset, e.g. turtles,
+		 * 					a breed, links, or patches
+		 * @param variables	names of agent variables
+		 *
+		 */
+
+		Object agents = runReporter(compileReporter(agentset));
+		if (!(agents instanceof org.nlogo.agent.AgentSet))
+			throw new IllegalArgumentException(agentset+" is not an agentset");
+		return new AgentColumns(world(), (org.nlogo.agent.AgentSet)agents, variables);
+	}
+
+	/* returns the breed with the given singular name, or null for turtle */
+	private org.nlogo.agent.AgentSet breedOfSingular(String singular)
+	{
+		if (singular.equalsIgnoreCase("turtle"))
+			return null;
+
+		org.nlogo.agent.World w = world();
+		for (Object entry : w.getBreeds().values()) {
+			org.nlogo.agent.AgentSet breed = (org.nlogo.agent.AgentSet)entry;
+			if (w.getBreedSingular(breed).equalsIgnoreCase(singular))
+				return breed;
+		}
+		throw new IllegalArgumentException("Unknown breed: "+singular);
+	}
+
+	private static double toDouble(Object value)
+	{
+		if (value instanceof Double)
+			return ((Double)value).doubleValue();
+		if (value instanceof Integer)
+			return ((Integer)value).intValue();
+		if (value instanceof Boolean)
+			return ((Boolean)value).booleanValue() ? 1.0 : 0.0;
+		return Double.NaN;
+	}
+
+	private void recordTick(TickSeries series, Procedure[] reporters)
+		throws LogoException, Exception
+	{
+		Object[] values = new Object[reporters.length];
+		for (int i=0; i<reporters.length; i++)
+			values[i] = runReporter(reporters[i]);
+		series.add(world().ticks(), values);
+	}
+
+	private AbstractWorkspace nvmWorkspace()
+	{
+		if (isGUIworkspace)
+			return App.app().workspace();
+		return (HeadlessWorkspace)workspace;
+	}
+
+	private org.nlogo.agent.World world()
+	{
+		return nvmWorkspace().world();
+	}
+
+	private SimpleJobOwner jobOwner()
+	{
+		if (owner == null)
+			owner = new SimpleJobOwner("pyNetLogo", world().mainRNG(), AgentKindJ.Observer());
+		return owner;
+	}
+
+	private Procedure compileCommands(String source) throws CompilerException
+	{
+		String key = "C " + source;
+		long start = System.nanoTime();
+		Procedure procedure = compileCache.get(key);
+		if (procedure == null) {
+			procedure = nvmWorkspace().compileCommands(source);
+			compileCache.put(key, procedure);
+		}
+		compileNanos += System.nanoTime() - start;
+		return procedure;
+	}
+
+	private Procedure compileReporter(String source) throws CompilerException
+	{
+		String key = "R " + source;
+		long start = System.nanoTime();
+		Procedure procedure = compileCache.get(key);
+		if (procedure == null) {
+			procedure = nvmWorkspace().compileReporter(source);
+			compileCache.put(key, procedure);
+		}
+		compileNanos += System.nanoTime() - start;
+		return procedure;
+	}
+
+	private void runCommands(Procedure procedure) throws LogoException
+	{
+		long start = System.nanoTime();
+		try {
+			nvmWorkspace().runCompiledCommands(jobOwner(), procedure);
+		}
+		finally {
+			executeNanos += System.nanoTime() - start;
+		}
+		rethrowLogoException();
+	}
+
+	private Object runReporter(Procedure procedure) throws LogoException
+	{
+		long start = System.nanoTime();
+		Object result;
+		try {
+			result = nvmWorkspace().runCompiledReporter(jobOwner(), procedure);
+		}
+		finally {
+			executeNanos += System.nanoTime() - start;
+		}
+		rethrowLogoException();
+		return result;
+	}
+
+	/* runtime errors in compiled code are stored on the workspace instead of thrown */
+	private void rethrowLogoException() throws LogoException
+	{
+		if (!isGUIworkspace) {
+			HeadlessWorkspace ws = (HeadlessWorkspace)workspace;
+			LogoException ex = ws.lastLogoException();
+			if (ex != null) {
+				ws.clearLastLogoException();
+				throw ex;
 			}
 		}
-		Object[] objArray = varList.toArray();
-		return objArray;
 	}
 
 	/*
@@ -0,0 +1,172 @@
+package netLogoLink;
+
+/**
+ * Accumulates the values of a set of reporters over a number of ticks.
+ *
+ * Scalar numbers, booleans and strings are collected in primitive arrays,
+ * so they can be handed back to python in one go. Any other value (e.g.,
+ * lists) is kept as an object and converted afterwards through NLResult.
+ */
+public class TickSeries {
+
+	private double[] ticks;
+	private Series[] series;
+	private int size = 0;
+	private String stopReason = null;
+
+	public TickSeries(int nReporters, int capacity)
+	{
+		ticks = new double[Math.max(capacity, 1)];
+		series = new Series[nReporters];
+		for (int i=0; i<nReporters; i++)
+			series[i] = new Series(ticks.length);
+	}
+
+	public void add(double tick, Object[] values) throws Exception
+	{
+		if (size == ticks.length)
+			ticks = java.util.Arrays.copyOf(ticks, 2*ticks.length);
+		ticks[size] = tick;
+		for (int i=0; i<series.length; i++)
+			series[i].add(size, values[i]);
+		size++;
+	}
+
+	public int size() {
+		return size;
+	}
+
+	/* why recording stopped: "ticks", "condition", or "time" */
+	public String getStopReason() {
+		return stopReason;
+	}
+
+	public void setStopReason(String reason) {
+		stopReason = reason;
+	}
+
+	public double[] getTicks() {
+		return java.util.Arrays.copyOf(ticks, size);
+	}
+
+	public NLResult[] getResults() throws Exception {
+		NLResult[] results = new NLResult[series.length];
+		for (int i=0; i<series.length; i++)
+			results[i] = series[i].toResult(size);
+		return results;
+	}
+
+
+	private static class Series {
+		private String kind = null;
+		private double[] doubles = null;
+		private boolean[] booleans = null;
+		private String[] strings = null;
+		private Object[] objects = null;
+		private int capacity;
+
+		Series(int capacity)
+		{
+			this.capacity = capacity;
+		}
+
+		void add(int index, Object value)
+		{
+			if (index == 0)
+				allocate(kindOf(value));
+			else if (!"Object".equals(kind) && !kindOf(value).equals(kind))
+				toObjects(index);
+
+			if (index == capacity)
+				grow();
+
+			if ("Double".equals(kind))
+				doubles[index] = ((Number)value).doubleValue();
+			else if ("Boolean".equals(kind))
+				booleans[index] = ((Boolean)value).booleanValue();
+			else if ("String".equals(kind))
+				strings[index] = (String)value;
+			else
+				objects[index] = value;
+		}
+
+		NLResult toResult(int size) throws Exception
+		{
+			NLResult result = new NLResult();
+			if (size == 0)
+				result.setPrimitiveResult("DoubleList", new double[0]);
+			else if ("Double".equals(kind))
+				result.setPrimitiveResult("DoubleList", java.util.Arrays.copyOf(doubles, size));
+			else if ("Boolean".equals(kind))
+				result.setPrimitiveResult("BoolList", java.util.Arrays.copyOf(booleans, size));
+			else if ("String".equals(kind))
+				result.setPrimitiveResult("StringList", java.util.Arrays.copyOf(strings, size));
+			else {
+				Object[] nested = new Object[size];
+				for (int i=0; i<size; i++) {
+					NLResult entry = new NLResult();
+					entry.setResultValue(objects[i]);
+					nested[i] = entry;
+				}
+				result.setPrimitiveResult("NestedList", nested);
+			}
+			return result;
+		}
+
+		private static String kindOf(Object value)
+		{
+			if (value instanceof Double || value instanceof Integer)
+				return "Double";
+			if (value instanceof Boolean)
+				return "Boolean";
+			if (value instanceof String)
+				return "String";
+			return "Object";
+		}
+
+		private void allocate(String newKind)
+		{
+			kind = newKind;
+			if ("Double".equals(kind))
+				doubles = new double[capacity];
+			else if ("Boolean".equals(kind))
+				booleans = new boolean[capacity];
+			else if ("String".equals(kind))
+				strings = new String[capacity];
+			else
+				objects = new Object[capacity];
+		}
+
+		private void grow()
+		{
+			capacity = 2*capacity;
+			if (doubles != null)
+				doubles = java.util.Arrays.copyOf(doubles, capacity);
+			if (booleans != null)
+				booleans = java.util.Arrays.copyOf(booleans, capacity);
+			if (strings != null)
+				strings = java.util.Arrays.copyOf(strings, capacity);
+			if (objects != null)
+				objects = java.util.Arrays.copyOf(objects, capacity);
+		}
+
+		/* fall back to storing boxed values once the type of the reporter changes */
+		private void toObjects(int size)
+		{
+			Object[] boxed = new Object[capacity];
+			for (int i=0; i<size; i++) {
+				if ("Double".equals(kind))
+					boxed[i] = Double.valueOf(doubles[i]);
+				else if ("Boolean".equals(kind))
+					boxed[i] = Boolean.valueOf(booleans[i]);
+				else
+					boxed[i] = strings[i];
+			}
+			doubles = null;
+			booleans = null;
+			strings = null;
+			objects = boxed;
+			kind = "Object";
+		}
+	}
+}
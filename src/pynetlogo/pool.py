@@ -0,0 +1,217 @@
+"""Pool of NetLogo workspaces sharing a single JVM."""
+
+import functools
+import os
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from .core import NetLogoLink
+
+__all__ = ["WorkspacePool"]
+
+
+class WorkspacePool:
+    """A pool of headless NetLogo workspaces inside a single JVM.
+
+    Each workspace is a separate :class:`NetLogoLink` with its own headless
+    workspace and its own copy of the model. Because JPype releases the GIL
+    while a call is running in Java, Python threads can drive the workspaces
+    concurrently. Compared to a `multiprocessing.Pool` with one
+    `NetLogoLink` per process, this avoids starting a JVM and loading the
+    NetLogo classpath for every worker.
+
+    Parameters
+    ----------
+    model_file : str
+        Path to the NetLogo model to load in every workspace
+    n_workspaces : int, optional
+        Number of workspaces, defaults to the number of cpu cores
+    thd : bool, optional
+        If true, use NetLogo 3D
+    netlogo_home : str, optional
+        Path to the NetLogo installation directory, found automatically if not given
+    jvm_path : str, optional
+        path of the jvm
+    jvm_args : list of str, optional
+              additional arguments that should be used when starting
+              the jvm
+
+    Examples
+    --------
+    >>> with WorkspacePool(modelfile, n_workspaces=8) as pool:
+    ...     pool.broadcast("setup")
+    ...     counts = pool.gather("count sheep")
+
+    """
+
+    def __init__(
+        self,
+        model_file: str,
+        n_workspaces: int | None = None,
+        thd: bool = False,
+        netlogo_home: str | None = None,
+        jvm_path: str | None = None,
+        jvm_args: list[str] | None = None,
+    ):
+        if n_workspaces is None:
+            n_workspaces = os.cpu_count() or 1
+        if n_workspaces < 1:
+            raise ValueError("n_workspaces should be at least 1")
+
+        self.model_file = model_file
+        self.links = []
+        self._locks = []
+        self._idle = queue.Queue()
+
+        for _ in range(n_workspaces):
+            link = NetLogoLink(
+                gui=False,
+                thd=thd,
+                netlogo_home=netlogo_home,
+                jvm_path=jvm_path,
+                jvm_args=jvm_args,
+            )
+            link.load_model(model_file)
+            self.links.append(link)
+            self._locks.append(threading.Lock())
+            self._idle.put(len(self.links) - 1)
+
+        self._executor = ThreadPoolExecutor(
+            max_workers=n_workspaces, thread_name_prefix="pynetlogo-workspace"
+        )
+
+    def __len__(self):
+        return len(self.links)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def _run_on(self, index: int, func, *args, **kwargs):
+        with self._locks[index]:
+            return func(self.links[index], *args, **kwargs)
+
+    def _run_on_idle(self, func, *args, **kwargs):
+        index = self._idle.get()
+        try:
+            return self._run_on(index, func, *args, **kwargs)
+        finally:
+            self._idle.put(index)
+
+    def submit(self, func, *args, **kwargs):
+        """Run func on the first idle workspace.
+
+        Parameters
+        ----------
+        func : callable
+               called as ``func(link, *args, **kwargs)`` with the
+               NetLogoLink of the workspace
+
+        Returns
+        -------
+        concurrent.futures.Future
+
+        """
+        return self._executor.submit(self._run_on_idle, func, *args, **kwargs)
+
+    def map(self, func, iterable):
+        """Apply func to every item in iterable, spreading the calls over the workspaces.
+
+        Parameters
+        ----------
+        func : callable
+               called as ``func(link, item)`` with the NetLogoLink of an
+               idle workspace
+        iterable : iterable
+
+        Returns
+        -------
+        iterator
+            results in the same order as iterable
+
+        """
+        return self._executor.map(functools.partial(self._run_on_idle, func), iterable)
+
+    def apply_all(self, func, *args, **kwargs):
+        """Run func once on every workspace and gather the results.
+
+        Parameters
+        ----------
+        func : callable
+               called as ``func(link, *args, **kwargs)`` with the
+               NetLogoLink of each workspace
+
+        Returns
+        -------
+        list
+            one result per workspace, in workspace order
+
+        """
+        futures = [
+            self._executor.submit(self._run_on, i, func, *args, **kwargs)
+            for i in range(len(self.links))
+        ]
+        return [future.result() for future in futures]
+
+    def broadcast(self, netlogo_command: str):
+        """Execute the supplied command in every workspace.
+
+        Parameters
+        ----------
+        netlogo_command : str
+            Valid NetLogo command
+
+        Raises
+        ------
+        NetLogoException
+            If a LogoException or CompilerException is raised by NetLogo
+
+        """
+        self.apply_all(lambda link: link.command(netlogo_command))
+
+    def gather(self, netlogo_reporter: str):
+        """Return the value of a NetLogo reporter from every workspace.
+
+        Parameters
+        ----------
+        netlogo_reporter : str
+            Valid NetLogo reporter
+
+        Returns
+        -------
+        list
+            one result per workspace, in workspace order
+
+        Raises
+        ------
+        NetLogoException
+            If a LogoException or CompilerException is raised by NetLogo
+
+        """
+        return self.apply_all(lambda link: link.report(netlogo_reporter))
+
+    def restore(self, state: bytes):
+        """Restore the state of the world in every workspace.
+
+        Parameters
+        ----------
+        state : bytes
+            as returned by :meth:`NetLogoLink.snapshot`
+
+        Raises
+        ------
+        NetLogoException
+            If a LogoException is raised by NetLogo
+
+        """
+        self.apply_all(lambda link: link.restore(state))
+
+    def close(self):
+        """Wait for running calls and dispose of all workspaces."""
+        self._executor.shutdown(wait=True)
+        for link in self.links:
+            link.kill_workspace()
+        self.links = []
@@ -0,0 +1,681 @@
+"""Serving NetLogo workspaces over a socket, for running experiments on several machines.
+
+Messages are framed as a 4 byte big-endian header length, a JSON header, and
+the raw bytes of any numpy arrays in the message, so arrays are sent without
+conversion and nothing is unpickled.
+
+A client can run any NetLogo command, and NetLogo's file-* and export-*
+primitives read and write files with the rights of the server process.
+Servers therefore listen on localhost by default, and should only be exposed
+to other machines with a shared secret (authkey), on a trusted network.
+
+"""
+
+import argparse
+import functools
+import hashlib
+import hmac
+import json
+import os
+import queue
+import socket
+import socketserver
+import struct
+import threading
+import warnings
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from .core import NetLogoException, NetLogoLink, adjacency_matrix
+from .experiments import results_frame, run_experiment
+
+__all__ = ["NetLogoServer", "RemoteNetLogoLink", "run_remote_experiments"]
+
+# the NetLogoLink methods that can be called remotely
+REMOTE_METHODS = (
+    "load_model",
+    "command",
+    "report",
+    "report_while",
+    "repeat_command",
+    "repeat_report",
+    "patch_report",
+    "patch_report_many",
+    "record_patches",
+    "patch_set",
+    "write_NetLogo_attriblist",
+    "agents_report",
+    "network_report",
+    "set_globals",
+    "get_globals",
+    "snapshot",
+    "restore",
+    "cache_stats",
+    "set_cache_size",
+)
+
+HEADER_LENGTH = struct.Struct("!I")
+
+# limits on the size of a received message, so a peer can not force huge allocations
+MAX_HEADER_LENGTH = 2**26
+MAX_MESSAGE_SIZE = 2**30
+
+# limit on the size of the messages of the handshake, before a client is authenticated
+MAX_HANDSHAKE_SIZE = 2**12
+
+# environment variable with the default shared secret of servers and clients
+AUTHKEY_VARIABLE = "PYNETLOGO_AUTHKEY"
+
+LOCALHOST = ("127.0.0.1", "::1", "localhost")
+
+
+def encode(value, buffers: list):
+    """Encode a value as JSON compatible data, moving arrays to buffers."""
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, np.ndarray):
+        if value.dtype.hasobject:
+            return {"__objects__": encode(value.tolist(), buffers)}
+        buffers.append(np.ascontiguousarray(value))
+        return {"__ndarray__": len(buffers) - 1, "dtype": value.dtype.str, "shape": value.shape}
+    if isinstance(value, (bytes, bytearray)):
+        buffers.append(np.frombuffer(value, dtype=np.uint8))
+        return {"__bytes__": len(buffers) - 1}
+    if isinstance(value, pd.DataFrame):
+        return {
+            "__dataframe__": [
+                encode(value.iloc[:, i].to_numpy(), buffers) for i in range(value.shape[1])
+            ],
+            "columns": encode_index(value.columns, buffers),
+            "index": encode_index(value.index, buffers),
+        }
+    if isinstance(value, pd.Series):
+        return {
+            "__series__": encode(value.to_numpy(), buffers),
+            "name": encode(value.name, buffers),
+            "index": encode_index(value.index, buffers),
+        }
+    if isinstance(value, dict):
+        return {"__dict__": [[encode(k, buffers), encode(v, buffers)] for k, v in value.items()]}
+    if isinstance(value, tuple):
+        return {"__tuple__": [encode(entry, buffers) for entry in value]}
+    if isinstance(value, list):
+        return [encode(entry, buffers) for entry in value]
+    raise TypeError("cannot send values of type {}".format(type(value).__name__))
+
+
+def encode_index(index: pd.Index, buffers: list):
+    if isinstance(index, pd.MultiIndex):
+        levels = [
+            encode(index.get_level_values(i).to_numpy(), buffers) for i in range(index.nlevels)
+        ]
+        return {"__multiindex__": levels, "names": list(index.names)}
+    return {"__index__": encode(index.to_numpy(), buffers), "name": index.name}
+
+
+def decode(value, buffers: list):
+    """Decode a value encoded by :func:`encode`."""
+    if isinstance(value, list):
+        return [decode(entry, buffers) for entry in value]
+    if not isinstance(value, dict):
+        return value
+    if "__ndarray__" in value:
+        return buffers[value["__ndarray__"]]
+    if "__objects__" in value:
+        objects = decode(value["__objects__"], buffers)
+        array = np.empty(len(objects), dtype=object)
+        array[:] = objects
+        return array
+    if "__bytes__" in value:
+        return buffers[value["__bytes__"]].tobytes()
+    if "__dataframe__" in value:
+        columns = decode_index(value["columns"], buffers)
+        data = [decode(column, buffers) for column in value["__dataframe__"]]
+        frame = pd.DataFrame(dict(enumerate(data)), index=decode_index(value["index"], buffers))
+        frame.columns = columns
+        return frame
+    if "__series__" in value:
+        return pd.Series(
+            decode(value["__series__"], buffers),
+            index=decode_index(value["index"], buffers),
+            name=decode(value["name"], buffers),
+        )
+    if "__dict__" in value:
+        return {decode(k, buffers): decode(v, buffers) for k, v in value["__dict__"]}
+    if "__tuple__" in value:
+        return tuple(decode(entry, buffers) for entry in value["__tuple__"])
+    raise ValueError("cannot decode {}".format(value))
+
+
+def decode_index(value, buffers: list):
+    if "__multiindex__" in value:
+        levels = [decode(level, buffers) for level in value["__multiindex__"]]
+        return pd.MultiIndex.from_arrays(levels, names=value["names"])
+    return pd.Index(decode(value["__index__"], buffers), name=value["name"])
+
+
+def send_message(sock: socket.socket, message: dict):
+    """Send a message, see the module documentation for the framing."""
+    buffers = []
+    header = encode(message, buffers)
+    layout = [(array.dtype.str, array.shape, array.nbytes) for array in buffers]
+    data = json.dumps({"message": header, "buffers": layout}).encode("utf-8")
+    sock.sendall(HEADER_LENGTH.pack(len(data)) + data)
+    for array in buffers:
+        if array.nbytes:
+            sock.sendall(memoryview(array).cast("B"))
+
+
+def recv_message(sock: socket.socket, max_size: int = MAX_MESSAGE_SIZE):
+    """Receive a message, returns None if the connection was closed.
+
+    Raises
+    ------
+    ConnectionError
+        If the message is malformed or larger than max_size bytes, in which
+        case the connection can not be used anymore
+
+    """
+    prefix = _recv_exactly(sock, HEADER_LENGTH.size)
+    if prefix is None:
+        return None
+    (length,) = HEADER_LENGTH.unpack(prefix)
+    if length > min(max_size, MAX_HEADER_LENGTH):
+        raise ConnectionError("message header of {} bytes is too large".format(length))
+    try:
+        header = json.loads(_recv_exactly(sock, length).decode("utf-8"))
+        layout = [
+            (np.dtype(dtype), tuple(int(n) for n in shape), int(nbytes))
+            for dtype, shape, nbytes in header["buffers"]
+        ]
+    except (TypeError, ValueError, KeyError):
+        raise ConnectionError("malformed message header")
+
+    # check the whole message before allocating anything
+    total = length
+    for dtype, shape, nbytes in layout:
+        if dtype.hasobject or nbytes != dtype.itemsize * int(np.prod(shape)):
+            raise ConnectionError("malformed array in message")
+        total += nbytes
+    if total > max_size:
+        raise ConnectionError(
+            "message of {} bytes exceeds the limit of {} bytes".format(total, max_size)
+        )
+
+    buffers = []
+    for dtype, shape, nbytes in layout:
+        data = _recv_exactly(sock, nbytes) if nbytes else bytearray()
+        buffers.append(np.frombuffer(data, dtype=dtype).reshape(shape))
+    return decode(header["message"], buffers)
+
+
+def _recv_exactly(sock, n):
+    data = bytearray(n)
+    view = memoryview(data)
+    received = 0
+    while received < n:
+        count = sock.recv_into(view[received:])
+        if count == 0:
+            if received == 0:
+                return None
+            raise ConnectionError("connection closed in the middle of a message")
+        received += count
+    return data
+
+
+def _authkey(authkey):
+    """Return the shared secret as bytes, defaulting to the environment variable."""
+    if authkey is None:
+        authkey = os.environ.get(AUTHKEY_VARIABLE) or None
+    if isinstance(authkey, str):
+        authkey = authkey.encode("utf-8")
+    return authkey
+
+
+def _digest(authkey: bytes, challenge: str):
+    return hmac.new(authkey, bytes.fromhex(challenge), hashlib.sha256).hexdigest()
+
+
+class _Handler(socketserver.BaseRequestHandler):
+    """Serves a single connection, which holds on to one workspace until it is closed."""
+
+    def handle(self):
+        server = self.server.netlogo
+        try:
+            if not server._authenticate(self.request):
+                return
+        except ConnectionError:
+            return
+
+        link = server._idle.get()
+        try:
+            while True:
+                request = recv_message(self.request, server.max_message_size)
+                if request is None:
+                    break
+                response = server._dispatch(link, request)
+                try:
+                    send_message(self.request, response)
+                except TypeError as ex:
+                    # the result could not be encoded, nothing has been sent yet
+                    send_message(self.request, {"error": str(ex), "type": "TypeError"})
+        except ConnectionError:
+            pass
+        finally:
+            server._idle.put(link)
+
+
+class _TCPServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+if hasattr(socketserver, "ThreadingUnixStreamServer"):
+
+    class _UnixServer(socketserver.ThreadingUnixStreamServer):
+        daemon_threads = True
+
+
+class NetLogoServer:
+    """Host NetLogo workspaces that can be used over a TCP or Unix socket.
+
+    Each connection gets a workspace of its own for as long as it is open.
+    Connections beyond the number of workspaces wait until a workspace
+    becomes available.
+
+    .. warning::
+
+        Clients can run any NetLogo command, including the file-* and
+        export-* primitives, which read and write files on the server with
+        the rights of the server process. Only listen on other addresses
+        than localhost on a trusted network, and set an authkey.
+
+    Parameters
+    ----------
+    address : tuple or str, optional
+        (host, port) to listen on over TCP, use port 0 to pick a free port,
+        or the path of a Unix socket, defaults to port 9000 on localhost
+    n_workspaces : int, optional
+        Number of workspaces
+    link_factory : callable, optional
+        returns a new NetLogoLink, defaults to a headless NetLogoLink
+        created with the keyword arguments
+    authkey : bytes or str, optional
+        shared secret that clients have to prove they know before they get
+        a workspace, defaults to the PYNETLOGO_AUTHKEY environment variable
+    max_message_size : int, optional
+        largest request in bytes, larger requests close the connection
+    **kwargs
+        passed to NetLogoLink
+
+    Examples
+    --------
+    On each machine, with the same secret in PYNETLOGO_AUTHKEY on the
+    servers and the client
+
+    >>> with NetLogoServer(("10.0.0.5", 9000), n_workspaces=8) as server:
+    ...     server.serve_forever()
+
+    or from the command line
+
+    .. code-block:: console
+
+        python -m pynetlogo.remote --host 10.0.0.5 --port 9000 --workspaces 8
+
+    """
+
+    def __init__(
+        self,
+        address=("127.0.0.1", 9000),
+        n_workspaces: int = 1,
+        link_factory=None,
+        authkey: bytes | str | None = None,
+        max_message_size: int = MAX_MESSAGE_SIZE,
+        **kwargs,
+    ):
+        self.authkey = _authkey(authkey)
+        self.max_message_size = max_message_size
+        if not isinstance(address, str) and address[0] not in LOCALHOST and not self.authkey:
+            warnings.warn(
+                "NetLogoServer listens on {} without an authkey, any client that can reach it "
+                "can read and write files on this machine".format(address[0])
+            )
+
+        if link_factory is None:
+            link_factory = functools.partial(NetLogoLink, gui=False, **kwargs)
+
+        self.links = [link_factory() for _ in range(n_workspaces)]
+        self._idle = queue.Queue()
+        for link in self.links:
+            self._idle.put(link)
+
+        server_class = _UnixServer if isinstance(address, str) else _TCPServer
+        self._server = server_class(address, _Handler)
+        self._server.netlogo = self
+        self._thread = None
+
+    @property
+    def address(self):
+        """the address the server listens on"""
+        return self._server.server_address
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def serve_forever(self):
+        """Handle connections until the server is closed."""
+        self._server.serve_forever()
+
+    def start(self):
+        """Handle connections on a background thread."""
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def close(self):
+        """Stop serving and dispose of the workspaces."""
+        if self._thread is not None:
+            self._server.shutdown()
+            self._thread.join()
+        self._server.server_close()
+        for link in self.links:
+            link.kill_workspace()
+
+    def _authenticate(self, sock):
+        """Check that the client knows the authkey, if the server has one."""
+        if not self.authkey:
+            send_message(sock, {"challenge": None})
+            return True
+
+        challenge = os.urandom(32).hex()
+        send_message(sock, {"challenge": challenge})
+        response = recv_message(sock, MAX_HANDSHAKE_SIZE)
+        digest = response.get("digest") if isinstance(response, dict) else None
+        if not isinstance(digest, str) or not hmac.compare_digest(
+            digest, _digest(self.authkey, challenge)
+        ):
+            send_message(sock, {"error": "authentication failed", "type": "NetLogoException"})
+            return False
+        send_message(sock, {"result": None})
+        return True
+
+    def _dispatch(self, link, request: dict):
+        method = request["method"]
+        try:
+            if method == "__info__":
+                result = {"n_workspaces": len(self.links)}
+            elif method in REMOTE_METHODS:
+                result = getattr(link, method)(*request["args"], **request["kwargs"])
+            else:
+                raise NetLogoException("{} can not be called remotely".format(method))
+        except Exception as ex:
+            return {"error": str(ex), "type": type(ex).__name__}
+        return {"result": result}
+
+
+def _remote_method(name: str):
+    """Create a method that calls the NetLogoLink method of the same name on the server."""
+    method = getattr(NetLogoLink, name)
+
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        return self._call(name, *args, **kwargs)
+
+    wrapper.__doc__ = (
+        "Remote version of :meth:`NetLogoLink.{}`, see there for the parameters.".format(name)
+    )
+    return wrapper
+
+
+class RemoteNetLogoLink:
+    """Use a workspace hosted by a :class:`NetLogoServer`.
+
+    Has the same methods as NetLogoLink for loading models, executing
+    commands, and reading and writing data. Paths, such as the model file,
+    refer to files on the machine of the server.
+
+    Parameters
+    ----------
+    address : tuple or str
+        (host, port) of the server, or the path of its Unix socket
+    timeout : float, optional
+        timeout in seconds for connecting and for each call, a call that
+        times out closes the connection
+    authkey : bytes or str, optional
+        shared secret of the server, defaults to the PYNETLOGO_AUTHKEY
+        environment variable
+    max_message_size : int, optional
+        largest response in bytes, larger responses close the connection
+
+    Raises
+    ------
+    NetLogoException
+        If authentication or a call fails on the server, or if the
+        connection failed or was closed
+
+    """
+
+    def __init__(
+        self,
+        address,
+        timeout: float | None = None,
+        authkey: bytes | str | None = None,
+        max_message_size: int = MAX_MESSAGE_SIZE,
+    ):
+        if isinstance(address, str):
+            self._socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            self._socket.settimeout(timeout)
+            self._socket.connect(address)
+        else:
+            self._socket = socket.create_connection(tuple(address), timeout=timeout)
+        self.address = address
+        self.max_message_size = max_message_size
+        self._lock = threading.Lock()
+        self._broken = None
+        try:
+            self._authenticate(_authkey(authkey))
+        except BaseException:
+            self._socket.close()
+            raise
+        self.n_workspaces = self._call("__info__")["n_workspaces"]
+
+    def _authenticate(self, authkey):
+        challenge = recv_message(self._socket, MAX_HANDSHAKE_SIZE)
+        if challenge is None:
+            raise NetLogoException("connection to {} was closed".format(self.address))
+        if challenge["challenge"] is None:
+            return
+        if not authkey:
+            raise NetLogoException("{} requires an authkey".format(self.address))
+        send_message(self._socket, {"digest": _digest(authkey, challenge["challenge"])})
+        response = recv_message(self._socket, MAX_HANDSHAKE_SIZE)
+        if response is None or "error" in response:
+            raise NetLogoException("authentication with {} failed".format(self.address))
+
+    def _call(self, method: str, *args, **kwargs):
+        with self._lock:
+            if self._broken is not None:
+                raise NetLogoException(self._broken)
+            try:
+                send_message(self._socket, {"method": method, "args": list(args), "kwargs": kwargs})
+                response = recv_message(self._socket, self.max_message_size)
+            except OSError as ex:
+                # after a timeout or a partial message, the stream is out of
+                # step with the calls, so a late reply would answer the next call
+                raise self._break("connection to {} failed: {}".format(self.address, ex)) from ex
+            if response is None:
+                raise self._break("connection to {} was closed".format(self.address))
+        if "error" in response:
+            raise NetLogoException("{}: {}".format(response["type"], response["error"]))
+        return response["result"]
+
+    def _break(self, reason: str):
+        """Close the connection, and return the exception for this and all later calls."""
+        self._broken = reason
+        self._socket.close()
+        return NetLogoException(reason)
+
+    def close(self):
+        """Close the connection, which releases the workspace on the server."""
+        self._socket.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    load_model = _remote_method("load_model")
+    command = _remote_method("command")
+    report = _remote_method("report")
+    report_while = _remote_method("report_while")
+    repeat_command = _remote_method("repeat_command")
+    repeat_report = _remote_method("repeat_report")
+    patch_report = _remote_method("patch_report")
+    patch_report_many = _remote_method("patch_report_many")
+    record_patches = _remote_method("record_patches")
+    patch_set = _remote_method("patch_set")
+    write_NetLogo_attriblist = _remote_method("write_NetLogo_attriblist")
+    agents_report = _remote_method("agents_report")
+
+    def network_report(
+        self,
+        linkset: str = "links",
+        attributes: list[str] | None = None,
+        adjacency: bool = False,
+        weight: str | None = None,
+        n_nodes: int | None = None,
+    ):
+        """Remote version of :meth:`NetLogoLink.network_report`, see there for the parameters.
+
+        The adjacency matrix is constructed on the client, from the edges.
+
+        """
+        attributes = [] if attributes is None else list(attributes)
+        extra = [weight] if adjacency and weight is not None and weight not in attributes else []
+        edges = self._call("network_report", linkset, attributes + extra)
+        if not adjacency:
+            return edges
+        matrix = adjacency_matrix(edges, weight=weight, n_nodes=n_nodes)
+        return edges.drop(columns=extra), matrix
+
+    set_globals = _remote_method("set_globals")
+    get_globals = _remote_method("get_globals")
+    snapshot = _remote_method("snapshot")
+    restore = _remote_method("restore")
+    cache_stats = _remote_method("cache_stats")
+    set_cache_size = _remote_method("set_cache_size")
+
+
+def run_remote_experiments(
+    servers: list,
+    model_file: str,
+    experiments: pd.DataFrame,
+    reporters: list[str],
+    ticks: int,
+    setup: str = "setup",
+    go: str = "go",
+    include_t0: bool = True,
+    timeout: float | None = None,
+    authkey: bytes | str | None = None,
+):
+    """Run a set of experiments on the workspaces of several servers.
+
+    A connection is opened to every workspace of every server. Experiments
+    are handed out one at a time to the first workspace that is free, so
+    faster machines run more experiments.
+
+    Parameters
+    ----------
+    servers : list
+        addresses of :class:`NetLogoServer` instances
+    model_file : str
+        Path to the NetLogo model on the servers
+    timeout : float, optional
+        timeout in seconds for connecting and for each call, a call that
+        times out closes the connection
+    authkey : bytes or str, optional
+        shared secret of the servers, defaults to the PYNETLOGO_AUTHKEY
+        environment variable
+
+    See :meth:`~pynetlogo.experiments.ExperimentRunner.run` for the other
+    parameters.
+
+    Returns
+    -------
+    pandas DataFrame
+        with a column per reporter and an (experiment, tick) MultiIndex,
+        in the order of experiments
+
+    """
+    reporters = list(reporters)
+    records = experiments.to_dict("records")
+    settings = dict(setup=setup, go=go, reporters=reporters, ticks=ticks, include_t0=include_t0)
+
+    links = []
+    try:
+        for address in servers:
+            link = RemoteNetLogoLink(address, timeout=timeout, authkey=authkey)
+            links.append(link)
+            for _ in range(link.n_workspaces - 1):
+                links.append(RemoteNetLogoLink(address, timeout=timeout, authkey=authkey))
+
+        pending = queue.Queue()
+        for position, experiment in enumerate(records):
+            pending.put((position, experiment))
+        results = [None] * len(records)
+
+        def work(link):
+            link.load_model(model_file)
+            while True:
+                try:
+                    position, experiment = pending.get_nowait()
+                except queue.Empty:
+                    return
+                results[position] = run_experiment(link, experiment, **settings)
+
+        with ThreadPoolExecutor(max_workers=len(links)) as executor:
+            for future in [executor.submit(work, link) for link in links]:
+                future.result()
+    finally:
+        for link in links:
+            link.close()
+
+    return results_frame(experiments, results, reporters, ticks, include_t0)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Serve NetLogo workspaces over a socket. Clients have to know the secret "
+        "in the {} environment variable, if it is set.".format(AUTHKEY_VARIABLE)
+    )
+    parser.add_argument("--host", default="127.0.0.1", help="host to listen on")
+    parser.add_argument("--port", type=int, default=9000, help="port to listen on")
+    parser.add_argument("--unix-socket", help="path of a Unix socket to listen on instead")
+    parser.add_argument("--workspaces", type=int, default=1, help="number of workspaces")
+    parser.add_argument("--netlogo-home", help="NetLogo installation directory")
+    parser.add_argument("--jvm-path", help="path of the jvm")
+    args = parser.parse_args(argv)
+
+    address = args.unix_socket or (args.host, args.port)
+    with NetLogoServer(
+        address,
+        n_workspaces=args.workspaces,
+        netlogo_home=args.netlogo_home,
+        jvm_path=args.jvm_path,
+    ) as server:
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,193 @@
+"""Writing results of experiments to disk incrementally and reading them lazily."""
+
+import glob
+import os
+import uuid
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    pq = None
+
+__all__ = ["ResultSink"]
+
+FORMATS = ("parquet", "npz")
+
+
+class ResultSink:
+    """A directory of part files with results of experiments.
+
+    Each write creates a new part file, so several workers can write to the
+    same sink without coordination. A part holds an experiment and a tick
+    column, and a column per reporter. Parts are written to a temporary
+    name first, so readers never see a partially written part.
+
+    Results can be read back lazily, reading only the requested reporters
+    and keeping only the requested experiments part by part.
+
+    Parameters
+    ----------
+    path : str
+        directory of the sink, created if it does not exist
+    format : {'parquet', 'npz'}, optional
+        file format of the parts, defaults to parquet if pyarrow is
+        installed and npz otherwise
+    part_rows : int, optional
+        number of rows after which the experiment runner writes a part
+
+    Examples
+    --------
+    >>> sink = ResultSink("results")
+    >>> run_experiments(modelfile, experiments, reporters, ticks=1000, sink=sink)
+    >>> sheep = sink.read(experiments=[0, 1], reporters=["count sheep"])
+
+    """
+
+    def __init__(self, path: str, format: str | None = None, part_rows: int = 1_000_000):
+        if format is None:
+            format = "parquet" if pa is not None else "npz"
+        if format not in FORMATS:
+            raise ValueError("format should be one of {}".format(", ".join(FORMATS)))
+        if format == "parquet" and pa is None:
+            raise ImportError("writing parquet requires pyarrow, use format='npz' instead")
+
+        self.path = os.path.abspath(path)
+        self.format = format
+        self.part_rows = part_rows
+        os.makedirs(self.path, exist_ok=True)
+
+    def __repr__(self):
+        return "ResultSink({!r}, format={!r})".format(self.path, self.format)
+
+    @property
+    def parts(self):
+        """list of the part files in the sink"""
+        return sorted(glob.glob(os.path.join(self.path, "part-*.{}".format(self.format))))
+
+    def write(self, experiments, ticks, data: np.ndarray, reporters: list[str]):
+        """Write a part with the results of one or more experiments.
+
+        Parameters
+        ----------
+        experiments : array_like
+            experiment of each row
+        ticks : array_like
+            tick of each row
+        data : numpy array
+            of shape (n_rows, n_reporters)
+        reporters : list of str
+            names of the reporters
+
+        Returns
+        -------
+        str
+            the path of the part
+
+        """
+        data = np.asarray(data)
+        experiments = np.asarray(experiments)
+        if experiments.dtype == object:
+            experiments = experiments.astype(str)
+        columns = {"experiment": experiments, "tick": np.asarray(ticks)}
+        for i, reporter in enumerate(reporters):
+            column = data[:, i]
+            if column.dtype == object:
+                # non-numeric reporters are passed as objects, see run_experiment
+                column = pd.Series(column).infer_objects().to_numpy()
+                if column.dtype == object:
+                    column = column.astype(str)
+            columns[reporter] = column
+
+        name = "part-{}-{}.{}".format(os.getpid(), uuid.uuid4().hex[:12], self.format)
+        path = os.path.join(self.path, name)
+        temporary = os.path.join(self.path, "." + name)
+        if self.format == "parquet":
+            pq.write_table(pa.table(columns), temporary)
+        else:
+            with open(temporary, "wb") as fh:
+                # the reporters are keyed by position, as names may contain any character
+                np.savez(
+                    fh,
+                    experiment=columns["experiment"],
+                    tick=columns["tick"],
+                    reporters=np.asarray(reporters, dtype=str),
+                    **{"r{}".format(i): columns[reporter] for i, reporter in enumerate(reporters)},
+                )
+        os.replace(temporary, path)
+        return path
+
+    def iter_parts(self, experiments=None, reporters: list[str] | None = None):
+        """Read the sink part by part.
+
+        Parameters
+        ----------
+        experiments : list, optional
+            only keep the rows of these experiments
+        reporters : list of str, optional
+            only read these reporters, defaults to all reporters
+
+        Yields
+        ------
+        pandas DataFrame
+            with a column per reporter and an (experiment, tick) MultiIndex
+
+        """
+        for part in self.parts:
+            if self.format == "parquet":
+                frame = self._read_parquet(part, experiments, reporters)
+            else:
+                frame = self._read_npz(part, experiments, reporters)
+            if len(frame):
+                yield frame
+
+    def read(self, experiments=None, reporters: list[str] | None = None):
+        """Read the sink into a single DataFrame.
+
+        Parameters
+        ----------
+        experiments : list, optional
+            only keep the rows of these experiments
+        reporters : list of str, optional
+            only read these reporters, defaults to all reporters
+
+        Returns
+        -------
+        pandas DataFrame
+            with a column per reporter and an (experiment, tick) MultiIndex,
+            sorted by experiment and tick
+
+        """
+        frames = list(self.iter_parts(experiments, reporters))
+        if not frames:
+            index = pd.MultiIndex.from_arrays([[], []], names=["experiment", "tick"])
+            return pd.DataFrame(index=index, columns=reporters or [])
+        return pd.concat(frames).sort_index()
+
+    def _read_parquet(self, part, experiments, reporters):
+        columns = None if reporters is None else ["experiment", "tick", *reporters]
+        filters = None if experiments is None else [("experiment", "in", list(experiments))]
+        frame = pq.read_table(part, columns=columns, filters=filters).to_pandas()
+        return frame.set_index(["experiment", "tick"])
+
+    def _read_npz(self, part, experiments, reporters):
+        # arrays in an npz file are only read when they are accessed
+        with np.load(part, allow_pickle=False) as npz:
+            names = list(npz["reporters"])
+            if reporters is None:
+                reporters = names
+            experiment = npz["experiment"]
+            rows = slice(None)
+            if experiments is not None:
+                rows = np.isin(experiment, list(experiments))
+            index = pd.MultiIndex.from_arrays(
+                [experiment[rows], npz["tick"][rows]], names=["experiment", "tick"]
+            )
+            data = {
+                reporter: npz["r{}".format(names.index(reporter))][rows] for reporter in reporters
+            }
+        return pd.DataFrame(data, index=index, columns=list(reporters))
@@ -0,0 +1,407 @@
+"""Worker processes with a JVM each, supervised and restarted when they fail."""
+
+import multiprocessing
+import os
+import queue
+import threading
+from concurrent.futures import Future
+
+import jpype
+import pandas as pd
+
+from .core import NetLogoException, NetLogoLink
+from .experiments import results_frame, run_experiment
+
+__all__ = ["SupervisedPool"]
+
+# errors after which the JVM of a worker can not be trusted anymore
+FATAL_ERRORS = ("OutOfMemoryError", "StackOverflowError")
+
+# seconds an idle worker gets to answer a health check
+PING_TIMEOUT = 60
+
+STATS = ("completed", "errors", "crashes", "timeouts", "recycled", "restarts", "retries", "failed")
+
+
+def _heap_used():
+    """Return the used heap of the JVM of this process in MB."""
+    if not jpype.isJVMStarted():
+        return None
+    runtime = jpype.java.lang.Runtime.getRuntime()
+    return (runtime.totalMemory() - runtime.freeMemory()) / 2**20
+
+
+def _worker_main(conn, model_file, link_factory):
+    link = link_factory()
+    link.load_model(model_file)
+    conn.send(("ready", None))
+
+    while True:
+        try:
+            kind, payload = conn.recv()
+        except EOFError:
+            break
+        if kind == "stop":
+            break
+        if kind == "ping":
+            conn.send(("pong", _heap_used()))
+            continue
+
+        func, args = payload
+        try:
+            result = func(link, *args)
+        except Exception as ex:
+            try:
+                conn.send(("error", ex))
+            except Exception:
+                # the exception can not be pickled
+                conn.send(("error", NetLogoException("{}: {}".format(type(ex).__name__, ex))))
+        else:
+            conn.send(("done", (result, _heap_used())))
+
+    link.kill_workspace()
+
+
+class _WorkerDied(Exception):
+    pass
+
+
+class _Worker:
+    """A worker process and the parent's end of its pipe."""
+
+    def __init__(self, context, model_file, link_factory, startup_timeout):
+        self.runs = 0
+        self.conn, child_conn = context.Pipe()
+        self.process = context.Process(
+            target=_worker_main, args=(child_conn, model_file, link_factory), daemon=True
+        )
+        self.process.start()
+        # only the worker should hold its end, so a crash shows up as EOF
+        child_conn.close()
+        try:
+            kind, _ = self.receive(startup_timeout)
+            if kind != "ready":
+                raise _WorkerDied()
+        except BaseException:
+            # do not leave a worker that is still loading the model behind
+            self.kill()
+            raise
+
+    def receive(self, timeout=None):
+        """Return the next message, raises TimeoutError or _WorkerDied."""
+        try:
+            ready = self.conn.poll(timeout)
+            if ready:
+                return self.conn.recv()
+        except (EOFError, OSError):
+            raise _WorkerDied()
+        raise TimeoutError()
+
+    def send(self, kind, payload=None):
+        try:
+            self.conn.send((kind, payload))
+        except (BrokenPipeError, OSError):
+            raise _WorkerDied()
+
+    def stop(self, timeout=10):
+        try:
+            self.conn.send(("stop", None))
+        except OSError:
+            pass
+        self.process.join(timeout)
+        self.kill()
+
+    def kill(self):
+        if self.process.is_alive():
+            self.process.kill()
+        self.process.join()
+        self.conn.close()
+
+
+class SupervisedPool:
+    """A pool of worker processes, each with its own JVM and the model loaded.
+
+    Workers are supervised by the pool. A worker is restarted, and the task
+    it was running is retried on a fresh worker, if it
+
+    * crashes, e.g., because the JVM runs out of memory,
+    * takes longer than `timeout` for a task, or
+    * raises an OutOfMemoryError or StackOverflowError from Java.
+
+    Idle workers are health checked every `health_interval` seconds. To
+    limit the growth of the heap over many runs, workers are also replaced
+    after `max_runs` tasks or once the used heap exceeds `max_heap_mb`.
+
+    Tasks are functions called with the NetLogoLink of the worker as first
+    argument. They should be picklable, so defined at module level.
+
+    Parameters
+    ----------
+    model_file : str
+        Path to the NetLogo model
+    n_workers : int, optional
+        Number of workers, defaults to the number of cpu cores
+    timeout : float, optional
+        Time limit in seconds for a single task
+    max_runs : int, optional
+        Number of tasks after which a worker is replaced
+    max_heap_mb : float, optional
+        Used JVM heap in MB after which a worker is replaced
+    max_retries : int, optional
+        Number of times a task is retried after its worker failed
+    health_interval : float, optional
+        Seconds between health checks of idle workers
+    startup_timeout : float, optional
+        Time limit in seconds for starting a worker and loading the model
+    link_factory : callable, optional
+        called without arguments in the worker to create its NetLogoLink,
+        defaults to a headless NetLogoLink
+    netlogo_home : str, optional
+        Path to the NetLogo installation directory, found automatically if not given
+    jvm_path : str, optional
+        path of the jvm
+    jvm_args : list of str, optional
+              additional arguments that should be used when starting
+              the jvm, e.g., ["-Xmx4g"]
+
+    Examples
+    --------
+    >>> with SupervisedPool(modelfile, n_workers=8, timeout=600, max_runs=500) as pool:
+    ...     results = pool.run_experiments(experiments, ["count sheep"], ticks=100)
+    ...     print(pool.stats())
+
+    """
+
+    def __init__(
+        self,
+        model_file: str,
+        n_workers: int | None = None,
+        timeout: float | None = None,
+        max_runs: int | None = None,
+        max_heap_mb: float | None = None,
+        max_retries: int = 2,
+        health_interval: float = 30,
+        startup_timeout: float = 300,
+        link_factory=None,
+        netlogo_home: str | None = None,
+        jvm_path: str | None = None,
+        jvm_args: list[str] | None = None,
+    ):
+        if n_workers is None:
+            n_workers = os.cpu_count() or 1
+        if link_factory is None:
+            link_factory = _DefaultLinkFactory(netlogo_home, jvm_path, jvm_args)
+
+        self.model_file = os.path.abspath(model_file)
+        self.n_workers = n_workers
+        self.timeout = timeout
+        self.max_runs = max_runs
+        self.max_heap_mb = max_heap_mb
+        self.max_retries = max_retries
+        self.health_interval = health_interval
+        self.startup_timeout = startup_timeout
+        self.link_factory = link_factory
+
+        # a JVM does not survive a fork, so workers are always spawned
+        self._context = multiprocessing.get_context("spawn")
+        self._tasks = queue.Queue()
+        self._lock = threading.Lock()
+        self._stats = dict.fromkeys(STATS, 0)
+        self._threads = [
+            threading.Thread(target=self._supervise, daemon=True, name="pynetlogo-supervisor")
+            for _ in range(n_workers)
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def __len__(self):
+        return self.n_workers
+
+    def submit(self, func, *args):
+        """Run func(link, *args) on a worker.
+
+        Returns
+        -------
+        concurrent.futures.Future
+            with the return value of func. If the task failed on more than
+            max_retries workers, the future raises a NetLogoException.
+
+        """
+        future = Future()
+        self._tasks.put((future, func, args))
+        return future
+
+    def map(self, func, iterable):
+        """Return func(link, item) for each item, in the order of the items."""
+        futures = [self.submit(func, item) for item in iterable]
+        for future in futures:
+            yield future.result()
+
+    def run_experiments(
+        self,
+        experiments: pd.DataFrame,
+        reporters: list[str],
+        ticks: int,
+        setup: str = "setup",
+        go: str = "go",
+        include_t0: bool = True,
+    ):
+        """Run experiments on the workers, one experiment per task.
+
+        See :meth:`~pynetlogo.experiments.ExperimentRunner.run` for the
+        parameters.
+
+        Returns
+        -------
+        pandas DataFrame
+            with a column per reporter and an (experiment, tick) MultiIndex,
+            in the order of experiments
+
+        """
+        reporters = list(reporters)
+        records = experiments.to_dict("records")
+        futures = [
+            self.submit(run_experiment, record, setup, go, reporters, ticks, include_t0)
+            for record in records
+        ]
+        results = [future.result() for future in futures]
+        return results_frame(experiments, results, reporters, ticks, include_t0)
+
+    def stats(self):
+        """Return the number of completed tasks, errors, and worker failures.
+
+        Returns
+        -------
+        dict
+            with the number of completed tasks, tasks that raised an error,
+            worker crashes and timeouts, workers recycled because of
+            max_runs or max_heap_mb, worker restarts, retried tasks, and
+            tasks that failed after max_retries
+
+        """
+        with self._lock:
+            return dict(self._stats)
+
+    def close(self):
+        """Wait for the submitted tasks and stop the workers."""
+        for _ in self._threads:
+            self._tasks.put(None)
+        for thread in self._threads:
+            thread.join()
+
+    def _count(self, key):
+        with self._lock:
+            self._stats[key] += 1
+
+    def _start_worker(self):
+        return _Worker(self._context, self.model_file, self.link_factory, self.startup_timeout)
+
+    def _supervise(self):
+        try:
+            worker = self._start_worker()
+        except (_WorkerDied, TimeoutError):
+            self._count("crashes")
+            worker = None
+
+        try:
+            while True:
+                try:
+                    item = self._tasks.get(timeout=self.health_interval)
+                except queue.Empty:
+                    worker = self._check_health(worker)
+                    continue
+                if item is None:
+                    break
+
+                future, func, args = item
+                if future.set_running_or_notify_cancel():
+                    worker = self._run_task(worker, future, func, args)
+        finally:
+            if worker is not None:
+                worker.stop()
+
+    def _check_health(self, worker):
+        if worker is None:
+            return None
+        try:
+            worker.send("ping")
+            worker.receive(PING_TIMEOUT)
+            return worker
+        except _WorkerDied:
+            self._count("crashes")
+        except TimeoutError:
+            self._count("timeouts")
+        worker.kill()
+        return None
+
+    def _run_task(self, worker, future, func, args):
+        """Run a task, retrying on a new worker if needed, and return the worker."""
+        for attempt in range(self.max_retries + 1):
+            if attempt:
+                self._count("retries")
+            try:
+                if worker is None:
+                    worker = self._start_worker()
+                    self._count("restarts")
+                worker.send("task", (func, args))
+                kind, payload = worker.receive(self.timeout)
+            except _WorkerDied:
+                self._count("crashes")
+            except TimeoutError:
+                self._count("timeouts")
+            else:
+                if kind == "done":
+                    result, heap = payload
+                    future.set_result(result)
+                    self._count("completed")
+                    return self._recycle(worker, heap)
+                if not any(error in str(payload) for error in FATAL_ERRORS):
+                    future.set_exception(payload)
+                    self._count("errors")
+                    return worker
+                self._count("crashes")
+
+            if worker is not None:
+                worker.kill()
+                worker = None
+
+        self._count("failed")
+        future.set_exception(
+            NetLogoException("task failed on {} workers".format(self.max_retries + 1))
+        )
+        return worker
+
+    def _recycle(self, worker, heap):
+        """Replace the worker if it reached max_runs or max_heap_mb."""
+        worker.runs += 1
+        exhausted = self.max_runs is not None and worker.runs >= self.max_runs
+        if self.max_heap_mb is not None and heap is not None and heap > self.max_heap_mb:
+            exhausted = True
+        if exhausted:
+            self._count("recycled")
+            worker.stop()
+            return None
+        return worker
+
+
+class _DefaultLinkFactory:
+    """Picklable factory for the NetLogoLink of a worker."""
+
+    def __init__(self, netlogo_home, jvm_path, jvm_args):
+        self.netlogo_home = netlogo_home
+        self.jvm_path = jvm_path
+        self.jvm_args = jvm_args
+
+    def __call__(self):
+        return NetLogoLink(
+            gui=False,
+            netlogo_home=self.netlogo_home,
+            jvm_path=self.jvm_path,
+            jvm_args=self.jvm_args,
+        )
@@ -0,0 +1,91 @@
+import asyncio
+import threading
+import time
+import unittest
+
+try:
+    import unittest.mock as mock
+except ImportError:
+    import mock
+
+from src.pynetlogo.asynclink import AsyncNetLogoLink
+from src.pynetlogo.remote import RemoteNetLogoLink
+
+
+def slow_link(duration=0.05):
+    link = mock.Mock()
+    running = threading.Event()
+    halted = threading.Event()
+
+    def report(netlogo_reporter):
+        assert not running.is_set(), "calls on a workspace should not overlap"
+        running.set()
+        halted.wait(duration)
+        running.clear()
+        return netlogo_reporter
+
+    link.report.side_effect = report
+    link.halt.side_effect = halted.set
+    return link
+
+
+class TestAsyncNetLogoLink(unittest.TestCase):
+    def test_gather(self):
+        links = [AsyncNetLogoLink(slow_link()) for _ in range(4)]
+
+        async def main():
+            start = time.perf_counter()
+            results = await asyncio.gather(
+                *[link.report("count sheep") for link in links for _ in range(2)]
+            )
+            return results, time.perf_counter() - start
+
+        results, duration = asyncio.run(main())
+        self.assertEqual(results, ["count sheep"] * 8)
+        # calls on different links run concurrently
+        self.assertLess(duration, 0.3)
+
+    def test_timeout_halts(self):
+        link = AsyncNetLogoLink(slow_link(duration=5))
+
+        async def main():
+            with self.assertRaises(asyncio.TimeoutError):
+                await link.report("count sheep", timeout=0.05)
+
+        asyncio.run(main())
+        link.link.halt.assert_called_once_with()
+
+    def test_cancel_queued(self):
+        link = AsyncNetLogoLink(slow_link(duration=0.1))
+
+        async def main():
+            first = asyncio.ensure_future(link.report("first"))
+            second = asyncio.ensure_future(link.report("second"))
+            await asyncio.sleep(0.01)
+            second.cancel()
+            self.assertEqual(await first, "first")
+
+        asyncio.run(main())
+        self.assertEqual(link.link.report.call_count, 1)
+        link.link.halt.assert_not_called()
+
+    def test_methods(self):
+        def public(cls):
+            return {name for name in dir(cls) if not name.startswith("_")}
+
+        # both wrappers offer the same methods of NetLogoLink
+        self.assertEqual(public(AsyncNetLogoLink), public(RemoteNetLogoLink))
+
+        link = AsyncNetLogoLink(mock.Mock())
+        link.link.get_globals.return_value = {"initial-sheep": 100.0}
+
+        async def main():
+            await link.set_globals({"initial-sheep": 100})
+            return await link.get_globals(["initial-sheep"])
+
+        self.assertEqual(asyncio.run(main()), {"initial-sheep": 100.0})
+        link.link.set_globals.assert_called_once_with({"initial-sheep": 100})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,176 @@
+import unittest
+
+try:
+    import unittest.mock as mock
+except ImportError:
+    import mock
+
+import os
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+from src.pynetlogo.experiments import (
+    _run_chunk_to_shared,
+    allocate_shared_results,
+    apply_parameters,
+    results_frame,
+    run_experiments,
+)
+from src.pynetlogo.sink import ResultSink
+
+
+def fake_link(**kwargs):
+    link = mock.Mock()
+    state = {}
+
+    def set_globals(values):
+        state.update(values)
+
+    def repeat_report(reporters, reps, go="go", include_t0=True):
+        n = reps + 1 if include_t0 else reps
+        return {reporter: np.full(n, state["x"] * (i + 1)) for i, reporter in enumerate(reporters)}
+
+    link.set_globals.side_effect = set_globals
+    link.repeat_report.side_effect = repeat_report
+    return link
+
+
+class TestExperiments(unittest.TestCase):
+    def test_apply_parameters(self):
+        link = mock.Mock()
+        apply_parameters(link, {"random-seed": 42.0, "x": np.float64(1.5), "name": "a"})
+        link.command.assert_called_once_with("random-seed 42")
+        link.set_globals.assert_called_once_with({"x": 1.5, "name": "a"})
+
+    @mock.patch("src.pynetlogo.pool.NetLogoLink")
+    def test_run_experiments_thread(self, mocked_link):
+        mocked_link.side_effect = fake_link
+        experiments = pd.DataFrame({"x": [1.0, 2.0, 3.0, 4.0, 5.0]}, index=list("abcde"))
+
+        results = run_experiments(
+            "model.nlogo",
+            experiments,
+            reporters=["r1", "r2"],
+            ticks=3,
+            n_workers=2,
+            backend="thread",
+            chunksize=2,
+        )
+
+        self.assertEqual(results.shape, (20, 2))
+        self.assertEqual(list(results.index.get_level_values("experiment").unique()), list("abcde"))
+        self.assertEqual(list(results.loc["a"].index), [0, 1, 2, 3])
+        np.testing.assert_array_equal(results.loc["c", "r2"], [6.0] * 4)
+
+    @mock.patch("src.pynetlogo.pool.NetLogoLink")
+    def test_run_experiments_sink(self, mocked_link):
+        mocked_link.side_effect = fake_link
+        experiments = pd.DataFrame({"x": [1.0, 2.0, 3.0, 4.0, 5.0]}, index=list("abcde"))
+
+        with tempfile.TemporaryDirectory() as path:
+            sink = ResultSink(path, format="npz", part_rows=8)
+            returned = run_experiments(
+                "model.nlogo",
+                experiments,
+                reporters=["r1", "r2"],
+                ticks=3,
+                n_workers=2,
+                backend="thread",
+                chunksize=3,
+                sink=sink,
+            )
+            self.assertIs(returned, sink)
+            # chunks of 3 and 2 experiments, with at most 2 experiments of 4 rows per part
+            self.assertEqual(len(sink.parts), 3)
+
+            results = sink.read()
+            self.assertEqual(results.shape, (20, 2))
+            np.testing.assert_array_equal(results.loc["c", "r2"], [6.0] * 4)
+
+            subset = sink.read(experiments=["b", "e"], reporters=["r2"])
+            self.assertEqual(list(subset.columns), ["r2"])
+            self.assertEqual(list(subset.index.get_level_values("experiment").unique()), ["b", "e"])
+            np.testing.assert_array_equal(subset.loc["e", "r2"], [10.0] * 4)
+
+    def test_shared_results(self):
+        experiments = pd.DataFrame({"x": [1.0, 2.0, 3.0]}, index=list("abc"))
+        settings = dict(setup="setup", go="go", reporters=["r1", "r2"], ticks=3, include_t0=True)
+        path, results = allocate_shared_results((3, 4, 2))
+        try:
+            link = fake_link()
+            records = list(enumerate(experiments.to_dict("records")))
+            # chunks are written by another process in practice
+            self.assertEqual(_run_chunk_to_shared(link, records[2:], settings, path, (3, 4, 2)), {})
+            self.assertEqual(_run_chunk_to_shared(link, records[:2], settings, path, (3, 4, 2)), {})
+        finally:
+            os.unlink(path)
+
+        frame = results_frame(experiments, results, ["r1", "r2"], 3, True)
+        np.testing.assert_array_equal(frame.loc["c", "r2"], [6.0] * 4)
+        np.testing.assert_array_equal(frame.loc["a", "r1"], [1.0] * 4)
+        self.assertTrue(np.shares_memory(frame.to_numpy(), results))
+
+    def test_non_numeric_results(self):
+        def typed_link(**kwargs):
+            link = fake_link()
+            numeric = link.repeat_report.side_effect
+
+            def repeat_report(reporters, reps, go="go", include_t0=True):
+                results = numeric(reporters, reps, go=go, include_t0=include_t0)
+                results["sick?"] = results["sick?"] > 2
+                results["name"] = np.array(["a"] * len(results["name"]))
+                return results
+
+            link.repeat_report.side_effect = repeat_report
+            return link
+
+        experiments = pd.DataFrame({"x": [1.0, 2.0]}, index=list("ab"))
+        reporters = ["count sheep", "sick?", "name"]
+        settings = dict(setup="setup", go="go", reporters=reporters, ticks=1, include_t0=True)
+
+        def assert_dtypes(frame):
+            self.assertEqual(frame["count sheep"].dtype, np.float64)
+            self.assertEqual(frame["sick?"].dtype, bool)
+            self.assertTrue(pd.api.types.is_string_dtype(frame["name"]))
+
+        with mock.patch("src.pynetlogo.pool.NetLogoLink", side_effect=typed_link):
+            results = run_experiments(
+                "model.nlogo", experiments, reporters, 1, n_workers=1, backend="thread"
+            )
+        assert_dtypes(results)
+        self.assertEqual(results.loc["b", "sick?"].tolist(), [True, True])
+
+        with tempfile.TemporaryDirectory() as directory:
+            with mock.patch("src.pynetlogo.pool.NetLogoLink", side_effect=typed_link):
+                sink = run_experiments(
+                    "model.nlogo",
+                    experiments,
+                    reporters,
+                    1,
+                    n_workers=1,
+                    backend="thread",
+                    sink=ResultSink(directory, format="npz"),
+                )
+            assert_dtypes(sink.read())
+
+        # the shared file only holds numbers, so the results are returned instead
+        path, shared = allocate_shared_results((2, 2, 3))
+        try:
+            records = list(enumerate(experiments.to_dict("records")))
+            returned = _run_chunk_to_shared(typed_link(), records, settings, path, (2, 2, 3))
+        finally:
+            os.unlink(path)
+        self.assertEqual(sorted(returned), [0, 1])
+        frame = results_frame(experiments, [returned[0], returned[1]], reporters, 1, True)
+        assert_dtypes(frame)
+        pd.testing.assert_frame_equal(frame, results)
+
+    def test_unknown_backend(self):
+        with self.assertRaises(ValueError):
+            run_experiments("model.nlogo", pd.DataFrame(), ["r"], 1, backend="cluster")
+
+
+if __name__ == "__main__":
+    unittest.main()
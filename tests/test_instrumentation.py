@@ -0,0 +1,77 @@
+import threading
+import unittest
+
+import numpy as np
+
+import src.pynetlogo as pynetlogo
+from src.pynetlogo.instrumentation import CallRecord, Instrumentation
+
+from .test_netlogo import mocked_link, nl_result
+
+
+class TestInstrumentation(unittest.TestCase):
+    def test_link_stats(self):
+        link = mocked_link()
+        link.link.report.return_value = nl_result("DoubleList", np.arange(3.0))
+        with self.assertRaises(pynetlogo.NetLogoException):
+            link.stats()
+
+        # compile and execute nanoseconds since the link was created
+        link.link.getTimings.side_effect = [[0, 0], [2000, 5000], [2000, 5000], [2000, 9000]]
+        records = []
+        link.enable_instrumentation(records.append)
+        link.report("[xcor] of turtles")
+        link.command("go")
+
+        self.assertEqual([record.method for record in records], ["report", "command"])
+        self.assertEqual(records[0].source, "[xcor] of turtles")
+        self.assertAlmostEqual(records[0].compile, 2e-6)
+        self.assertAlmostEqual(records[0].execute, 5e-6)
+        self.assertGreater(records[0].convert, 0)
+        self.assertEqual(records[1].convert, 0)
+
+        stats = link.stats()
+        self.assertEqual(stats.loc[("command", "go"), "count"], 1)
+        self.assertAlmostEqual(stats.loc[("command", "go"), "execute"], 4e-6)
+
+        link.reset_stats()
+        self.assertEqual(len(link.stats()), 0)
+
+        link.disable_instrumentation()
+        link.command("go")
+        self.assertEqual(len(records), 2)
+
+    def test_threads(self):
+        link = mocked_link()
+        link.link.getTimings.return_value = [0, 0]
+        # both calls are in java at the same time
+        barrier = threading.Barrier(2, timeout=5)
+        link.link.command.side_effect = lambda command: barrier.wait()
+        link.enable_instrumentation()
+
+        threads = [threading.Thread(target=link.command, args=("go",)) for _ in range(2)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(link.stats().loc[("command", "go"), "count"], 2)
+
+    def test_histogram(self):
+        instrumentation = Instrumentation()
+        for total in [1e-5, 1e-5, 1e-5, 1.0]:
+            instrumentation.add(CallRecord("report", "ticks", total, 0.0, total, 0.0))
+
+        histogram = instrumentation.histogram("report", "ticks")
+        self.assertEqual(histogram.sum(), 4)
+        self.assertEqual(histogram[histogram.index >= 1.0].sum(), 1)
+
+        stats = instrumentation.stats().loc[("report", "ticks")]
+        self.assertEqual(stats["count"], 4)
+        self.assertAlmostEqual(stats["total"], 1.00003)
+        self.assertLess(stats["p50"], 1e-4)
+        self.assertGreaterEqual(stats["p99"], 1.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
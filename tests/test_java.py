@@ -0,0 +1,69 @@
+import glob
+import os
+import unittest
+
+import numpy as np
+import pandas as pd
+
+import src.pynetlogo as pynetlogo
+
+# these tests start a real link, so they need a NetLogo installation and a
+# netlogolink.jar built against it with src/pynetlogo/java/build.sh
+NETLOGO_HOME = os.environ.get("NETLOGO_HOME")
+
+
+def find_model(netlogo_home, name):
+    pattern = os.path.join(netlogo_home, "**", "Sample Models", "**", name)
+    return glob.glob(pattern, recursive=True)[0]
+
+
+@unittest.skipUnless(NETLOGO_HOME, "NETLOGO_HOME is not set")
+class TestJavaLink(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.link = pynetlogo.NetLogoLink(netlogo_home=NETLOGO_HOME)
+        cls.model = find_model(NETLOGO_HOME, "Wolf Sheep Predation.nlogo")
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.link.kill_workspace()
+
+    def setUp(self):
+        self.link.load_model(self.model)
+        self.link.command("setup")
+
+    def test_jar_is_current(self):
+        self.assertIs(pynetlogo.core.check_java_api(self.link.link), self.link.link)
+
+    def test_repeat_report(self):
+        results = self.link.repeat_report(["count sheep", "count wolves"], 10)
+        self.assertEqual(list(results), ["count sheep", "count wolves"])
+        self.assertEqual(len(results["count sheep"]), 11)
+
+    def test_patch_report(self):
+        patches = self.link.patch_report("pxcor")
+        self.assertIsInstance(patches, pd.DataFrame)
+        width = self.link.report("world-width")
+        height = self.link.report("world-height")
+        self.assertEqual(patches.shape, (height, width))
+
+    def test_agents_report(self):
+        agents = self.link.agents_report("sheep", ["who", "energy"])
+        self.assertEqual(len(agents), self.link.report("count sheep"))
+        self.assertEqual(list(agents.columns), ["who", "energy"])
+
+    def test_batch(self):
+        with self.link.batch() as batch:
+            batch.command("go")
+            batch.report("ticks", key="ticks")
+            batch.report("count sheep", key="sheep")
+        self.assertEqual(batch.results["ticks"], 1)
+        self.assertTrue(np.isscalar(batch.results["sheep"]))
+
+        batch = self.link.batch().report("no-such-reporter").report("ticks")
+        with self.assertRaises(pynetlogo.NetLogoBatchException):
+            batch.run()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -10,9 +10,43 @@ try:
 except ImportError:
     import mock
 
+import os
+import tempfile
+
+import numpy as np
+import pandas as pd
+
 import src.pynetlogo as pynetlogo
 
 
+def nl_result(java_type, value):
+    """Create a stand-in for a Java NLResult object."""
+    result = mock.Mock()
+    result.getType.return_value = java_type
+    for method in [
+        "getResultAsBoolean",
+        "getResultAsString",
+        "getResultAsInteger",
+        "getResultAsDouble",
+        "getResultAsBooleanArray",
+        "getResultAsStringArray",
+        "getResultAsIntegerArray",
+        "getResultAsDoubleArray",
+        "getResultAsObject",
+    ]:
+        getattr(result, method).return_value = value
+    return result
+
+
+def mocked_link():
+    """Create a NetLogoLink with a mocked Java link, without starting a JVM."""
+    link = pynetlogo.NetLogoLink.__new__(pynetlogo.NetLogoLink)
+    link.link = mock.Mock()
+    link._globals = None
+    link._instrumentation = None
+    return link
+
+
 class Test(unittest.TestCase):
     @mock.patch("src.pynetlogo.core.os")
     def test_find_netlogo(self, mocked_os):
@@ -35,6 +69,472 @@ class Test(unittest.TestCase):
         with self.assertRaises(IndexError):
             pynetlogo.core.find_netlogo("/Applications")
 
+    def test_iter_ticks(self):
+        link = mocked_link()
+
+        def repeat_report_while(go, reporters, n, condition):
+            # the condition becomes true after 25 ticks
+            n = min(n, 25 - repeat_report_while.tick)
+            ticks = np.arange(repeat_report_while.tick, repeat_report_while.tick + n, dtype=float)
+            repeat_report_while.tick += n
+            series = mock.Mock()
+            series.size.return_value = n
+            series.getResults.return_value = [
+                nl_result("DoubleList", ticks),
+                nl_result("BoolList", ticks > 10),
+            ][: len(reporters)]
+            return series
+
+        repeat_report_while.tick = 0
+        link.link.repeatReportWhile.side_effect = repeat_report_while
+
+        chunks = list(link.iter_ticks(["ticks", "ticks > 10"], chunk=10, until="ticks >= 25"))
+        self.assertEqual([chunk.shape for chunk in chunks], [(10, 2), (10, 2), (5, 2)])
+        self.assertEqual(chunks[1][1].tolist(), [11.0, 1.0])
+        self.assertEqual(link.link.repeatReportWhile.call_args.args[3], "not (ticks >= 25)")
+
+        repeat_report_while.tick = 0
+        chunks = list(link.iter_ticks("ticks", chunk=10, max_ticks=15))
+        self.assertEqual([chunk.shape for chunk in chunks], [(10, 1), (5, 1)])
+        self.assertEqual(link.link.repeatReportWhile.call_args.args[2], 5)
+
+        with self.assertRaises(ValueError):
+            link.iter_ticks("ticks", chunk=0)
+
+    def test_type_convert(self):
+        result = pynetlogo.core.type_convert(nl_result("DoubleList", np.array([1.5, 2.5])))
+        self.assertEqual(result.dtype, np.float64)
+        np.testing.assert_array_equal(result, [1.5, 2.5])
+
+        result = pynetlogo.core.type_convert(
+            nl_result("IntegerList", np.array([1, 2], dtype=np.int32))
+        )
+        self.assertEqual(result.dtype, np.int64)
+        np.testing.assert_array_equal(result, [1, 2])
+
+        result = pynetlogo.core.type_convert(nl_result("BoolList", np.array([True, False])))
+        self.assertEqual(result.dtype, bool)
+        np.testing.assert_array_equal(result, [True, False])
+
+        strings = ["sheep", "", "wölf", "\U0001F411"]
+        java_result = nl_result("StringList", None)
+        java_result.getResultAsJoinedString.return_value = "".join(strings)
+        java_result.getStringLengths.return_value = np.array(
+            [len(entry) for entry in strings], dtype=np.int32
+        )
+        result = pynetlogo.core.type_convert(java_result)
+        self.assertEqual(result.tolist(), strings)
+
+        java_result.getResultAsJoinedString.return_value = ""
+        java_result.getStringLengths.return_value = np.array([0, 0], dtype=np.int32)
+        self.assertEqual(pynetlogo.core.type_convert(java_result).tolist(), ["", ""])
+
+    def test_type_convert_matrix(self):
+        java_result = nl_result("Matrix", np.arange(6, dtype=np.float64))
+        java_result.getResultShape.return_value = np.array([3, 2], dtype=np.int32)
+
+        result = pynetlogo.core.type_convert(java_result)
+        self.assertEqual(result.shape, (3, 2))
+        self.assertTrue(result.flags["C_CONTIGUOUS"])
+        np.testing.assert_array_equal(result[2], [4.0, 5.0])
+
+    def test_patch_report_many(self):
+        link = mocked_link()
+        link.link.getWorldExtents.return_value = np.array([0, 2, -1, 0], dtype=np.int32)
+        link.link.reportPatches.return_value = np.arange(12, dtype=np.float64)
+
+        values = link.patch_report_many(["pcolor", "grass"])
+        self.assertEqual(values.shape, (2, 2, 3))
+        np.testing.assert_array_equal(values[1, 0], [6, 7, 8])
+
+        frame = link.patch_report_many(["pcolor", "grass"], labelled=True)
+        self.assertEqual(frame.loc[("grass", -1), 2], 11)
+        self.assertEqual(list(frame.columns), [0, 1, 2])
+
+        # a procedure such as setup can resize the world without resize-world in the command
+        link.command("setup")
+        link.link.getWorldExtents.return_value = np.array([0, 1, 0, 1], dtype=np.int32)
+        link.link.reportPatches.return_value = np.arange(4, dtype=np.float64)
+        self.assertEqual(link.patch_report_many(["pcolor"]).shape, (1, 2, 2))
+
+    def test_patch_set(self):
+        link = mocked_link()
+        link.link.getWorldExtents.return_value = np.array([0, 2, -1, 0], dtype=np.int32)
+        data = np.arange(6).reshape((2, 3))
+
+        link.patch_set("grass", pd.DataFrame(data))
+        attribute, values = link.link.setPatchesDouble.call_args.args
+        self.assertEqual(attribute, "grass")
+        self.assertEqual(values.dtype, np.float64)
+        np.testing.assert_array_equal(values, np.arange(6))
+
+        link.patch_set("wet?", data > 2)
+        self.assertEqual(
+            link.link.setPatchesBoolean.call_args.args[1].tolist(), [False] * 3 + [True] * 3
+        )
+
+        link.patch_set("label", np.array([["a", "b", "c"], ["d", "e", "f"]], dtype=object))
+        self.assertEqual(link.link.setPatchesString.call_args.args[1], list("abcdef"))
+
+        with self.assertRaises(pynetlogo.NetLogoException):
+            link.patch_set("grass", data.T)
+
+        link.link.setPatchesDouble.reset_mock()
+        with self.assertRaisesRegex(pynetlogo.NetLogoException, "missing values"):
+            link.patch_set("grass", np.where(data > 2, np.nan, data))
+        link.link.setPatchesDouble.assert_not_called()
+
+    def test_write_NetLogo_attriblist(self):
+        link = mocked_link()
+        agent_data = pd.DataFrame(
+            {
+                "who": [3, 5, 8],
+                "energy": [1.5, 2.5, 3.5],
+                "age": [1, 2, 3],
+                "sick?": [True, False, True],
+                "name": ["a", "b", "c"],
+            }
+        )
+
+        link.write_NetLogo_attriblist(agent_data, "a-sheep", chunk_size=2)
+        self.assertEqual(link.link.setTurtleVariables.call_count, 2)
+
+        first, second = link.link.setTurtleVariables.call_args_list
+        args = first.args
+        self.assertEqual(args[0], "a-sheep")
+        self.assertEqual(args[1].tolist(), [3, 5])
+        self.assertEqual(args[2], ["energy", "age"])
+        self.assertEqual(args[3].tolist(), [1.5, 2.5, 1.0, 2.0])
+        self.assertEqual(args[4], ["sick?"])
+        self.assertEqual(args[5].tolist(), [True, False])
+        self.assertEqual(args[6], ["name"])
+        self.assertEqual(args[7], ["a", "b"])
+
+        self.assertEqual(second.args[1].tolist(), [8])
+        self.assertEqual(second.args[3].tolist(), [3.5, 3.0])
+
+        # nullable and categorical columns are written with the type of their values
+        link = mocked_link()
+        agent_data = pd.DataFrame(
+            {
+                "who": [3, 5],
+                "sick?": pd.array([True, False], dtype="boolean"),
+                "age": pd.array([1, 2], dtype="Int64"),
+                "color": pd.Categorical(["red", "blue"]),
+                "size": pd.Categorical([1.5, 2.5]),
+            }
+        )
+        link.write_NetLogo_attriblist(agent_data, "a-sheep")
+        args = link.link.setTurtleVariables.call_args.args
+        self.assertEqual(args[2], ["age", "size"])
+        self.assertEqual(args[3].tolist(), [1.0, 2.0, 1.5, 2.5])
+        self.assertEqual(args[4], ["sick?"])
+        self.assertEqual(args[5].tolist(), [True, False])
+        self.assertEqual(args[6], ["color"])
+        self.assertEqual(args[7], ["red", "blue"])
+
+        # missing values cannot be written to NetLogo
+        for attrib, values in [
+            ("sick?", pd.array([True, None], dtype="boolean")),
+            ("age", pd.array([1, None], dtype="Int64")),
+            ("energy", [1.5, np.nan]),
+        ]:
+            with self.assertRaisesRegex(pynetlogo.NetLogoException, "missing values"):
+                link.write_NetLogo_attriblist(agent_data.assign(**{attrib: values}), "a-sheep")
+
+    def test_reporter_template(self):
+        link = mocked_link()
+        link.link.reportUncached.return_value = nl_result("Double", 5.0)
+
+        reporter = link.reporter_template("[energy] of turtle ?")
+        self.assertEqual(reporter(3), 5.0)
+        link.link.reportUncached.assert_called_once_with("[energy] of turtle 3")
+
+        reporter = link.reporter_template("count turtles with [sick? and color = ?]")
+        self.assertEqual(reporter.n_placeholders, 1)
+        self.assertEqual(reporter.source(15.5), "count turtles with [sick? and color = 15.5]")
+        with self.assertRaises(pynetlogo.NetLogoException):
+            reporter.source(1, 2)
+
+        reporter = link.reporter_template("(list ? ?)")
+        self.assertEqual(reporter.source(True, ['a "b"', 1]), '(list true ["a \\"b\\"" 1])')
+
+    def test_cache_stats(self):
+        link = mocked_link()
+        link.link.getCacheStats.return_value = [3, 2, 0, 2, 1000]
+        self.assertEqual(
+            link.cache_stats(),
+            {"hits": 3, "misses": 2, "evictions": 0, "size": 2, "max_size": 1000},
+        )
+
+    def test_check_java_api(self):
+        java_link = mock.Mock(spec=list(pynetlogo.core.JAVA_METHODS))
+        self.assertIs(pynetlogo.core.check_java_api(java_link), java_link)
+
+        # an outdated jar still supports the methods it has
+        del java_link.getWorldExtents
+        with self.assertWarnsRegex(UserWarning, "getWorldExtents"):
+            wrapped = pynetlogo.core.check_java_api(java_link)
+        wrapped.command("setup")
+        java_link.command.assert_called_once_with("setup")
+        with self.assertRaisesRegex(pynetlogo.NetLogoException, "getWorldExtents"):
+            wrapped.getWorldExtents()
+
+    def test_agents_report(self):
+        link = mocked_link()
+        table = link.link.agentsReport.return_value
+        table.getKind.return_value = "Turtle"
+        names = nl_result("StringList", None)
+        names.getResultAsJoinedString.return_value = "ab"
+        names.getStringLengths.return_value = np.array([1, 1], dtype=np.int32)
+        table.getColumns.return_value = [
+            nl_result("DoubleList", np.array([4.0, 7.0])),
+            nl_result("DoubleList", np.array([1.5, 2.5])),
+            names,
+        ]
+
+        frame = link.agents_report("sheep", ["energy", "name"])
+        link.link.agentsReport.assert_called_once_with("sheep", ["energy", "name"])
+        self.assertEqual(frame.index.name, "who")
+        self.assertEqual(list(frame.index), [4, 7])
+        self.assertEqual(frame.loc[7, "energy"], 2.5)
+        self.assertEqual(frame.loc[4, "name"], "a")
+
+        table.getKind.return_value = "Link"
+        table.getColumns.return_value = [
+            nl_result("DoubleList", np.array([0.0, 1.0])),
+            nl_result("DoubleList", np.array([1.0, 2.0])),
+        ]
+        frame = link.agents_report("links")
+        self.assertEqual(frame.index.names, ["end1", "end2"])
+        self.assertEqual(list(frame.index), [(0, 1), (1, 2)])
+
+    def test_network_report(self):
+        link = mocked_link()
+        table = link.link.agentsReport.return_value
+        table.getKind.return_value = "Link"
+        table.getColumns.return_value = [
+            nl_result("DoubleList", np.array([0.0, 1.0, 0.0])),
+            nl_result("DoubleList", np.array([1.0, 2.0, 1.0])),
+            nl_result("DoubleList", np.array([0.5, 2.0, 1.0])),
+        ]
+        table.getDirected.return_value = np.array([False, True, False])
+
+        edges = link.network_report("links", ["weight"])
+        link.link.agentsReport.assert_called_once_with("links", ["weight"])
+        self.assertEqual(list(edges.columns), ["end1", "end2", "directed", "weight"])
+        self.assertEqual(edges["end1"].dtype, np.int64)
+        self.assertEqual(list(edges["directed"]), [False, True, False])
+
+        try:
+            import scipy.sparse  # noqa: F401
+        except ImportError:
+            self.skipTest("scipy is not installed")
+
+        edges, matrix = link.network_report(adjacency=True, weight="weight", n_nodes=4)
+        link.link.agentsReport.assert_called_with("links", ["weight"])
+        # the weight is read, but not returned as it is not one of the attributes
+        self.assertNotIn("weight", edges.columns)
+        self.assertEqual(matrix.shape, (4, 4))
+        # undirected links count in both directions, duplicate links are summed
+        np.testing.assert_array_equal(
+            matrix.toarray(),
+            [[0, 1.5, 0, 0], [1.5, 0, 2, 0], [0, 0, 0, 0], [0, 0, 0, 0]],
+        )
+
+        table.getKind.return_value = "Turtle"
+        with self.assertRaises(pynetlogo.NetLogoException):
+            link.network_report("turtles")
+
+    def test_globals(self):
+        link = mocked_link()
+        link.link.getGlobalNames.return_value = ["INITIAL-SHEEP", "GRASS?", "PATHS"]
+        link.link.getGlobalKinds.return_value = ["slider", "switch", "global"]
+        self.assertEqual(
+            link.globals, {"initial-sheep": "slider", "grass?": "switch", "paths": "global"}
+        )
+
+        link.set_globals({"initial-sheep": np.int64(100), "Grass?": np.bool_(True)})
+        link.link.setGlobals.assert_called_once_with(["initial-sheep", "Grass?"], [100.0, True])
+        args = link.link.setGlobals.call_args.args[1]
+        self.assertIs(type(args[0]), float)
+        self.assertIs(type(args[1]), bool)
+
+        link.set_globals({"paths": [1, 2]})
+        link.link.command.assert_called_once_with("set paths [1 2]")
+
+        # nothing is assigned if a value cannot be converted
+        with self.assertRaises(pynetlogo.NetLogoException):
+            link.set_globals({"paths": [3], "initial-sheep": 5, "grass?": object()})
+        link.link.command.assert_called_once()
+        self.assertEqual(link.link.setGlobals.call_count, 2)
+
+        with self.assertRaises(pynetlogo.NetLogoException):
+            link.set_globals({"initial-sheep": 10, "initial-wolves": 10})
+        self.assertEqual(link.link.setGlobals.call_count, 2)
+
+        link.link.getGlobals.return_value = [nl_result("Double", 100.0)]
+        self.assertEqual(link.get_globals(["initial-sheep"]), {"initial-sheep": 100.0})
+
+    def test_report_while(self):
+        link = mocked_link()
+        series = link.link.reportWhile.return_value
+        series.getTicks.return_value = np.array([2.0, 4.0, 6.0])
+        series.getResults.return_value = [
+            nl_result("DoubleList", np.array([10.0, 8.0, 5.0])),
+            nl_result("BoolList", np.array([False, False, True])),
+        ]
+        series.getStopReason.return_value = "condition"
+
+        frame = link.report_while(
+            ["count sheep", "any? wolves"], "count sheep > 5", every=2, max_seconds=1.5
+        )
+        link.link.reportWhile.assert_called_once_with(
+            "go", ["count sheep", "any? wolves"], "count sheep > 5", 2**31 - 1, 2, 1.5, False
+        )
+        self.assertEqual(frame.index.name, "tick")
+        self.assertEqual(list(frame.index), [2, 4, 6])
+        self.assertEqual(frame.loc[4, "count sheep"], 8.0)
+        self.assertTrue(frame.loc[6, "any? wolves"])
+
+        series.getResults.return_value = series.getResults.return_value[:1]
+        series.getStopReason.return_value = "time"
+        with self.assertWarns(UserWarning):
+            result = link.report_while("count sheep", "true", max_ticks=10, max_seconds=None)
+        self.assertIsInstance(result, pd.Series)
+        self.assertEqual(result.name, "count sheep")
+        self.assertEqual(link.link.reportWhile.call_args.args[3:6], (10, 1, 0.0))
+
+        # without reset-ticks, ticks is -1 and the executions of the command are counted
+        series.getTicks.return_value = np.array([-1.0, -1.0, -1.0])
+        series.getStopReason.return_value = "condition"
+        result = link.report_while("count sheep", "true", every=2, include_t0=True)
+        self.assertEqual(list(result.index), [0, 2, 4])
+
+    def test_record_patches(self):
+        link = mocked_link()
+        link.link.getWorldExtents.return_value = [0, 2, 0, 1]
+
+        def record_patches(go, attributes, n, every):
+            record_patches.samples += n
+            return np.arange(n * len(attributes) * 6, dtype=np.float64)
+
+        record_patches.samples = 0
+        link.link.recordPatches.side_effect = record_patches
+
+        with mock.patch.object(pynetlogo.core, "PATCH_BUFFER_SIZE", 24):
+            values = link.record_patches(["pcolor", "elevation"], 10, every=2)
+        self.assertEqual(values.shape, (5, 2, 2, 3))
+        # two samples of 12 values fit in the buffer
+        self.assertEqual(link.link.recordPatches.call_count, 3)
+        self.assertEqual(record_patches.samples, 5)
+        link.link.recordPatches.assert_called_with("go", ["pcolor", "elevation"], 1, 2)
+        np.testing.assert_array_equal(values[1, 1], [[18, 19, 20], [21, 22, 23]])
+        link.link.command.assert_not_called()
+
+        # the ticks after the last sample are run as well
+        values = link.record_patches(["pcolor"], 10, every=3)
+        self.assertEqual(values.shape, (3, 1, 2, 3))
+        link.link.command.assert_called_once_with("repeat 1 [go]")
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "patches.npy")
+            values = link.record_patches(["pcolor"], 3, out=path)
+            self.assertIsInstance(values, np.memmap)
+            del values
+            self.assertEqual(np.load(path).shape, (3, 1, 2, 3))
+
+        with self.assertRaises(ValueError):
+            link.record_patches(["pcolor"], 3, out=np.empty((3, 1, 3, 2)))
+
+    def test_get_netlogo_home(self):
+        with tempfile.TemporaryDirectory() as netlogo_home:
+            with mock.patch.dict(os.environ, {"NETLOGO_HOME": netlogo_home}):
+                self.assertEqual(pynetlogo.core.get_netlogo_home(), netlogo_home)
+
+        with tempfile.TemporaryDirectory() as prefix:
+            os.makedirs(os.path.join(prefix, "NetLogo 6.3.0", "app"))
+            open(os.path.join(prefix, "NetLogo 6.3.0", "app", "netlogo-6.3.0.jar"), "w").close()
+            # the user extensions folder and other entries without the jar are skipped
+            os.mkdir(os.path.join(prefix, ".netlogo"))
+            open(os.path.join(prefix, "netlogo.txt"), "w").close()
+            with mock.patch.object(pynetlogo.core, "LINUX_PREFIXES", ["/nonexistent", prefix]):
+                self.assertEqual(
+                    pynetlogo.core.find_netlogo_linux(), os.path.join(prefix, "NetLogo 6.3.0")
+                )
+
+    def test_resolve_classpath(self):
+        with tempfile.TemporaryDirectory() as cache_dir, tempfile.TemporaryDirectory() as home:
+            os.makedirs(os.path.join(home, "app", "extensions"))
+            for jar in ["NetLogo.jar", "scala.jar"]:
+                open(os.path.join(home, "app", jar), "w").close()
+
+            with mock.patch.dict(os.environ, {"PYNETLOGO_CACHE_DIR": cache_dir}):
+                # the installation is walked once to find both directories and jars
+                with mock.patch.object(os, "walk", wraps=os.walk) as walk:
+                    jars, extensions = pynetlogo.core.resolve_classpath(home)
+                walk.assert_called_once_with(home)
+                self.assertEqual(os.path.basename(jars[0]), "NetLogo.jar")
+                self.assertEqual(len(jars), 2)
+                self.assertEqual(extensions, os.path.join(home, "app", "extensions"))
+                self.assertEqual(len(os.listdir(cache_dir)), 1)
+
+                with mock.patch.object(pynetlogo.core, "walk_install") as walk_install:
+                    self.assertEqual(pynetlogo.core.resolve_classpath(home)[0], jars)
+                    walk_install.assert_not_called()
+
+                    # the manifest is refreshed if a jar is added in a nested directory
+                    jar = os.path.join(home, "app", "extensions", "gis.jar")
+                    open(jar, "w").close()
+                    extensions = os.path.join(home, "app", "extensions")
+                    os.utime(extensions, (0, os.stat(extensions).st_mtime + 100))
+                    walk_install.return_value = ([home, extensions], [jar])
+                    self.assertEqual(pynetlogo.core.resolve_classpath(home)[0], [jar])
+
+        with self.assertRaises(pynetlogo.NetLogoException):
+            pynetlogo.core.resolve_classpath(None)
+
+    def test_snapshot(self):
+        link = mocked_link()
+        world = '"export-world data (NetLogo 6.3.0)"\n"GLOBALS"\n'
+        link.link.exportWorldToString.return_value = world
+
+        for compress in [True, False]:
+            state = link.snapshot(compress=compress)
+            self.assertIsInstance(state, bytes)
+            link.restore(state)
+            link.link.importWorldFromString.assert_called_with(world)
+
+        self.assertLess(len(link.snapshot(compress=True)), len(world) + 20)
+
+    def test_batch(self):
+        link = mocked_link()
+        java_batch = link.link.runBatch.return_value
+        java_batch.getResults.return_value = [
+            None,
+            nl_result("Double", 10.0),
+            nl_result("Double", 3.0),
+        ]
+        java_batch.getErrors.return_value = [None, None, None]
+        java_batch.getExecuted.return_value = 3
+
+        with link.batch() as batch:
+            batch.command("setup")
+            batch.report("count sheep", key="sheep")
+            batch.report("count wolves")
+            self.assertEqual(len(batch), 3)
+        link.link.runBatch.assert_called_once_with(
+            ["setup", "count sheep", "count wolves"], [False, True, True], True
+        )
+        self.assertEqual(batch.results, {"sheep": 10.0, "count wolves": 3.0})
+
+        java_batch.getErrors.return_value = [None, None, "Nothing named WOLVES"]
+        batch = link.batch().command("setup").report("count sheep").report("count wolves")
+        with self.assertRaises(pynetlogo.NetLogoBatchException) as context:
+            batch.run()
+        self.assertEqual(context.exception.errors, {2: "Nothing named WOLVES"})
+        self.assertEqual(context.exception.results, {"count sheep": 10.0})
+
     def testNetlogoLink(self):
         pass
         #         link = pynetlogo.NetLogoLink(True, False)
@@ -50,6 +550,28 @@ class Test(unittest.TestCase):
     def test_command(self):
         pass
 
+    def test_repeat_report(self):
+        link = mocked_link()
+        series = link.link.repeatReport.return_value
+        series.getResults.return_value = [
+            nl_result("DoubleList", np.array([1.0, 2.0, 3.0])),
+            nl_result(
+                "NestedList",
+                [nl_result("DoubleList", np.array([1.0])), nl_result("DoubleList", np.array([]))],
+            ),
+        ]
+
+        results = link.repeat_report(["count sheep", "[energy] of wolves"], 2)
+        link.link.repeatReport.assert_called_once_with(
+            "go", ["count sheep", "[energy] of wolves"], 2, True
+        )
+        np.testing.assert_array_equal(results["count sheep"], [1.0, 2.0, 3.0])
+        self.assertEqual(len(results["[energy] of wolves"]), 2)
+        np.testing.assert_array_equal(results["[energy] of wolves"][0], [1.0])
+
+        with self.assertRaises(pynetlogo.NetLogoException):
+            link.repeat_report(1, 2)
+
     def test_report(self):
         pass
 
@@ -0,0 +1,68 @@
+import threading
+import time
+import unittest
+
+try:
+    import unittest.mock as mock
+except ImportError:
+    import mock
+
+from src.pynetlogo.pool import WorkspacePool
+
+
+class TestWorkspacePool(unittest.TestCase):
+    @mock.patch("src.pynetlogo.pool.NetLogoLink")
+    def test_pool(self, mocked_link):
+        links = [mock.Mock(name="link{}".format(i)) for i in range(3)]
+        for i, link in enumerate(links):
+            link.report.return_value = i
+        mocked_link.side_effect = links
+
+        with WorkspacePool("model.nlogo", n_workspaces=3) as pool:
+            self.assertEqual(len(pool), 3)
+            for link in links:
+                link.load_model.assert_called_once_with("model.nlogo")
+                self.assertFalse(mocked_link.call_args.kwargs["gui"])
+
+            pool.broadcast("setup")
+            for link in links:
+                link.command.assert_called_once_with("setup")
+
+            self.assertEqual(pool.gather("count sheep"), [0, 1, 2])
+
+            results = list(pool.map(lambda link, x: x * 2, range(10)))
+            self.assertEqual(results, [x * 2 for x in range(10)])
+
+            pool.restore(b"state")
+            for link in links:
+                link.restore.assert_called_once_with(b"state")
+
+        for link in links:
+            link.kill_workspace.assert_called_once_with()
+
+    @mock.patch("src.pynetlogo.pool.NetLogoLink")
+    def test_workspaces_are_exclusive(self, mocked_link):
+        mocked_link.side_effect = lambda **kwargs: mock.Mock()
+        in_use = set()
+        peak = []
+        lock = threading.Lock()
+
+        def run(link, _):
+            with lock:
+                self.assertNotIn(id(link), in_use)
+                in_use.add(id(link))
+                peak.append(len(in_use))
+            # hold the workspace, so a call that overlaps on it would find it in use
+            time.sleep(0.005)
+            with lock:
+                in_use.remove(id(link))
+            return True
+
+        with WorkspacePool("model.nlogo", n_workspaces=2) as pool:
+            self.assertTrue(all(pool.map(run, range(50))))
+        # calls on different workspaces did overlap
+        self.assertEqual(max(peak), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,151 @@
+import os
+import socket
+import tempfile
+import time
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from src.pynetlogo.core import NetLogoException
+from src.pynetlogo.remote import NetLogoServer, RemoteNetLogoLink, run_remote_experiments
+
+from .test_experiments import fake_link
+
+
+def echo_link():
+    link = fake_link()
+    link.load_model.return_value = None
+    link.report.side_effect = (
+        lambda value: object() if isinstance(value, str) and value == "self" else value
+    )
+    link.patch_set.side_effect = lambda attribute, data: data
+
+    def command(netlogo_command):
+        if netlogo_command == "boom":
+            raise NetLogoException("Nothing named BOOM has been defined.")
+
+    link.command.side_effect = command
+    return link
+
+
+class TestRemote(unittest.TestCase):
+    def test_round_trip(self):
+        with NetLogoServer(("127.0.0.1", 0), link_factory=echo_link).start() as server:
+            with RemoteNetLogoLink(server.address, timeout=5) as link:
+                self.assertEqual(link.n_workspaces, 1)
+
+                array = np.arange(12.0).reshape(3, 4)
+                np.testing.assert_array_equal(link.report(array), array)
+
+                strings = np.array(["a", "bc", ""])
+                np.testing.assert_array_equal(link.report(strings), strings)
+
+                nested = np.empty(2, dtype=object)
+                nested[:] = [np.arange(2), "a"]
+                self.assertEqual(link.report(nested)[1], "a")
+
+                value = {"x": 1.5, 2: (True, None, b"\x00\x01")}
+                self.assertEqual(link.report(value), value)
+
+                frame = pd.DataFrame(
+                    {"a": [1.0, 2.0], "b": ["x", "y"]},
+                    index=pd.MultiIndex.from_tuples([(0, 1), (1, 2)], names=["end1", "end2"]),
+                )
+                pd.testing.assert_frame_equal(link.patch_set("pcolor", frame), frame)
+
+                series = pd.Series([1.0, 2.0], index=pd.Index([0, 1], name="tick"), name="s")
+                pd.testing.assert_series_equal(link.report(series), series)
+
+                with self.assertRaises(NetLogoException) as context:
+                    link.command("boom")
+                self.assertIn("BOOM", str(context.exception))
+
+                # values that can not be sent are reported as an error
+                with self.assertRaises(TypeError):
+                    link.report(object())
+                with self.assertRaises(NetLogoException):
+                    link.report("self")
+
+        for workspace in server.links:
+            workspace.kill_workspace.assert_called_once_with()
+
+    def test_authkey(self):
+        server = NetLogoServer(("127.0.0.1", 0), link_factory=echo_link, authkey="secret")
+        with server.start():
+            with RemoteNetLogoLink(server.address, timeout=5, authkey=b"secret") as link:
+                self.assertEqual(link.report("count sheep"), "count sheep")
+
+            for authkey in [None, "wrong"]:
+                with self.assertRaises(NetLogoException):
+                    RemoteNetLogoLink(server.address, timeout=5, authkey=authkey)
+
+        with self.assertWarns(UserWarning):
+            NetLogoServer(("0.0.0.0", 0), link_factory=echo_link).close()
+
+    def test_message_size(self):
+        with NetLogoServer(
+            ("127.0.0.1", 0), link_factory=echo_link, max_message_size=1000
+        ).start() as server:
+            with RemoteNetLogoLink(server.address, timeout=5) as link:
+                self.assertEqual(link.report(np.zeros(10)).shape, (10,))
+                # the server closes the connection instead of receiving the array
+                with self.assertRaises(NetLogoException):
+                    link.report(np.zeros(1000))
+
+    def test_timeout(self):
+        def slow_link():
+            link = echo_link()
+
+            def report(value):
+                if value == "slow":
+                    time.sleep(1)
+                    return "slow-result"
+                return value
+
+            link.report.side_effect = report
+            return link
+
+        with NetLogoServer(("127.0.0.1", 0), link_factory=slow_link).start() as server:
+            with RemoteNetLogoLink(server.address, timeout=0.3) as link:
+                with self.assertRaisesRegex(NetLogoException, "failed"):
+                    link.report("slow")
+                # the late reply must not be taken as the answer to the next call
+                with self.assertRaisesRegex(NetLogoException, "failed"):
+                    link.report("fast")
+
+    @unittest.skipUnless(hasattr(socket, "AF_UNIX"), "requires Unix sockets")
+    def test_unix_socket(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "netlogo.sock")
+            with NetLogoServer(path, link_factory=echo_link).start():
+                with RemoteNetLogoLink(path, timeout=5) as link:
+                    self.assertEqual(link.report("count sheep"), "count sheep")
+
+    def test_run_remote_experiments(self):
+        experiments = pd.DataFrame({"x": [1.0, 2.0, 3.0, 4.0, 5.0]}, index=list("abcde"))
+
+        with NetLogoServer(
+            ("127.0.0.1", 0), n_workspaces=2, link_factory=echo_link
+        ).start() as first, NetLogoServer(
+            ("127.0.0.1", 0), link_factory=echo_link
+        ).start() as second:
+            results = run_remote_experiments(
+                [first.address, second.address],
+                "model.nlogo",
+                experiments,
+                reporters=["r1", "r2"],
+                ticks=3,
+                timeout=5,
+            )
+            links = first.links + second.links
+
+        self.assertEqual(results.shape, (20, 2))
+        np.testing.assert_array_equal(results.loc["c", "r2"], [6.0] * 4)
+        for link in links:
+            link.load_model.assert_called_once_with("model.nlogo")
+        self.assertEqual(sum(link.repeat_report.call_count for link in links), 5)
+
+
+if __name__ == "__main__":
+    unittest.main()
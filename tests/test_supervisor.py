@@ -0,0 +1,131 @@
+import multiprocessing
+import os
+import tempfile
+import time
+import unittest
+
+import pandas as pd
+
+from src.pynetlogo.core import NetLogoException
+from src.pynetlogo.supervisor import SupervisedPool
+
+
+class FakeLink:
+    def load_model(self, path):
+        self.state = {}
+
+    def kill_workspace(self):
+        pass
+
+    def set_globals(self, values):
+        self.state.update(values)
+
+    def command(self, netlogo_command):
+        pass
+
+    def repeat_report(self, reporters, reps, go="go", include_t0=True):
+        n = reps + 1 if include_t0 else reps
+        return {reporter: [self.state["x"]] * n for reporter in reporters}
+
+
+class HangingLink:
+    """A link whose model takes forever to load."""
+
+    def __init__(self):
+        time.sleep(60)
+
+
+def square(link, x):
+    return x * x
+
+
+def pid(link, _):
+    return os.getpid()
+
+
+def crash_once(link, marker):
+    if not os.path.exists(marker):
+        open(marker, "w").close()
+        os._exit(1)
+    return "recovered"
+
+
+def hang_once(link, marker):
+    if not os.path.exists(marker):
+        open(marker, "w").close()
+        time.sleep(60)
+    return "recovered"
+
+
+def always_crash(link):
+    os._exit(1)
+
+
+def model_error(link):
+    raise NetLogoException("Nothing named BOOM has been defined.")
+
+
+def out_of_memory(link, marker):
+    if not os.path.exists(marker):
+        open(marker, "w").close()
+        raise NetLogoException("java.lang.OutOfMemoryError: Java heap space")
+    return "recovered"
+
+
+class TestSupervisedPool(unittest.TestCase):
+    def test_map_and_experiments(self):
+        with SupervisedPool("model.nlogo", n_workers=2, link_factory=FakeLink) as pool:
+            self.assertEqual(list(pool.map(square, range(10))), [x * x for x in range(10)])
+
+            experiments = pd.DataFrame({"x": [1.0, 2.0, 3.0]}, index=list("abc"))
+            results = pool.run_experiments(experiments, ["r1", "r2"], ticks=2)
+            self.assertEqual(results.shape, (9, 2))
+            self.assertEqual(list(results.loc["c", "r2"]), [3.0] * 3)
+
+            with self.assertRaises(NetLogoException):
+                pool.submit(model_error).result()
+        stats = pool.stats()
+        self.assertEqual(stats["errors"], 1)
+        self.assertEqual(stats["restarts"], 0)
+
+    def test_restarts(self):
+        with tempfile.TemporaryDirectory() as directory, SupervisedPool(
+            "model.nlogo", n_workers=1, timeout=2, max_retries=1, link_factory=FakeLink
+        ) as pool:
+            marker = os.path.join(directory, "{}")
+            self.assertEqual(pool.submit(crash_once, marker.format("crash")).result(), "recovered")
+            self.assertEqual(pool.submit(hang_once, marker.format("hang")).result(), "recovered")
+            self.assertEqual(
+                pool.submit(out_of_memory, marker.format("memory")).result(), "recovered"
+            )
+            with self.assertRaises(NetLogoException):
+                pool.submit(always_crash).result()
+
+        stats = pool.stats()
+        self.assertEqual(stats["timeouts"], 1)
+        self.assertEqual(stats["crashes"], 4)
+        self.assertEqual(stats["retries"], 4)
+        self.assertEqual(stats["restarts"], 4)
+        self.assertEqual(stats["failed"], 1)
+        self.assertEqual(stats["completed"], 3)
+
+    def test_max_runs(self):
+        with SupervisedPool("model.nlogo", n_workers=1, max_runs=2, link_factory=FakeLink) as pool:
+            pids = list(pool.map(pid, range(5)))
+        self.assertEqual(len(set(pids)), 3)
+        self.assertEqual(pool.stats()["recycled"], 2)
+
+    def test_startup_timeout(self):
+        pool = SupervisedPool(
+            "model.nlogo", n_workers=1, max_retries=0, startup_timeout=3, link_factory=HangingLink
+        )
+        with pool:
+            with self.assertRaises(NetLogoException):
+                pool.submit(square, 2).result()
+            # workers that did not start in time are killed, not left loading the model
+            self.assertEqual(multiprocessing.active_children(), [])
+        self.assertEqual(pool.stats()["failed"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()